@@ -32,6 +32,7 @@ import math
 
 import numpy as np
 import qtradex as qx
+from engine import positions
 
 
 class AroonMfiVwap(qx.BaseBot):
@@ -115,6 +116,19 @@ class AroonMfiVwap(qx.BaseBot):
 
         return None  # No action if conditions are not met
 
+    def signals(self, data, indicators):
+        # vectorized `strategy` for `engine.backtest`
+        aroon = indicators["aroon_up"] - indicators["aroon_down"]
+        bullish = aroon > self.tune["aroon_buy"]
+        return positions.gate(
+            bullish & (indicators["short_ema"] < indicators["vwap"]),
+            ~bullish
+            & (indicators["mfi"] > self.tune["mfi"])
+            & (aroon < self.tune["aroon_sell"])
+            & (indicators["short_ema"] > indicators["vwap"]),
+            first="either",
+        )
+
     def fitness(self, states, raw_states, asset, currency):
         return [
             "roi_gross",
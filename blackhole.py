@@ -139,7 +139,7 @@ class BlackHoleStrategy(qx.BaseBot):
                 return qx.Buy()
 
         # Check for volatility surge to trigger breakout
-        if any(indicators["volatility_surge"]) and isinstance(
+        if indicators["volatility_surge"] and isinstance(
             tick_info["last_trade"], qx.Buy
         ):
             return qx.Sell()
@@ -156,6 +156,20 @@ class BlackHoleStrategy(qx.BaseBot):
 
         return None
 
+    def signals(self, data, indicators):
+        # vectorized `strategy` for `engine.backtest`
+        buy = indicators["blackhole_zone"] & (
+            indicators["momentum_signal"] > self.tune["momentum_trigger"]
+        )
+        # the first tick always buys
+        buy[0] = True
+        return {
+            "buy": buy,
+            "sell": indicators["volatility_surge"],
+            "buying": indicators["support_level"],
+            "selling": indicators["resistance_level"],
+        }
+
     def fitness(self, states, raw_states, asset, currency):
         return [
             "roi_assets",
@@ -34,14 +34,14 @@ Indicators:
 Strategy:
 
 1. **Channel Trading**:
-   - If the price is within the channel (i.e., `diff` is less than the specified threshold `channel`), 
+   - If the price is within the channel (i.e., the band width is less than the specified threshold `channel`), 
    the bot checks if the price is lower than the lower channel (buy condition) 
    or higher than the upper channel (sell condition).
    - **qx.Buy Signal**: Price * `channel_buy_factor` < Lower Channel
    - **qx.Sell Signal**: Price * `channel_sell_factor` > Upper Channel
 
 2. **Trending Market**:
-   - If the price is trending (i.e., `diff` is greater than the `channel` threshold), 
+   - If the price is trending (i.e., the band width is greater than the `channel` threshold), 
    the bot checks if the price is above or below the EMA.
    - **qx.Buy Signal**: Price * `trend_buy_factor` > EMA
    - **qx.Sell Signal**: Price * `trend_sell_factor` < EMA
@@ -60,6 +60,8 @@ Strategy:
 
 
 import qtradex as qx
+from engine import regimes
+from engine.frame import AlignedFrame
 
 
 class Cthulhu(qx.BaseBot):
@@ -97,17 +99,16 @@ class Cthulhu(qx.BaseBot):
         }
 
     def indicators(self, data):
-        metrics = {}
+        metrics = AlignedFrame(
+            ("ma0", "ma1", "std", "upper", "lower", "sar0", "sar1"),
+            len(data["close"]),
+        )
 
         # Example for moving average (use QX's built-in indicators like EMA or SMA)
         metrics["ma0"] = qx.ti.ema(data["close"], self.tune["ema_period"])
         metrics["ma1"] = metrics["ma0"][:-1]
         metrics["std"] = qx.ti.stddev(data["close"], self.tune["std_period"])
 
-        metrics["ma0"], metrics["ma1"], metrics["std"] = qx.truncate(
-            metrics["ma0"], metrics["ma1"], metrics["std"]
-        )
-
         metrics["upper"] = (
             metrics["ma0"] + self.tune["upper_deviations"] * metrics["std"]
         )  # Upper channel (example)
@@ -115,16 +116,20 @@ class Cthulhu(qx.BaseBot):
             metrics["ma0"] - self.tune["lower_deviations"] * metrics["std"]
         )  # Lower channel (example)
 
-        # Difference for channel trading logic
-        metrics["diff"] = metrics["upper"] - metrics["lower"]
-
         # Parabolic SAR (example, adjust according to your requirements)
         metrics["sar0"] = qx.ti.psar(
             data["high"], data["low"], self.tune["sar_accel"], self.tune["sar_max"]
         )
         metrics["sar1"] = metrics["sar0"][:-1]
 
-        return metrics
+        # Channel or trend regime: the band width, the deviations times the
+        # standard deviation, against the channel threshold
+        width = self.tune["upper_deviations"] + self.tune["lower_deviations"]
+        regime = regimes.labels(
+            data, "stddev", self.tune["std_period"], self.tune["channel"] / width
+        )
+
+        return {**metrics, "regime": regime}
 
     def plot(self, *args):
         qx.plot(
@@ -147,7 +152,7 @@ class Cthulhu(qx.BaseBot):
         upper = indicators["upper"]
         lower = indicators["lower"]
         price = tick_info["close"]
-        diff = indicators["diff"]
+        regime = indicators["regime"]
         sar0 = indicators["sar0"]
         sar1 = indicators["sar1"]
 
@@ -157,13 +162,12 @@ class Cthulhu(qx.BaseBot):
         trend_sell_factor = self.tune["trend_sell_factor"]
         breakout_buy_factor = self.tune["breakout_buy_factor"]
         breakout_sell_factor = self.tune["breakout_sell_factor"]
-        channel = self.tune["channel"]
 
         # PRICE IS CHANNELED:
-        if diff < channel:
-            if channel_buy_factor * price < lower[0]:
+        if regime == regimes.BELOW:
+            if channel_buy_factor * price < lower:
                 return qx.Buy()
-            elif channel_sell_factor * price > upper[0]:
+            elif channel_sell_factor * price > upper:
                 return qx.Sell()
 
         # PRICE IS TRENDING:
@@ -40,6 +40,8 @@ import time
 
 import numpy as np
 import qtradex as qx
+from engine import positions
+from engine.kernels import ema_bank
 
 
 class DirectionalMovement(qx.BaseBot):
@@ -80,9 +82,15 @@ class DirectionalMovement(qx.BaseBot):
         """
         Compute and return the necessary indicators
         """
-        ma_short = qx.ti.ema(data["close"], self.tune["short_period"])
-        ma_mid = qx.ti.ema(data["close"], self.tune["mid_period"])
-        ma_long_ptick = qx.ti.ema(data["close"], self.tune["long_period"])
+        (ma_short, ma_mid, ma_long_ptick), _ = ema_bank(
+            data["close"],
+            [
+                self.tune["short_period"],
+                self.tune["mid_period"],
+                self.tune["long_period"],
+            ],
+            integer=True,
+        )
         ma_long = ma_long_ptick[:-1]
 
         # Directional Movement Indicators (DM+ and DM-)
@@ -155,6 +163,20 @@ class DirectionalMovement(qx.BaseBot):
             ),
         )
 
+    def signals(self, data, indicators):
+        # vectorized `strategy` for `engine.backtest`
+        ma_short = indicators["ma_short"]
+        ma_mid = indicators["ma_mid"]
+        ma_long = indicators["ma_long"]
+        plus_dm = indicators["plus_dm"]
+        minus_dm = indicators["minus_dm"]
+        trending = indicators["adx"] > self.tune["adx_threshold"]
+
+        return positions.gate(
+            (ma_short > ma_long) & (ma_mid < ma_long) & (plus_dm > minus_dm) & trending,
+            (ma_short < ma_long) & (ma_mid > ma_long) & (minus_dm > plus_dm) & trending,
+        )
+
     def fitness(self, states, raw_states, asset, currency):
         return [
             "roi_gross",
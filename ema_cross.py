@@ -35,6 +35,7 @@ import time
 
 import numpy as np
 import qtradex as qx
+from engine import positions
 
 
 class EmaCross(qx.BaseBot):
@@ -87,6 +88,13 @@ class EmaCross(qx.BaseBot):
             return qx.Sell()
         return None
 
+    def signals(self, data, indicators):
+        # vectorized `strategy` for `engine.backtest`
+        return positions.gate(
+            indicators["bottom"] > indicators["ma2"],
+            indicators["top"] < indicators["ma2"],
+        )
+
     def fitness(self, states, raw_states, asset, currency):
         return [
             "roi_gross",
@@ -0,0 +1,41 @@
+"""
+╔═╗╔╦╗╦═╗╔═╗╔╦╗╔═╗═╗ ╦
+║═╬╗║ ╠╦╝╠═╣ ║║║╣ ╔╩╦╝
+╚═╝╚╩ ╩╚═╩ ╩═╩╝╚═╝╩ ╚═
+
+engine
+
+Shared backtesting machinery for the bots in this repository.
+
+A bot opts into the vectorized fast path by implementing
+
+    def signals(self, data, indicators):
+        ...
+
+which receives the candles and indicators of every backtested tick as aligned
+arrays and returns an integer array of +1 (Buy), -1 (Sell) and 0 (no action),
+or a dictionary of market orders and Thresholds levels, see `engine.fills`.
+Bots without a `signals` method fall back to the per tick `qx.backtest`,
+or, if they implement `could_act`, are stepped only on the ticks it marks,
+see `engine.sparse`.
+
+Set QX_HEADLESS=1 and import `engine` before any bot to defer plotting and
+other heavy imports, see `engine.headless`.  Set QX_TUNE_INDEX=1 to have
+`qx.load_tune` and `qx.dispatch` select saved tunes through the sidecar
+index of `engine.tunes` instead of parsing every tune file whole.
+"""
+
+import os
+
+if os.environ.get("QX_HEADLESS") == "1":
+    from engine.headless import enable
+
+    enable()
+
+from engine.lazy import LazyIndicators
+from engine.simulator import backtest, fitness, simulate
+
+if os.environ.get("QX_TUNE_INDEX") == "1":
+    from engine.tunes import enable as enable_tune_index
+
+    enable_tune_index()
@@ -0,0 +1,310 @@
+"""
+╔═╗╔╦╗╦═╗╔═╗╔╦╗╔═╗═╗ ╦
+║═╬╗║ ╠╦╝╠═╣ ║║║╣ ╔╩╦╝
+╚═╝╚╩ ╩╚═╩ ╩═╩╝╚═╝╩ ╚═
+
+bars.py
+
+Event Bars
+
+Renko, Kagi and ZigZag charts drop time: a new bar is drawn only once price
+has moved far enough, so a quiet market draws none and a trending one may
+draw several in a single candle.  `qx.qi.renko` and `qx.qi.kagi` return
+empty arrays, so bars are built here, in one pass over the candles:
+
+    bricks = renko(data["close"], size)
+    bricks["close"], bricks["direction"], bricks["index"]
+
+Every bar records its "open" and "close" price, its "direction", +1 up and
+-1 down, and the "index" of the candle that completed it, which maps bars
+back to candles; Kagi and ZigZag legs also record the "pivot" candle of their
+extreme.  A strategy can compute its indicators on the bar stream, often ten
+times shorter than the candles, and `line` spreads any bar column back over
+the candles, each candle seeing the last bar completed by its close.
+
+Brick sizes and reversal amounts are fixed, or one per candle such as an ATR
+right aligned to the candles.  The builders keep their state between calls,
+so a live bot updates them with each new candle rather than rebuilding:
+
+    builder = RenkoBuilder(size)
+    builder.extend(data["close"])
+    ...
+    new = builder.update(price)
+"""
+
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+# columns of every bar
+COLUMNS = ("open", "close", "direction", "index")
+# columns holding integers rather than prices
+INTEGER = ("direction", "index", "pivot")
+
+
+def _per_candle(value, length):
+    """
+    A scalar, or an array right aligned to `length` candles and front padded
+    with NaN.
+    """
+    if np.ndim(value) == 0:
+        return np.full(length, float(value))
+    value = np.asarray(value, dtype=float)[-length:]
+    return np.concatenate((np.full(length - len(value), np.nan), value))
+
+
+class EventBuilder(ABC):
+    columns = COLUMNS
+
+    def __init__(self):
+        self.bars = {column: [] for column in self.columns}
+        # candles seen so far, the index of the next one
+        self.count = 0
+
+    def _emit(self, **bar):
+        for column in self.columns:
+            self.bars[column].append(bar[column])
+
+    @abstractmethod
+    def _step(self, *prices, amount):
+        """
+        Add one candle's price(s), emitting the bars it completes.
+        """
+
+    def update(self, *prices, amount=None):
+        """
+        Add one candle.
+
+        Parameters:
+        - prices: The candle's price(s).
+        - amount: Brick size or reversal amount for this candle, the
+          builder's own by default; NaN draws no bar.
+
+        Returns:
+        - Number of bars the candle completed.
+        """
+        before = len(self)
+        amount = self.amount if amount is None else amount
+        if not np.isnan(amount) and amount > 0:
+            self._step(*prices, amount=amount)
+        self.count += 1
+        return len(self) - before
+
+    def extend(self, *prices, amount=None):
+        """
+        Add many candles, see `update`.
+
+        Parameters:
+        - prices: One array per price of `update`.
+        - amount: Scalar or per candle array, see `_per_candle`.
+
+        Returns:
+        - Number of bars completed.
+        """
+        before = len(self)
+        length = len(prices[0])
+        amounts = _per_candle(self.amount if amount is None else amount, length)
+        for candle in zip(*(np.asarray(p, dtype=float) for p in prices), amounts):
+            self.update(*candle[:-1], amount=candle[-1])
+        return len(self) - before
+
+    def arrays(self):
+        """
+        Returns:
+        - Dictionary of column name to array, one value per bar.
+        """
+        return {
+            column: np.array(values, dtype=int if column in INTEGER else float)
+            for column, values in self.bars.items()
+        }
+
+    def __len__(self):
+        return len(self.bars["close"])
+
+
+class RenkoBuilder(EventBuilder):
+    def __init__(self, size=1.0):
+        """
+        Parameters:
+        - size: Price distance of a brick.
+        """
+        super().__init__()
+        self.amount = size
+        # top and bottom of the last brick, the first price before any brick
+        self.top = None
+        self.bottom = None
+
+    def _step(self, close, amount):
+        if self.top is None:
+            self.top = self.bottom = close
+            return
+        # a brick continues from the top going up, or the bottom going down,
+        # so a reversal needs twice the distance of a continuation
+        while close >= self.top + amount:
+            self._emit(
+                open=self.top,
+                close=self.top + amount,
+                direction=1,
+                index=self.count,
+            )
+            self.bottom, self.top = self.top, self.top + amount
+        while close <= self.bottom - amount:
+            self._emit(
+                open=self.bottom,
+                close=self.bottom - amount,
+                direction=-1,
+                index=self.count,
+            )
+            self.top, self.bottom = self.bottom, self.bottom - amount
+
+
+class SwingBuilder(EventBuilder):
+    columns = COLUMNS + ("pivot",)
+
+    def __init__(self, amount, relative=False):
+        """
+        Parameters:
+        - amount: Move against the current swing that reverses it.
+        - relative: Whether `amount` is a fraction of the extreme price
+          rather than a price distance.
+        """
+        super().__init__()
+        self.amount = amount
+        self.relative = relative
+        self.direction = 0
+        # price the current swing started from, and its extreme so far
+        self.start = None
+        self.extreme = None
+        self.pivot = None
+
+    def _reversal(self, price, amount):
+        return amount * abs(price) if self.relative else amount
+
+    def _step(self, high, low, amount):
+        if self.start is None:
+            self.start = (high + low) / 2
+        if self.direction == 0:
+            # the first swing goes whichever way moves far enough first
+            if high - self.start >= self._reversal(self.start, amount):
+                self.direction, self.extreme, self.pivot = 1, high, self.count
+            elif self.start - low >= self._reversal(self.start, amount):
+                self.direction, self.extreme, self.pivot = -1, low, self.count
+            return
+
+        if self.direction > 0 and high > self.extreme:
+            self.extreme, self.pivot = high, self.count
+        elif self.direction < 0 and low < self.extreme:
+            self.extreme, self.pivot = low, self.count
+        else:
+            against = self.extreme - low if self.direction > 0 else high - self.extreme
+            if against >= self._reversal(self.extreme, amount):
+                self._emit(
+                    open=self.start,
+                    close=self.extreme,
+                    direction=self.direction,
+                    index=self.count,
+                    pivot=self.pivot,
+                )
+                self.start = self.extreme
+                self.direction = -self.direction
+                self.extreme = low if self.direction < 0 else high
+                self.pivot = self.count
+
+
+class KagiBuilder(SwingBuilder):
+    def __init__(self, reversal=1.0, relative=False):
+        """
+        Parameters:
+        - reversal: Move of the close against the current line that turns it.
+        - relative: Whether `reversal` is a fraction of price.
+        """
+        super().__init__(reversal, relative)
+
+    def _step(self, close, amount):
+        super()._step(close, close, amount)
+
+
+class ZigZagBuilder(SwingBuilder):
+    def __init__(self, deviation=0.05):
+        """
+        Parameters:
+        - deviation: Fraction the high or low must move against the current
+          leg's extreme to turn it.
+        """
+        super().__init__(deviation, relative=True)
+
+
+def renko(close, size):
+    """
+    Renko bricks.
+
+    Parameters:
+    - close: Close prices.
+    - size: Brick size, a scalar or per candle array such as an ATR.
+
+    Returns:
+    - Dictionary of bar columns, see `COLUMNS`.
+    """
+    builder = RenkoBuilder()
+    builder.extend(close, amount=size)
+    return builder.arrays()
+
+
+def kagi(close, reversal, relative=False):
+    """
+    Kagi lines, each from one turn to the next.
+
+    Parameters:
+    - close: Close prices.
+    - reversal: Reversal amount, a scalar or per candle array.
+    - relative: Whether `reversal` is a fraction of price.
+
+    Returns:
+    - Dictionary of bar columns, see `COLUMNS`, and the "pivot" candle.
+    """
+    builder = KagiBuilder(relative=relative)
+    builder.extend(close, amount=reversal)
+    return builder.arrays()
+
+
+def zigzag(high, low, deviation):
+    """
+    ZigZag legs, each from one swing high or low to the next.
+
+    Parameters:
+    - high: High prices.
+    - low: Low prices.
+    - deviation: Fraction of price reversing a leg, a scalar or per candle array.
+
+    Returns:
+    - Dictionary of bar columns, see `COLUMNS`, and the "pivot" candle.
+    """
+    builder = ZigZagBuilder()
+    builder.extend(high, low, amount=deviation)
+    return builder.arrays()
+
+
+def latest(bars, length):
+    """
+    Returns:
+    - For every candle, the index of the last bar completed by its close,
+      -1 before the first bar.
+    """
+    return np.searchsorted(bars["index"], np.arange(length), side="right") - 1
+
+
+def line(bars, length, column="close"):
+    """
+    Spread a bar column back over the candles.
+
+    Parameters:
+    - bars: Bar columns, as from `renko`, `kagi` or `zigzag`.
+    - length: Number of candles.
+    - column: Bar column to spread.
+
+    Returns:
+    - The column of the last bar completed by every candle, from the
+      candle completing the first bar on, right aligned to the candles.
+    """
+    idx = latest(bars, length)
+    return np.asarray(bars[column])[idx[idx >= 0]]
@@ -0,0 +1,54 @@
+"""
+╔═╗╔╦╗╦═╗╔═╗╔╦╗╔═╗═╗ ╦
+║═╬╗║ ╠╦╝╠═╣ ║║║╣ ╔╩╦╝
+╚═╝╚╩ ╩╚═╩ ╩═╩╝╚═╝╩ ╚═
+
+bots.py
+
+Bot Discovery
+
+The engine's command line tools take a bot by the name of its module, such
+as `python -m engine.halving harmonica`.  `load` imports the module and
+builds the bot it defines:
+
+    bot = engine.bots.load("harmonica")
+
+`score` reads the metric a search ranks backtest results by, a NaN ranking
+below everything else.
+"""
+
+import importlib
+import math
+
+import qtradex as qx
+
+
+def bot_class(module):
+    """
+    Returns:
+    - The first `qx.BaseBot` subclass defined in `module` itself.
+    """
+    return next(
+        value
+        for value in vars(module).values()
+        if isinstance(value, type)
+        and issubclass(value, qx.BaseBot)
+        and value.__module__ == module.__name__
+    )
+
+
+def load(name):
+    """
+    Returns:
+    - An instance of the bot defined in the module named `name`.
+    """
+    return bot_class(importlib.import_module(name))()
+
+
+def score(result, metric):
+    """
+    Returns:
+    - `result[metric]`, or minus infinity if it is NaN.
+    """
+    value = result[metric]
+    return -math.inf if math.isnan(value) else value
@@ -0,0 +1,147 @@
+"""
+╔═╗╔╦╗╦═╗╔═╗╔╦╗╔═╗═╗ ╦
+║═╬╗║ ╠╦╝╠═╣ ║║║╣ ╔╩╦╝
+╚═╝╚╩ ╩╚═╩ ╩═╩╝╚═╝╩ ╚═
+
+candles.py
+
+Derived Candles
+
+Heikin-Ashi candles, OHLC4 and the typical price are functions of the
+candles alone, yet bots rebuild them in `indicators()` for every tune an
+optimizer tries, `qx.qi.heikin_ashi` in a per candle loop.  `derived(data)`
+computes each of them once per dataset, on first read, and hands every bot
+the same read-only arrays:
+
+    candles = derived(data)
+    ma = qx.ti.sma(candles["ha_close"], self.tune["ma_period"])
+
+The Heikin-Ashi open is a first order recursion, solved with one linear
+filter; every value equals `qx.qi.heikin_ashi`'s, including its zero first
+close, high and low.
+"""
+
+from collections.abc import Mapping
+
+import numpy as np
+
+
+def heikin_ashi(data):
+    """
+    Heikin-Ashi candles, as `qx.qi.heikin_ashi` computes them.
+
+    Returns:
+    - Dictionary of "ha_open", "ha_high", "ha_low", "ha_close" and "ha_volume".
+    """
+    # scipy is slow to import and only needed here
+    from scipy.signal import lfilter
+
+    open_, high, low, close = (
+        np.asarray(data[k], dtype=float) for k in ("open", "high", "low", "close")
+    )
+    ha_open = np.empty_like(close)
+    ha_open[:1] = open_[:1]
+    # ha_open[i] = (ha_open[i - 1] + close[i - 1]) / 2; halving is exact, so
+    # 0.5 * a + 0.5 * b rounds exactly as (a + b) / 2
+    if len(close) > 1:
+        ha_open[1:] = lfilter([0.5], [1, -0.5], close[:-1], zi=[0.5 * open_[0]])[0]
+
+    ha_close = ohlc4(data)
+    ha_close[:1] = 0
+    ha_high = np.maximum(np.maximum(high, ha_open), ha_close)
+    ha_low = np.minimum(np.minimum(low, ha_open), ha_close)
+    ha_high[:1] = 0
+    ha_low[:1] = 0
+    return {
+        "ha_open": ha_open,
+        "ha_high": ha_high,
+        "ha_low": ha_low,
+        "ha_close": ha_close,
+        "ha_volume": data["volume"],
+    }
+
+
+def ohlc4(data):
+    """
+    Average of the open, high, low and close.
+    """
+    return (data["open"] + data["high"] + data["low"] + data["close"]) / 4
+
+
+def typical(data):
+    """
+    Typical price, the average of the high, low and close.
+    """
+    return (data["high"] + data["low"] + data["close"]) / 3
+
+
+def median(data):
+    """
+    Median price, the average of the high and low.
+    """
+    return (data["high"] + data["low"]) / 2
+
+
+# transform computing each derived candle, and the names it returns
+TRANSFORMS = {
+    ("ha_open", "ha_high", "ha_low", "ha_close", "ha_volume"): heikin_ashi,
+    ("ohlc4",): ohlc4,
+    ("typical",): typical,
+    ("median",): median,
+}
+
+
+class DerivedCandles(Mapping):
+    def __init__(self, data):
+        """
+        Parameters:
+        - data: Historical market data, a `qx.Data`.
+        """
+        self.data = data
+        self.candles = data.raw_candles
+        self._transforms = {
+            name: (names, func) for names, func in TRANSFORMS.items() for name in names
+        }
+        self._values = {}
+
+    def __getitem__(self, name):
+        if name not in self._values:
+            names, func = self._transforms[name]
+            result = func(self.data)
+            if len(names) == 1:
+                result = {name: result}
+            for key, value in result.items():
+                value = np.asarray(value)
+                if not any(value is i for i in self.candles.values()):
+                    # shared by every caller, so no caller may write to it
+                    value.flags.writeable = False
+                self._values[key] = value
+        return self._values[name]
+
+    def __iter__(self):
+        return iter(self._transforms)
+
+    def __len__(self):
+        return len(self._transforms)
+
+
+# derived candles of the datasets read last in this process, by id of the dataset
+_CACHE = {}
+CACHE_SIZE = 8
+
+
+def derived(data):
+    """
+    Returns:
+    - The `DerivedCandles` of a dataset, shared by every caller in this process.
+    """
+    cached = _CACHE.get(id(data))
+    if (
+        cached is None
+        or cached.data is not data
+        or cached.candles is not data.raw_candles
+    ):
+        cached = _CACHE[id(data)] = DerivedCandles(data)
+        while len(_CACHE) > CACHE_SIZE:
+            _CACHE.pop(next(iter(_CACHE)))
+    return cached
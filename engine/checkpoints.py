@@ -0,0 +1,282 @@
+"""
+╔═╗╔╦╗╦═╗╔═╗╔╦╗╔═╗═╗ ╦
+║═╬╗║ ╠╦╝╠═╣ ║║║╣ ╔╩╦╝
+╚═╝╚╩ ╩╚═╩ ╩═╩╝╚═╝╩ ╚═
+
+checkpoints.py
+
+Checkpointed Stepping
+
+A bot with a per tick `strategy()` is stepped serially from the first tick,
+as every decision depends on the state the ticks before it left behind.
+`backtest` steps it as `engine.sparse` does and takes a checkpoint every
+`every` ticks: the time of the last tick stepped, the position and last
+trade, the bot's `engine.state.snapshot`, and the trades made since the
+checkpoint before.  A later backtest resumes from the last of a list of them
+instead of from the first tick:
+
+    result, checkpoints = backtest(bot, data)
+    ...
+    result, checkpoints = backtest(bot, longer_data, start=checkpoints[:k])
+
+Only the ticks after the checkpoint are stepped; the accounting of the
+whole backtest is vectorized and redone from the trades of the checkpoints
+before, so the result is that of a backtest from the first tick, on candles
+that agree up to the checkpoint.
+
+Each checkpoint only holds its own segment's trades, so taking one costs as
+much as the ticks since the last, and it pickles to a few kilobytes however
+many trades came before.  `replay` steps the segments between consecutive
+checkpoints in a process pool, each from its own checkpoint, and tells which
+end on the next one, as a check that a bot's snapshot holds all the state
+its decisions depend on.
+"""
+
+import multiprocessing as mp
+import os
+
+import numpy as np
+import qtradex as qx
+from qtradex.core.backtest import adjust_tuning_parameters
+from qtradex.core.base_bot import Info
+
+from engine.positions import positions, trades
+from engine.simulator import (
+    PER_TICK_METRICS,
+    align,
+    fills,
+    fitness,
+    initial_position,
+    simulate,
+)
+from engine.sparse import masks, step
+from engine.state import restore, same, snapshot
+
+# ticks between checkpoints
+CHECKPOINT = 1000
+
+_WORKER_BOT = None
+_WORKER_TICKS = None
+_WORKER_CHECKPOINTS = []
+
+
+def _tune(bot, data, range_periods):
+    """
+    Reset a bot and adjust its tune, as `engine.sparse.backtest` does.
+
+    Returns:
+    - The warmup, and the tune to put back after stepping.
+    """
+    if not hasattr(bot, "info"):
+        bot.info = Info({"mode": "backtest"})
+    bot.reset()
+    warmup = bot.autorange()
+    orig_tune = bot.tune.copy()
+    if range_periods:
+        adjust_tuning_parameters(bot, data.candle_size)
+    return warmup, orig_tune
+
+
+def _ticks(bot, data, warmup):
+    """
+    Returns:
+    - The candles, scheduled time and indicators of every tick.
+    - The `engine.sparse.masks` of the bot.
+    - Empty "buy" and "sell" orders of every tick.
+    """
+    indicators = dict(bot.indicators(data))
+    length = min(map(len, (indicators or data).values()))
+    candles, now, ticks = align(data, length, warmup)
+    rows = {k: np.asarray(v)[-length:][ticks] for k, v in indicators.items()}
+    orders = {side: np.zeros(len(now), dtype=bool) for side in ("buy", "sell")}
+    return candles, now, rows, masks(bot, candles, rows), orders
+
+
+def checkpoint(bot, now, begin, end, position, last_trade, part, before):
+    """
+    A checkpoint of a bot stepped up to tick `end`.
+
+    Parameters:
+    - bot: The trading bot instance.
+    - now: Scheduled time of every tick.
+    - begin, end: Ticks stepped since the checkpoint before.
+    - position, last_trade: Those after the last tick stepped.
+    - part: Dictionary of the "buy" and "sell" orders of ticks `begin` to
+      `end`, as from `engine.sparse.step`.
+    - before: Position before `begin`.
+
+    Returns:
+    - Dictionary of the "unix" time of the last tick stepped, the "position"
+      and "last_trade", the bot's "state" and the "trades" since `begin`, as
+      (unix, side) arrays.
+    """
+    held = positions(part["buy"], part["sell"], before)
+    index = trades(held, before)
+    return {
+        "unix": float(now[end - 1]),
+        "position": int(position),
+        "last_trade": last_trade,
+        "state": snapshot(bot),
+        "trades": (now[begin + index], held[index]),
+    }
+
+
+def _resume(bot, now, start, orders):
+    """
+    Restore a bot to the last of a list of checkpoints, marking the trades
+    of all of them in `orders`.
+
+    Returns:
+    - The first tick to step, the position and the last trade.
+    """
+    last = start[-1]
+    begin = int(np.searchsorted(now, last["unix"], side="right"))
+    if begin == 0 or now[begin - 1] != last["unix"]:
+        raise ValueError("The checkpoint does not fall on the ticks of this data.")
+    for past in start:
+        unix, side = past["trades"]
+        index = np.searchsorted(now, unix)
+        if np.any(now[np.minimum(index, len(now) - 1)] != unix):
+            raise ValueError("The checkpoint does not fall on the ticks of this data.")
+        orders["buy"][index[side > 0]] = True
+        orders["sell"][index[side < 0]] = True
+    restore(bot, last["state"])
+    return begin, last["position"], last["last_trade"]
+
+
+def backtest(
+    bot,
+    data,
+    wallet=None,
+    every=CHECKPOINT,
+    start=None,
+    range_periods=True,
+    return_states=False,
+):
+    """
+    Backtest a bot with a per tick `strategy()`, taking checkpoints.
+
+    Parameters:
+    - bot: The trading bot instance.
+    - data: Historical market data, a `qx.Data`.
+    - wallet: Optional initial PaperWallet, the same for a resumed backtest.
+    - every: Ticks between checkpoints.
+    - start: Optional list of checkpoints, oldest first, as from a backtest
+      of the same bot and wallet; the last is resumed from.
+    - range_periods: Whether to adjust tuning parameters based on candle size.
+    - return_states: Whether to also return the simulated states.
+
+    Returns:
+    - The fitness dictionary, as from `engine.backtest`, or
+      [fitness, states] if `return_states`.
+    - List of the checkpoints, oldest first, those of `start` included.
+    """
+    keys, custom = bot.fitness(None, None, data.asset, data.currency)
+    if custom or any(k in PER_TICK_METRICS for k in keys):
+        raise ValueError("Checkpointed stepping only computes vectorized metrics.")
+    if wallet is None:
+        wallet = qx.PaperWallet({data.asset: 0, data.currency: 1})
+    initial = initial_position(wallet[data.asset], wallet[data.currency])
+
+    warmup, orig_tune = _tune(bot, data, range_periods)
+    checkpoints = list(start or ())
+    try:
+        candles, now, rows, could, orders = _ticks(bot, data, warmup)
+        if start:
+            begin, position, last_trade = _resume(bot, now, start, orders)
+        else:
+            begin, position, last_trade = 0, initial, None
+        for end in range(begin + every, len(now) + every, every):
+            end = min(end, len(now))
+            before = position
+            part, position, last_trade = step(
+                bot, candles, rows, begin, end, position, last_trade, could
+            )
+            orders["buy"][begin:end] = part["buy"]
+            orders["sell"][begin:end] = part["sell"]
+            checkpoints.append(
+                checkpoint(bot, now, begin, end, position, last_trade, part, before)
+            )
+            begin = end
+    finally:
+        bot.tune = orig_tune
+
+    fill_candles, initial_price = fills(data, now, warmup)
+    states = simulate(
+        orders,
+        candles,
+        wallet,
+        (data.asset, data.currency),
+        candle_size=data.candle_size,
+        now=now,
+        fill_candles=fill_candles,
+        initial_price=initial_price,
+    )
+    ret = fitness(keys, states)
+    if return_states:
+        ret = [ret, states]
+    return ret, checkpoints
+
+
+def _worker_segment(i):
+    stop = _WORKER_CHECKPOINTS[i + 1]
+    candles, now, rows, could, orders = _WORKER_TICKS
+    orders = {k: np.zeros_like(v) for k, v in orders.items()}
+    begin, before, last_trade = _resume(
+        _WORKER_BOT, now, _WORKER_CHECKPOINTS[: i + 1], orders
+    )
+    end = int(np.searchsorted(now, stop["unix"], side="right"))
+    part, position, last_trade = step(
+        _WORKER_BOT, candles, rows, begin, end, before, last_trade, could
+    )
+    reached = checkpoint(
+        _WORKER_BOT, now, begin, end, position, last_trade, part, before
+    )
+    return _same(reached, stop)
+
+
+def _same(a, b):
+    """
+    Whether two checkpoints agree.
+    """
+    return (
+        a["unix"] == b["unix"]
+        and a["position"] == b["position"]
+        and type(a["last_trade"]) is type(b["last_trade"])
+        and same(a["state"], b["state"])
+        and all(np.array_equal(x, y) for x, y in zip(a["trades"], b["trades"]))
+    )
+
+
+def replay(bot, data, checkpoints, processes=None, range_periods=True):
+    """
+    Step every segment between consecutive checkpoints from the first of
+    them, in parallel.
+
+    Parameters:
+    - bot: The trading bot instance the checkpoints were taken of.
+    - data: The data they were taken on.
+    - checkpoints: The checkpoints, oldest first, as from `backtest`.
+    - processes: Worker processes, every cpu by default; 1 runs serially.
+    - range_periods: As for that backtest.
+
+    Returns:
+    - List of whether each segment ends on the checkpoint after it.
+    """
+    global _WORKER_BOT, _WORKER_TICKS, _WORKER_CHECKPOINTS
+    _WORKER_BOT = bot
+    _WORKER_CHECKPOINTS = checkpoints
+
+    jobs = range(len(checkpoints) - 1)
+    processes = processes or os.cpu_count()
+    warmup, orig_tune = _tune(bot, data, range_periods)
+    try:
+        # indicators are computed once, and shared by the forked workers
+        _WORKER_TICKS = _ticks(bot, data, warmup)
+        if processes > 1:
+            ctx = mp.get_context("fork")
+            with ctx.Pool(processes=processes) as pool:
+                return pool.map(_worker_segment, jobs)
+        return [_worker_segment(i) for i in jobs]
+    finally:
+        bot.tune = orig_tune
@@ -0,0 +1,260 @@
+"""
+╔═╗╔╦╗╦═╗╔═╗╔╦╗╔═╗═╗ ╦
+║═╬╗║ ╠╦╝╠═╣ ║║║╣ ╔╩╦╝
+╚═╝╚╩ ╩╚═╩ ╩═╩╝╚═╝╩ ╚═
+
+chunked.py
+
+Out-of-core Backtests
+
+Two years of one minute candles are a million rows per column, which every
+`main()` loads whole through `qx.Data`.  `write` appends a dataset's candles
+to an on-disk store of one raw float64 file per column, so a long history
+can be downloaded a block at a time, and `CandleStore` memory maps them back
+without reading them:
+
+    for begin, end in months:
+        write(qx.Data(..., begin=begin, end=end, candle_size=60), path)
+    engine.chunked.backtest(bot, CandleStore(path), chunk=100_000)
+
+`backtest` walks the store a chunk of candles at a time, as
+`engine.backtest` would walk it whole.  Each chunk's indicators are computed
+on the chunk and the `overlap` candles before it, by default `OVERLAP` times
+the bot's `autorange()`, which is enough for windowed indicators to be exact
+and for recursive ones such as EMAs and Wilder smoothing to forget where
+they started.  Indicators of unbounded memory, such as OBV's level, and
+those reading the end of the dataset, such as `blackhole.py`'s ATR
+reference, are not reproduced.
+
+The position, balances and last trade carry from one chunk to the next.
+Only the trades and the few ticks the metrics read are kept, so memory is
+bounded by the chunk size whatever the length of the history, apart from
+the trades themselves and `qx.ti`'s own result cache, which keeps up to 256
+results per indicator; set QTD_CACHE_DISABLE=1 for the tightest bound.
+"""
+
+import json
+import os
+
+import numpy as np
+import qtradex as qx
+from qtradex.core.backtest import adjust_tuning_parameters
+from qtradex.core.base_bot import Info
+
+from engine.fills import orders_from_signals
+from engine.lazy import LazyIndicators
+from engine.simulator import (
+    PER_TICK_METRICS,
+    Ledger,
+    eager_signals,
+    fitness,
+    lazy_signals,
+)
+
+COLUMNS = ("unix", "open", "high", "low", "close", "volume")
+META = "meta.json"
+# candles per chunk
+CHUNK = 100_000
+# overlap in multiples of the bot's autorange
+OVERLAP = 10
+
+
+def write(data, path):
+    """
+    Append the candles of a dataset to a store, creating it if needed.
+
+    Candles at or before the last one stored are skipped, so overlapping
+    downloads may be appended one after the other.
+
+    Parameters:
+    - data: Historical market data, a `qx.Data`.
+    - path: Directory of the store.
+
+    Returns:
+    - Number of candles appended.
+    """
+    os.makedirs(path, exist_ok=True)
+    meta_file = os.path.join(path, META)
+    if os.path.exists(meta_file):
+        with open(meta_file) as handle:
+            meta = json.load(handle)
+        stored = (meta["asset"], meta["currency"], meta["candle_size"])
+        if stored != (data.asset, data.currency, data.candle_size):
+            raise ValueError(f"Store {path} holds {stored}, not this dataset's.")
+    else:
+        meta = {
+            "exchange": data.exchange,
+            "asset": data.asset,
+            "currency": data.currency,
+            "candle_size": data.candle_size,
+            "length": 0,
+            "last": None,
+        }
+
+    unix = np.asarray(data["unix"], dtype=float)
+    keep = unix > meta["last"] if meta["last"] is not None else slice(None)
+    count = len(unix[keep])
+    if not count:
+        return 0
+    for column in COLUMNS:
+        with open(os.path.join(path, f"{column}.f8"), "ab") as handle:
+            np.ascontiguousarray(data[column], dtype=float)[keep].tofile(handle)
+
+    meta["length"] += count
+    meta["last"] = float(unix[keep][-1])
+    temporary = f"{meta_file}.{os.getpid()}"
+    with open(temporary, "w") as handle:
+        json.dump(meta, handle)
+    os.replace(temporary, meta_file)
+    return count
+
+
+class CandleStore:
+    def __init__(self, path):
+        """
+        Parameters:
+        - path: Directory of a store written by `write`.
+        """
+        with open(os.path.join(path, META)) as handle:
+            meta = json.load(handle)
+        if not meta["length"]:
+            raise ValueError(f"Store {path} holds no candles.")
+        self.path = path
+        self.exchange = meta["exchange"]
+        self.asset = meta["asset"]
+        self.currency = meta["currency"]
+        self.candle_size = meta["candle_size"]
+        self.columns = {
+            column: np.memmap(
+                os.path.join(path, f"{column}.f8"),
+                dtype=float,
+                mode="r",
+                shape=(meta["length"],),
+            )
+            for column in COLUMNS
+        }
+        self.begin = int(self.columns["unix"][0])
+        self.end = int(self.columns["unix"][-1])
+
+    def __len__(self):
+        return len(self.columns["unix"])
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    def window(self, start, stop):
+        """
+        Returns:
+        - A `qx.Data` of the candles from `start` to `stop`, read into memory.
+        """
+        data = qx.Data(
+            self.exchange,
+            self.asset,
+            self.currency,
+            self.begin,
+            self.end,
+            candle_size=self.candle_size,
+            placeholder=True,
+        )
+        data.raw_candles = {k: np.array(v[start:stop]) for k, v in self.columns.items()}
+        data.begin = int(data.raw_candles["unix"][0])
+        data.end = int(data.raw_candles["unix"][-1])
+        data.days = (data.end - data.begin) / 86400
+        return data
+
+
+def backtest(
+    bot,
+    store,
+    wallet=None,
+    chunk=CHUNK,
+    overlap=None,
+    range_periods=True,
+    return_states=False,
+):
+    """
+    Backtest a bot implementing `signals()` over a `CandleStore`, a chunk at
+    a time.
+
+    Parameters:
+    - bot: The trading bot instance.
+    - store: A `CandleStore`.
+    - wallet: Optional initial PaperWallet.
+    - chunk: Candles per chunk, at least `overlap`.
+    - overlap: Candles before each chunk its indicators are warmed up on,
+      `OVERLAP` times the bot's `autorange()` by default.
+    - range_periods: Whether to adjust tuning parameters based on candle size.
+    - return_states: Whether to also return the states of every trade and
+      of the ticks the metrics read.
+
+    Returns:
+    - The fitness dictionary, as from `engine.backtest`,
+      or [fitness, states] if `return_states`.
+    """
+    if not hasattr(bot, "signals"):
+        raise ValueError("Chunked backtests need a bot implementing signals().")
+    keys, custom = bot.fitness(None, None, store.asset, store.currency)
+    if custom or any(k in PER_TICK_METRICS for k in keys):
+        raise ValueError("Chunked backtests only compute vectorized metrics.")
+
+    if not hasattr(bot, "info"):
+        bot.info = Info({"mode": "backtest"})
+    if wallet is None:
+        wallet = qx.PaperWallet({store.asset: 0, store.currency: 1})
+
+    size = store.candle_size
+    unix, close = store["unix"], store["close"]
+    bot.reset()
+    warmup = bot.autorange()
+    orig_tune = bot.tune.copy()
+    if range_periods:
+        adjust_tuning_parameters(bot, size)
+
+    # first scheduled tick, and the price the wallet is first valued at
+    start = store.begin + size * (warmup + 1)
+    left, right = np.searchsorted(unix, [start, start + size], side="left")
+    initial_price = float(close[right - 1] if right > left else close[0])
+    ledger = Ledger(wallet, (store.asset, store.currency), size, initial_price)
+    try:
+        if overlap is None:
+            overlap = OVERLAP * max(warmup, bot.autorange())
+        # so the first chunk is as long as the indicators need
+        chunk = max(chunk, overlap)
+        for begin in range(0, len(store), chunk):
+            stop = min(begin + chunk, len(store))
+            data = store.window(max(0, begin - overlap), stop)
+            # start the window's tick schedule on the global one's
+            # first point that can land on its candles
+            skip = max(0, int(np.ceil((data.begin - size - start) / size)))
+            data.begin = store.begin + size * skip
+            indicators = bot.indicators(data)
+            if isinstance(indicators, LazyIndicators):
+                candles, now, orders = lazy_signals(bot, data, indicators, warmup)
+            else:
+                candles, now, orders = eager_signals(bot, data, indicators, warmup)
+            if not isinstance(orders, dict):
+                orders = orders_from_signals(orders)
+
+            # ticks at or before the chunk's first candle belong to the last
+            core = np.searchsorted(now, unix[begin - 1], side="right") if begin else 0
+            if begin and not core:
+                raise ValueError(
+                    f"An overlap of {overlap} candles is shorter than the warmup"
+                    " of the bot's indicators."
+                )
+            orders = {k: v[core:] if np.ndim(v) else v for k, v in orders.items()}
+            candles = {k: v[core:] for k, v in candles.items()}
+            now = now[core:]
+            fill = np.searchsorted(data.raw_candles["unix"], now, side="left")
+            fill_candles = {
+                k: data.raw_candles[k][fill] for k in ("open", "high", "low", "close")
+            }
+            ledger.add(orders, candles, now, fill_candles)
+    finally:
+        bot.tune = orig_tune
+
+    states = ledger.states()
+    ret = fitness(keys, states)
+    if return_states:
+        ret = [ret, states]
+    return ret
@@ -0,0 +1,105 @@
+"""
+╔═╗╔╦╗╦═╗╔═╗╔╦╗╔═╗═╗ ╦
+║═╬╗║ ╠╦╝╠═╣ ║║║╣ ╔╩╦╝
+╚═╝╚╩ ╩╚═╩ ╩═╩╝╚═╝╩ ╚═
+
+crossings.py
+
+Crossover Events
+
+`kst.py`, `vortex.py`, `ichimoku.py` and `frama.py` buy while one series is
+above another and sell while it is below, gated on the last trade.  Under
+all-in / all-out execution such a bot only ever trades where the sign of
+the difference changes, so its trades follow from the sorted list of those
+crossings alone, a few dozen over thousands of candles:
+
+    index, direction = crossings(indicators["kst"], indicators["kst_signal"])
+
+`crossings` finds them in one pass over the difference.  A tie or a NaN
+keeps the sign before it, as the comparisons the bots make want neither
+side there.  `gate` turns them into the orders of `positions.gate`, set at
+the crossings and nowhere else:
+
+    def signals(self, data, indicators):
+        return crossings.gate(indicators["kst"], indicators["kst_signal"])
+
+trades exactly as `positions.gate(fast > slow, fast < slow)` does, whatever
+the wallet starts with.
+"""
+
+import numpy as np
+
+from engine.positions import FIRST
+
+
+def _signs(fast, slow):
+    """
+    Sign of `fast - slow` at every tick, 0 at ties and NaN.
+    """
+    fast = np.asarray(fast, dtype=float)
+    slow = np.asarray(slow, dtype=float)
+    # NaN compares False both ways
+    with np.errstate(invalid="ignore"):
+        return (fast > slow).view(np.int8) - (fast < slow).view(np.int8)
+
+
+def _events(sign):
+    """
+    Ticks of `sign` where it changes, and the signs there.
+    """
+    signed = np.flatnonzero(sign)
+    values = sign[signed]
+    # keep only the signed ticks whose sign differs from the signed tick before
+    change = np.concatenate(([True], values[1:] != values[:-1]))[: len(signed)]
+    return signed[change], values[change]
+
+
+def crossings(fast, slow):
+    """
+    Ticks where one series crosses another.
+
+    Parameters:
+    - fast, slow: Arrays of equal length.
+
+    Returns:
+    - Sorted integer array of the ticks where the sign of `fast - slow`
+      changes, the first tick with a sign included.
+    - Integer array of the direction of every crossing, +1 where `fast`
+      goes above `slow` and -1 where it goes below.
+    """
+    return _events(_signs(fast, slow))
+
+
+def gate(fast, slow, first="buy"):
+    """
+    Orders of a bot that buys while `fast` is above `slow` and sells while it
+    is below, gated on the type of its last trade.
+
+    Parameters:
+    - fast, slow: Arrays of equal length, one value per tick.
+    - first: What the bot does before its first trade, one of
+      `positions.FIRST`.
+
+    Returns:
+    - Dictionary of orders, see `engine.fills`, equal in effect to those of
+      `positions.gate(fast > slow, fast < slow, first)`.
+    """
+    if first not in FIRST:
+        raise ValueError(f"Expected first to be one of {FIRST}, got {first!r}.")
+    if len(fast) != len(slow):
+        raise ValueError("Expected as many fast as slow values.")
+    sign = _signs(fast, slow)
+    index, direction = _events(sign)
+    buy = np.zeros(len(sign), dtype=bool)
+    sell = np.zeros(len(sign), dtype=bool)
+    buy[index[direction > 0]] = True
+    sell[index[direction < 0]] = True
+    if first == "buy" and len(sign):
+        if sell[0]:
+            # the first tick buys instead, so the sell fills on the next
+            # tick with a sign, if it is still below
+            later = np.flatnonzero(sign[1:]) + 1
+            if len(later) and sign[later[0]] < 0:
+                sell[later[0]] = True
+        buy[0], sell[0] = True, False
+    return {"buy": buy, "sell": sell}
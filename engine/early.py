@@ -0,0 +1,256 @@
+"""
+╔═╗╔╦╗╦═╗╔═╗╔╦╗╔═╗═╗ ╦
+║═╬╗║ ╠╦╝╠═╣ ║║║╣ ╔╩╦╝
+╚═╝╚╩ ╩╚═╩ ╩═╩╝╚═╝╩ ╚═
+
+early.py
+
+Early Stopping
+
+Most candidates an optimizer tries are hopeless, and most of those show it
+long before the end of the backtest, losing most of the wallet in its first
+months.  `backtest` simulates a candidate a segment of ticks at a time,
+stepping a per tick `strategy()` only as far as it has to, and asks an
+`EarlyStop` after every segment whether the candidate can still matter:
+
+    stop = EarlyStop(max_drawdown=0.7)
+    for tune in candidates:
+        bot.tune = tune
+        engine.early.backtest(bot, data, stop=stop)
+    print(stop.report())
+
+A candidate is stopped once its running drawdown exceeds `max_drawdown` or
+the deepest drawdown of the best candidate so far by `drawdown_slack`, or
+once its wallet has grown less than `roi_ratio` times as much as the best
+candidate's had at the same point of the backtest.  A stopped candidate
+scores every metric less `PENALTY`, as a backtest of too few trades does, so
+no optimizer keeps it.  `engine.sweep.run(..., stop=stop)` evaluates a grid
+this way.  A candidate that recovers late is lost with the hopeless ones;
+the tighter the bounds, the more of those there are and the more ticks are
+saved, so `report()` how much each setting saves on a grid already run in
+full before trusting it.
+
+Segments are simulated as `engine.backtest` simulates the whole.  Bots
+without `signals()` are stepped with `engine.sparse.step`, only on the ticks
+their `could_act()` allows if they implement it, and without a wallet:
+`state["wallet"]` is None, and they may only return `qx.Buy`, `qx.Sell` or
+None.
+"""
+
+import numpy as np
+import qtradex as qx
+from qtradex.core.backtest import adjust_tuning_parameters
+from qtradex.core.base_bot import Info
+
+from engine.fills import orders_from_signals
+from engine.lazy import LazyIndicators
+from engine.simulator import (
+    MIN_TRADES,
+    PENALTY,
+    PER_TICK_METRICS,
+    Ledger,
+    align,
+    eager_signals,
+    fills,
+    fitness,
+    lazy_signals,
+)
+from engine.sparse import masks, step
+
+# segments a backtest is split into
+SEGMENTS = 20
+
+
+class EarlyStop:
+    def __init__(
+        self,
+        max_drawdown=None,
+        drawdown_slack=0.2,
+        roi_ratio=0.25,
+        grace=0.25,
+        metric="roi",
+    ):
+        """
+        Parameters:
+        - max_drawdown: Drawdown, as a positive fraction, that stops any
+          candidate; None for no fixed limit.
+        - drawdown_slack: How much deeper than the best candidate's deepest
+          drawdown a candidate's may go.
+        - roi_ratio: Fraction of the best candidate's wallet growth at the
+          same point a candidate must keep up with.
+        - grace: Fraction of the backtest no candidate is stopped before.
+        - metric: Fitness metric the best candidate is chosen by.
+        """
+        self.max_drawdown = max_drawdown
+        self.drawdown_slack = drawdown_slack
+        self.roi_ratio = roi_ratio
+        self.grace = grace
+        self.metric = metric
+        # score, deepest drawdown, and growth curve of the best candidate
+        self.best = None
+        self.candidates = 0
+        self.stopped = 0
+        self.ticks = 0
+        self.skipped = 0
+
+    def check(self, fraction, growth, drawdown):
+        """
+        Whether to stop a candidate.
+
+        Parameters:
+        - fraction: Fraction of its ticks simulated so far.
+        - growth: Its wallet value relative to the first tick.
+        - drawdown: Its deepest drawdown so far.
+        """
+        if fraction < self.grace:
+            return False
+        if self.max_drawdown is not None and drawdown > self.max_drawdown:
+            return True
+        if self.best is None:
+            return False
+        _, best_drawdown, (fractions, growths) = self.best
+        if drawdown > best_drawdown + self.drawdown_slack:
+            return True
+        return growth < self.roi_ratio * np.interp(fraction, fractions, growths)
+
+    def record(self, result, drawdown, curve, ticks, total, stopped):
+        """
+        Count a finished candidate, and keep it if it is the best so far.
+
+        Parameters:
+        - result: Its fitness dictionary.
+        - drawdown: Its deepest drawdown.
+        - curve: (fractions, growths) after each segment simulated.
+        - ticks: Ticks simulated.
+        - total: Ticks a full backtest simulates.
+        - stopped: Whether it was stopped early.
+        """
+        self.candidates += 1
+        self.stopped += stopped
+        self.ticks += total
+        self.skipped += total - ticks
+        if stopped:
+            return
+        if self.best is None or result[self.metric] > self.best[0]:
+            self.best = (result[self.metric], drawdown, curve)
+
+    @property
+    def saved(self):
+        """
+        Fraction of all candidates' ticks that were never simulated.
+        """
+        return self.skipped / self.ticks if self.ticks else 0.0
+
+    def report(self):
+        """
+        Returns:
+        - A line summarizing the candidates stopped and the ticks saved.
+        """
+        return (
+            f"{self.stopped} of {self.candidates} candidates stopped early,"
+            f" {self.saved:.0%} of {self.ticks} ticks skipped"
+        )
+
+
+def backtest(
+    bot,
+    data,
+    wallet=None,
+    segments=SEGMENTS,
+    stop=None,
+    range_periods=True,
+    return_states=False,
+):
+    """
+    Backtest a bot a segment of ticks at a time, stopping early where `stop`
+    says so.
+
+    Parameters:
+    - bot: The trading bot instance.
+    - data: Historical market data, a `qx.Data`.
+    - wallet: Optional initial PaperWallet.
+    - segments: Number of segments the ticks are split into.
+    - stop: Optional `EarlyStop`.
+    - range_periods: Whether to adjust tuning parameters based on candle size.
+    - return_states: Whether to also return the states of every trade and
+      of the ticks the metrics read.
+
+    Returns:
+    - The fitness dictionary, as from `engine.backtest`, every metric less
+      `PENALTY` if stopped, or [fitness, states] if `return_states`.
+    """
+    keys, custom = bot.fitness(None, None, data.asset, data.currency)
+    if custom or any(k in PER_TICK_METRICS for k in keys):
+        raise ValueError("Early stopping only computes vectorized metrics.")
+
+    if not hasattr(bot, "info"):
+        bot.info = Info({"mode": "backtest"})
+    if wallet is None:
+        wallet = qx.PaperWallet({data.asset: 0, data.currency: 1})
+
+    bot.reset()
+    warmup = bot.autorange()
+    orig_tune = bot.tune.copy()
+    if range_periods:
+        adjust_tuning_parameters(bot, data.candle_size)
+
+    try:
+        indicators = bot.indicators(data)
+        orders = None
+        if hasattr(bot, "signals"):
+            # vectorized signals are cheap, only the accounting is segmented
+            if isinstance(indicators, LazyIndicators):
+                candles, now, orders = lazy_signals(bot, data, indicators, warmup)
+            else:
+                candles, now, orders = eager_signals(bot, data, indicators, warmup)
+            if not isinstance(orders, dict):
+                orders = orders_from_signals(orders)
+        else:
+            indicators = dict(indicators)
+            length = min(map(len, (indicators or data).values()))
+            candles, now, ticks = align(data, length, warmup)
+            rows = {k: np.asarray(v)[-length:][ticks] for k, v in indicators.items()}
+            could = masks(bot, candles, rows)
+        fill_candles, initial_price = fills(data, now, warmup)
+
+        ledger = Ledger(
+            wallet, (data.asset, data.currency), data.candle_size, initial_price
+        )
+        total = len(now)
+        bounds = np.linspace(0, total, segments + 1).astype(int)
+        last_trade = None
+        curve = ([], [])
+        stopped = False
+        for begin, end in zip(bounds[:-1], bounds[1:]):
+            if orders is None:
+                part, _, last_trade = step(
+                    bot, candles, rows, begin, end, ledger.position, last_trade, could
+                )
+            else:
+                part = {k: v[begin:end] if np.ndim(v) else v for k, v in orders.items()}
+            ledger.add(
+                part,
+                {k: v[begin:end] for k, v in candles.items()},
+                now[begin:end],
+                {k: v[begin:end] for k, v in fill_candles.items()},
+            )
+            if ledger.first is None:
+                continue
+            curve[0].append(end / total)
+            curve[1].append(ledger.growth)
+            if stop is not None and end < total:
+                if stop.check(end / total, ledger.growth, ledger.drawdown):
+                    stopped = True
+                    break
+    finally:
+        bot.tune = orig_tune
+
+    states = ledger.states()
+    ret = fitness(keys, states)
+    if stopped and len(states["trade_index"]) >= MIN_TRADES:
+        ret = {k: v - PENALTY for k, v in ret.items()}
+    if stop is not None:
+        stop.record(ret, ledger.drawdown, curve, ledger.ticks, total, stopped)
+    if return_states:
+        ret = [ret, states]
+    return ret
@@ -0,0 +1,107 @@
+"""
+╔═╗╔╦╗╦═╗╔═╗╔╦╗╔═╗═╗ ╦
+║═╬╗║ ╠╦╝╠═╣ ║║║╣ ╔╩╦╝
+╚═╝╚╩ ╩╚═╩ ╩═╩╝╚═╝╩ ╚═
+
+fills.py
+
+Vectorized Order Fills
+
+Resolves market orders and `qx.Thresholds` limit levels against the candles
+of a whole backtest at once.  Instead of a signal per tick, a bot's `signals`
+method may return a dictionary of orders:
+
+    {
+        "buy": bool array, market Buy while holding currency
+        "sell": bool array, market Sell while holding the asset
+        "buying": float array, Thresholds buying level
+        "selling": float array, Thresholds selling level
+        "after_first_fill": bool, ignore "buy" and "sell" until the first trade
+    }
+
+Every key is optional.  Where a market order and a level are both given for
+the same side, the market order wins, as a bot returning `qx.Buy()` instead of
+`qx.Thresholds(...)` would.
+
+Which orders can fill on each tick follows the position the wallet holds,
+see `engine.positions`.
+"""
+
+import numpy as np
+
+from engine.positions import positions, trades
+
+
+def bounds(candles):
+    """
+    The low and high limit levels are tested against in `qx.backtest`,
+    halfway between each candle's body and its wick.
+
+    Parameters:
+    - candles: Mapping of "open", "high", "low" and "close" arrays.
+
+    Returns:
+    - (low, high) arrays.
+    """
+    body_low = np.minimum(candles["open"], candles["close"])
+    body_high = np.maximum(candles["open"], candles["close"])
+    return (body_low + candles["low"]) / 2, (body_high + candles["high"]) / 2
+
+
+def orders_from_signals(signals):
+    """
+    Turn an integer signal array of +1 (Buy), -1 (Sell) and 0 into orders.
+    """
+    signals = np.asarray(signals)
+    return {"buy": signals > 0, "sell": signals < 0}
+
+
+def resolve(orders, candles, initial=-1):
+    """
+    Resolve orders into executed trades.
+
+    Parameters:
+    - orders: Dictionary of orders, see the module docstring.
+    - candles: Mapping of "open", "high", "low" and "close" arrays orders fill against.
+    - initial: Position before the first tick: 1 asset, -1 currency, 0 both.
+
+    Returns:
+    - Tick index of every trade.
+    - Side of every trade, +1 for Buy and -1 for Sell.
+    - Execution price of every trade.
+    """
+    close = np.asarray(candles["close"], dtype=float)
+    size = len(close)
+    low, high = bounds(candles)
+    never = np.zeros(size, dtype=bool)
+
+    market_buy = np.asarray(orders.get("buy", never), dtype=bool)
+    market_sell = np.asarray(orders.get("sell", never), dtype=bool)
+    buying = np.asarray(orders.get("buying", np.full(size, np.nan)), dtype=float)
+    selling = np.asarray(orders.get("selling", np.full(size, np.nan)), dtype=float)
+    if any(len(i) != size for i in (market_buy, market_sell, buying, selling)):
+        raise ValueError(f"Expected one order per tick ({size}).")
+
+    with np.errstate(invalid="ignore"):
+        limit_buy = low < buying
+        limit_sell = high > selling
+
+    if orders.get("after_first_fill"):
+        held = positions(limit_buy, limit_sell, initial)
+        first = trades(held, initial)
+        cutoff = first[0] + 1 if len(first) else size
+        market_buy = market_buy.copy()
+        market_sell = market_sell.copy()
+        market_buy[:cutoff] = False
+        market_sell[:cutoff] = False
+
+    held = positions(market_buy | limit_buy, market_sell | limit_sell, initial)
+    index = trades(held, initial)
+    side = held[index]
+
+    # limit fills execute at their level, clamped to the candle
+    buy_price = np.where(market_buy, close, buying)
+    sell_price = np.where(market_sell, close, selling)
+    price = np.where(side > 0, buy_price[index], sell_price[index])
+    price = np.clip(price, candles["low"][index], candles["high"][index])
+    return index, side, price
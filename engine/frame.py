@@ -0,0 +1,78 @@
+"""
+╔═╗╔╦╗╦═╗╔═╗╔╦╗╔═╗═╗ ╦
+║═╬╗║ ╠╦╝╠═╣ ║║║╣ ╔╩╦╝
+╚═╝╚╩ ╩╚═╩ ╩═╩╝╚═╝╩ ╚═
+
+frame.py
+
+Aligned Indicator Frame
+
+Indicators come out of their functions in different lengths, one per warmup,
+and are aligned on their newest value before they can be compared.  Rather
+than truncating every array to the shortest with `qx.truncate`, a bot can
+write its indicators into an `AlignedFrame`:
+
+    frame = AlignedFrame(("ma0", "ma1", "std"), len(data["close"]))
+    frame["ma0"] = qx.ti.ema(data["close"], self.tune["ema_period"])
+    frame["ma1"] = frame["ma0"][:-1]
+    frame["std"] = qx.ti.stddev(data["close"], self.tune["std_period"])
+    return frame
+
+The frame is one preallocated (n_columns, n_candles) float64 block, each
+indicator written right aligned into its own contiguous row.  Reading a
+column returns a view of that row over the candles every written column
+covers, so all columns read from a frame are aligned as `qx.truncate` would
+align them, without a copy.
+"""
+
+from collections.abc import Mapping
+
+import numpy as np
+
+
+class AlignedFrame(Mapping):
+    def __init__(self, names, length):
+        """
+        Parameters:
+        - names: Names of the indicators the frame will hold.
+        - length: Number of candles, the length of the longest indicator.
+        """
+        self._columns = {name: i for i, name in enumerate(names)}
+        self.length = length
+        self.block = np.full((len(self._columns), length), np.nan)
+        # first valid candle of every written column
+        self.offsets = {}
+
+    @property
+    def start(self):
+        """
+        First candle every written column covers.
+        """
+        return max(self.offsets.values(), default=0)
+
+    def __setitem__(self, name, values):
+        values = np.asarray(values, dtype=float)[-self.length :]
+        row = self.block[self._columns[name]]
+        offset = self.length - len(values)
+        row[:offset] = np.nan
+        row[offset:] = values
+        self.offsets[name] = offset
+
+    def __getitem__(self, name):
+        if name not in self.offsets:
+            raise KeyError(name)
+        return self.block[self._columns[name], self.start :]
+
+    def __iter__(self):
+        return (name for name in self._columns if name in self.offsets)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def aligned(self):
+        """
+        Returns:
+        - (n_columns, n) view of the block over the candles every written
+          column covers, rows in the order the names were given.
+        """
+        return self.block[:, self.start :]
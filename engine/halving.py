@@ -0,0 +1,280 @@
+"""
+╔═╗╔╦╗╦═╗╔═╗╔╦╗╔═╗═╗ ╦
+║═╬╗║ ╠╦╝╠═╣ ║║║╣ ╔╩╦╝
+╚═╝╚╩ ╩╚═╩ ╩═╩╝╚═╝╩ ╚═
+
+halving.py
+
+Successive Halving
+
+Scoring every candidate tune on the full history at full resolution spends
+most of an optimization on tunes that a backtest of a fraction of the
+candles would already have ruled out.  `successive_halving` scores many
+candidates on a cheap, low fidelity version of the data, promotes the best
+`1 / eta` of them to the next, `eta` times costlier, version, and so on up
+to the data itself:
+
+    results = successive_halving(bot, data, candidates=81, eta=3)
+    best_tune, best_fitness = results[0]
+
+`ladder` builds the versions: candles resampled `eta` times coarser while
+they stay at most daily, then ever shorter windows of the latest candles.
+Periods are in days, see `adjust_tuning_parameters`, so a tune means the
+same on every version.  `hyperband` runs several halvings, from many
+candidates at the lowest fidelity to few at the highest, for bots whose
+ranking at low fidelity is not trusted.
+
+Candidates are drawn uniformly within the bot's `clamps`, integers rounded,
+keys without clamps or with a zero clamp strength kept at the bot's tune,
+and ranked by the first metric of its `fitness()` that backtests compute.
+Every rung is backtested with `engine.sweep.run`, leaving out candidates an
+indicator rejects.
+
+    python -m engine.halving ema_cross 81
+
+tunes a bot on four hour candles and prints the best tunes found.
+"""
+
+import copy
+import json
+import math
+import sys
+
+import numpy as np
+import qtradex as qx
+from tulipy import InvalidOptionError
+
+from engine.bots import load, score
+from engine.sweep import run
+
+DAY = 86400
+# fewest candles a shortened window keeps
+MIN_CANDLES = 250
+
+
+def resample(data, candle_size):
+    """
+    Candles of a dataset aggregated to a coarser candle size.
+
+    Parameters:
+    - data: Historical market data, a `qx.Data`.
+    - candle_size: New candle size in seconds, a multiple of the data's.
+
+    Returns:
+    - A `qx.Data` of the aggregated candles, stamped with the first of each.
+    """
+    unix = np.asarray(data["unix"], dtype=float)
+    bucket = np.floor_divide(unix, candle_size)
+    starts = np.flatnonzero(np.concatenate(([True], np.diff(bucket) > 0)))
+    ends = np.append(starts[1:], len(unix)) - 1
+    new = copy.copy(data)
+    new.raw_candles = {
+        "unix": unix[starts],
+        "open": np.asarray(data["open"], dtype=float)[starts],
+        "high": np.maximum.reduceat(np.asarray(data["high"], dtype=float), starts),
+        "low": np.minimum.reduceat(np.asarray(data["low"], dtype=float), starts),
+        "close": np.asarray(data["close"], dtype=float)[ends],
+        "volume": np.add.reduceat(np.asarray(data["volume"], dtype=float), starts),
+    }
+    # as if fetched at the coarser size, which `qx.backtest` trades once per
+    new.candle_size = new.base_size = int(candle_size)
+    new.begin = int(unix[0])
+    new.end = int(unix[-1])
+    return new
+
+
+def ladder(data, rungs=3, eta=3, minimum=MIN_CANDLES):
+    """
+    Versions of a dataset of increasing fidelity, each about `eta` times as
+    many candles as the one before.
+
+    Parameters:
+    - data: Historical market data, a `qx.Data`.
+    - rungs: Number of versions, the last the data itself.
+    - eta: Ratio of the candles of consecutive versions.
+    - minimum: Fewest candles a shortened window keeps; rungs that would be
+      shorter are left out.
+
+    Returns:
+    - List of `qx.Data`, lowest fidelity first.
+    """
+    out = [data]
+    while len(out) < rungs:
+        lowest = out[0]
+        if lowest.candle_size * eta <= DAY:
+            out.insert(0, resample(lowest, lowest.candle_size * eta))
+        elif len(lowest) // eta >= minimum:
+            out.insert(0, lowest[-(len(lowest) // eta) :])
+        else:
+            break
+    return out
+
+
+def sample(bot, count, rng=None):
+    """
+    Candidate tunes drawn uniformly within a bot's clamps.
+
+    Parameters:
+    - bot: The trading bot instance.
+    - count: Number of candidates, the first of them the bot's own tune.
+    - rng: Optional `np.random.Generator`.
+
+    Returns:
+    - List of tunes.
+    """
+    if not getattr(bot, "clamps", None):
+        raise ValueError(f"{type(bot).__name__} has no clamps to sample tunes from.")
+    if rng is None:
+        rng = np.random.default_rng()
+    tunes = [dict(bot.tune)]
+    for _ in range(count - 1):
+        tune = dict(bot.tune)
+        for key, (low, _, high, strength) in bot.clamps.items():
+            if not strength or key not in tune:
+                continue
+            value = rng.uniform(low, high)
+            tune[key] = round(value) if isinstance(tune[key], int) else value
+        tunes.append(tune)
+    return tunes
+
+
+def evaluate(bot, data, candidates, wallet, range_periods):
+    """
+    Backtest every candidate, leaving out those an indicator rejects.
+    """
+    results = []
+    for tune in candidates:
+        try:
+            results += run(bot, data, [tune], wallet, range_periods=range_periods)
+        except InvalidOptionError:
+            # clamps admit combinations such as a PSAR step above its maximum
+            continue
+    return results
+
+
+def _metric(bot, data, result):
+    """
+    The first metric of a bot's `fitness()` that backtests compute.
+    """
+    keys, _ = bot.fitness(None, None, data.asset, data.currency)
+    return next((key for key in keys if key in result), "roi")
+
+
+def successive_halving(
+    bot,
+    data,
+    candidates=81,
+    eta=3,
+    rungs=None,
+    metric=None,
+    wallet=None,
+    range_periods=True,
+    seed=None,
+):
+    """
+    Tune a bot by successive halving.
+
+    Parameters:
+    - bot: The trading bot instance.
+    - data: Historical market data, a `qx.Data`.
+    - candidates: Number of candidates to `sample`, or a sequence of tunes.
+    - eta: Fraction of candidates promoted at every rung is `1 / eta`.
+    - rungs: List of datasets, lowest fidelity first, the last the one the
+      results are scored on; by default a `ladder` of as many rungs as it
+      takes to halve the candidates down to a handful.
+    - metric: Fitness metric candidates are ranked by, by default the first
+      of the bot's `fitness()` computed, else "roi".
+    - wallet: Optional initial PaperWallet.
+    - range_periods: Whether to adjust tuning parameters based on candle size.
+    - seed: Seed of the candidates sampled.
+
+    Returns:
+    - List of (tune, fitness) pairs of the candidates scored on the last
+      rung, best first.
+    """
+    if isinstance(candidates, int):
+        candidates = sample(bot, candidates, np.random.default_rng(seed))
+    if rungs is None:
+        depth = 1
+        while eta**depth < len(candidates):
+            depth += 1
+        rungs = ladder(data, depth, eta)
+
+    for depth, rung in enumerate(rungs):
+        results = evaluate(bot, rung, candidates, wallet, range_periods)
+        if not results:
+            return []
+        if metric is None:
+            metric = _metric(bot, data, results[0][1])
+        results.sort(key=lambda pair: score(pair[1], metric), reverse=True)
+        if depth == len(rungs) - 1:
+            return results
+        candidates = [tune for tune, _ in results[: max(1, len(results) // eta)]]
+
+
+def hyperband(
+    bot,
+    data,
+    rungs=3,
+    eta=3,
+    metric=None,
+    wallet=None,
+    range_periods=True,
+    seed=None,
+):
+    """
+    Tune a bot by Hyperband: one successive halving from every rung of a
+    `ladder`, the lower its first rung the more candidates it starts with.
+
+    Parameters:
+    - bot: The trading bot instance.
+    - data: Historical market data, a `qx.Data`.
+    - rungs: Number of rungs of the ladder.
+    - eta, metric, wallet, range_periods, seed: As for `successive_halving`.
+
+    Returns:
+    - List of (tune, fitness) pairs of every candidate scored on `data`,
+      best first.
+    """
+    full = ladder(data, rungs, eta)
+    rng = np.random.default_rng(seed)
+    results = []
+    for start in range(len(full)):
+        brackets = len(full) - start
+        count = math.ceil(len(full) / brackets * eta ** (brackets - 1))
+        results.extend(
+            successive_halving(
+                bot,
+                data,
+                sample(bot, count, rng),
+                eta,
+                full[start:],
+                metric,
+                wallet,
+                range_periods,
+            )
+        )
+    if metric is None and results:
+        metric = _metric(bot, data, results[0][1])
+    results.sort(key=lambda pair: score(pair[1], metric), reverse=True)
+    return results
+
+
+def main():
+    data = qx.Data(
+        exchange="kucoin",
+        asset="BTC",
+        currency="USDT",
+        begin="2021-01-01",
+        end="2023-01-01",
+        candle_size=4 * 3600,
+    )
+    bot = load(sys.argv[1])
+    candidates = int(sys.argv[2]) if len(sys.argv) > 2 else 81
+    for tune, result in successive_halving(bot, data, candidates)[:3]:
+        print(json.dumps(result, indent=4, default=float))
+        print("self.tune = " + json.dumps(tune, indent=4, default=float))
+
+
+if __name__ == "__main__":
+    main()
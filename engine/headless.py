@@ -0,0 +1,227 @@
+"""
+╔═╗╔╦╗╦═╗╔═╗╔╦╗╔═╗═╗ ╦
+║═╬╗║ ╠╦╝╠═╣ ║║║╣ ╔╩╦╝
+╚═╝╚╩ ╩╚═╩ ╩═╩╝╚═╝╩ ╚═
+
+headless.py
+
+Headless Imports
+
+`import qtradex` pulls in plotting, the exchange clients and pandas, which
+an optimizer worker never touches but pays for on every cold start.  In
+headless mode those modules are replaced by stand-ins at import, which only
+import the real module on first attribute access, so a worker that never
+plots or downloads candles never loads them.
+
+Headless mode must be enabled before qtradex is first imported, either by
+setting QX_HEADLESS=1 and importing `engine` before any bot module, or by
+calling `enable()` first.  Matplotlib falls back to the Agg backend, as no
+window will be opened.
+
+Run as a script to report cold import times with and without headless mode:
+
+    python -m engine.headless [bot.py ...]
+"""
+
+import importlib
+import importlib.abc
+import importlib.util
+import os
+import subprocess
+import sys
+import types
+import warnings
+
+DEFERRED = (
+    "ccxt",
+    "FinanceDataReader",
+    "yfinance",
+    "pandas",
+    "scipy.stats",
+    "scipy.interpolate",
+    "matplotlib",
+    "matplotlib.pyplot",
+    "matplotlib.style",
+    "matplotlib.dates",
+    "matplotlib.collections",
+    "matplotlib.backends.backend_tkagg",
+    # styles matplotlib at import, and no worker runs an optimizer itself
+    "qtradex.optimizers",
+)
+# names imported with `from module import name` at the top of qtradex modules;
+# they resolve to stand-ins which import the module when called
+DEFERRED_NAMES = {
+    "scipy.interpolate": ("CubicSpline",),
+    "matplotlib.collections": ("LineCollection",),
+    "matplotlib.backends.backend_tkagg": ("FigureCanvasTkAgg",),
+}
+
+
+class DeferredName:
+    """
+    Stand-in for a name imported from a deferred module.
+    """
+
+    def __init__(self, module, name):
+        self._module = module
+        self._name = name
+
+    def _resolve(self):
+        return getattr(self._module._load(), self._name)
+
+    def __call__(self, *args, **kwargs):
+        return self._resolve()(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        return getattr(self._resolve(), attr)
+
+
+class DeferredModule(types.ModuleType):
+    """
+    Stand-in for a module, which imports the real module on first attribute
+    access and forwards to it from then on.
+
+    Unlike `importlib.util.LazyLoader`, importing a deferred module a second
+    time does not load it, as the stand-in carries its own `__spec__`.
+    """
+
+    def __getattr__(self, attr):
+        # only reached for attributes the stand-in does not have itself;
+        # the import system probes `__path__` to tell modules from packages
+        module = self.__dict__.get("_deferred_module")
+        if module is None and attr == "__path__":
+            raise AttributeError(attr)
+        if module is None and attr in DEFERRED_NAMES.get(self.__name__, ()):
+            return DeferredName(self, attr)
+        return getattr(self._load(), attr)
+
+    def _load(self):
+        module = self.__dict__.get("_deferred_module")
+        if module is None:
+            name = self.__name__
+            self.__spec__.loader.loaded.add(name)
+            # the real package may import deferred submodules itself,
+            # so their stand-ins must not shadow them from now on
+            for key, value in list(sys.modules.items()):
+                if isinstance(value, DeferredModule) and (
+                    key == name or key.startswith(name + ".")
+                ):
+                    del sys.modules[key]
+            module = importlib.import_module(name)
+            parent, _, child = name.rpartition(".")
+            if parent:
+                setattr(sys.modules[parent], child, module)
+            self._deferred_module = module
+        return module
+
+
+class DeferredFinder(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    """
+    Meta path finder that imports the given modules as `DeferredModule`s.
+    """
+
+    def __init__(self, modules):
+        self.modules = set(modules)
+        self.loaded = set()
+
+    def find_spec(self, name, path, target=None):
+        if name not in self.modules or any(
+            name == i or name.startswith(i + ".") for i in self.loaded
+        ):
+            return None
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        deferred = importlib.util.spec_from_loader(
+            name, self, is_package=spec.submodule_search_locations is not None
+        )
+        if spec.submodule_search_locations is not None:
+            deferred.submodule_search_locations = spec.submodule_search_locations
+        return deferred
+
+    def create_module(self, spec):
+        return DeferredModule(spec.name)
+
+    def exec_module(self, module):
+        pass
+
+
+def enabled():
+    """
+    Returns:
+    - Whether headless mode is active in this process.
+    """
+    return any(isinstance(finder, DeferredFinder) for finder in sys.meta_path)
+
+
+def enable(modules=DEFERRED):
+    """
+    Defer importing `modules` until they are used.
+
+    Parameters:
+    - modules: Names of the modules to defer; submodules of a deferred
+      package are imported as usual unless listed themselves.
+    """
+    if "qtradex" in sys.modules:
+        warnings.warn(
+            "Headless mode enabled after qtradex was imported, it has no effect.",
+            RuntimeWarning,
+            stacklevel=2,
+        )
+    if enabled():
+        return
+    # qtradex switches to the Tk backend at import unless told otherwise
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    sys.meta_path.insert(0, DeferredFinder(modules))
+
+
+def import_time(module, headless):
+    """
+    Cold import time of a module in a fresh interpreter.
+
+    Parameters:
+    - module: Importable module name, e.g. "ema_cross".
+    - headless: Whether to enable headless mode first.
+
+    Returns:
+    - Import time in seconds.
+    """
+    code = (
+        "import time\n"
+        "start = time.perf_counter()\n"
+        + ("import engine\n" if headless else "")
+        + f"import {module}\n"
+        "print(time.perf_counter() - start)\n"
+    )
+    env = dict(os.environ)
+    env.pop("QX_HEADLESS", None)
+    if headless:
+        env["QX_HEADLESS"] = "1"
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    bots = [os.path.splitext(os.path.basename(i))[0] for i in sys.argv[1:]]
+    if not bots:
+        bots = ["qtradex"]
+    print(f"{'module':<24}{'default':>10}{'headless':>10}")
+    for bot in bots:
+        default = import_time(bot, False)
+        headless = import_time(bot, True)
+        print(f"{bot:<24}{default * 1000:>8.0f}ms{headless * 1000:>8.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+╔═╗╔╦╗╦═╗╔═╗╔╦╗╔═╗═╗ ╦
+║═╬╗║ ╠╦╝╠═╣ ║║║╣ ╔╩╦╝
+╚═╝╚╩ ╩╚═╩ ╩═╩╝╚═╝╩ ╚═
+
+kernels.py
+
+Fractional Period Kernels
+
+Moving averages that accept any real period >= 1 directly, rather than
+computing the indicator at the floor and ceiling of the period and blending
+the two as `qx.float_period` does.  Each is a single pass over the data:
+
+    - ema treats the smoothing factor 2 / (period + 1) as continuous
+    - sma and stddev weight the last floor(period) samples fully and the one
+      before them by the fractional part of the period
+
+For integer periods all three agree with their tulipy counterparts to float
+rounding, and their output lengths follow tulipy's: ema is as long as its
+input, sma and stddev are `len(data) - ceil(period) + 1` long.
+
+`ema_bank` computes the ema of one input at many periods together, with the
+slope of each in the same pass, for bots that stack several averages.
+"""
+
+import math
+
+import numpy as np
+
+
+def ema(data, period):
+    """
+    Exponential moving average with a continuous smoothing factor.
+
+    Parameters:
+    - data: Input array.
+    - period: Real period >= 1.
+
+    Returns:
+    - Array as long as `data`, starting at `data[0]` as tulipy's does.
+    """
+    # scipy is slow to import and only needed here
+    from scipy.signal import lfilter
+
+    data = np.asarray(data, dtype=float)
+    if not len(data):
+        return data.copy()
+    alpha = 2 / (period + 1)
+    out, _ = lfilter([alpha], [1, alpha - 1], data, zi=[(1 - alpha) * data[0]])
+    return out
+
+
+def ema_bank(data, periods, integer=False):
+    """
+    Exponential moving averages of one input at several periods, and their
+    slopes.
+
+    Parameters:
+    - data: Input array.
+    - periods: Sequence of k real periods >= 1; repeated periods are
+      computed once.
+    - integer: Floor the periods first, as `qx.ti.ema` does.
+
+    Returns:
+    - (k, len(data)) array of averages, one row per period.
+    - (k, len(data) - 1) array of their slopes, as `qx.derivative` of each row.
+    """
+    from scipy.signal import lfilter
+
+    data = np.asarray(data, dtype=float)
+    periods = np.asarray(periods, dtype=float).ravel()
+    if integer:
+        periods = np.floor(periods)
+    unique, inverse = np.unique(periods, return_inverse=True)
+    values = np.empty((len(unique), len(data)))
+    if len(data):
+        for row, alpha in zip(values, 2 / (unique + 1)):
+            row[:], _ = lfilter(
+                [alpha], [1, alpha - 1], data, zi=[(1 - alpha) * data[0]]
+            )
+    values = values[inverse]
+    return values, np.diff(values, axis=1)
+
+
+def _windows(data, period):
+    """
+    Weighted window sums of `data` for a fractional period.
+
+    Returns:
+    - The sum of the last floor(period) samples plus the fractional part of
+      the period times the sample before them, for every complete window.
+    """
+    if period < 1:
+        raise ValueError(f"Period must be at least 1, got {period}.")
+    whole = math.floor(period)
+    part = period - whole
+    cumsum = np.concatenate(([0.0], np.cumsum(data)))
+    sums = cumsum[whole:] - cumsum[:-whole]
+    if not part:
+        return sums
+    return sums[1:] + part * data[: len(data) - whole]
+
+
+def sma(data, period):
+    """
+    Simple moving average over a fractional period.
+
+    Parameters:
+    - data: Input array.
+    - period: Real period >= 1.
+
+    Returns:
+    - Array of `len(data) - ceil(period) + 1` averages.
+    """
+    data = np.asarray(data, dtype=float)
+    # center first, a running sum far from zero loses precision
+    offset = np.mean(data) if len(data) else 0.0
+    return _windows(data - offset, period) / period + offset
+
+
+def stddev(data, period):
+    """
+    Population standard deviation over a fractional period.
+
+    Parameters:
+    - data: Input array.
+    - period: Real period >= 1.
+
+    Returns:
+    - Array of `len(data) - ceil(period) + 1` deviations.
+    """
+    data = np.asarray(data, dtype=float)
+    # center first, a running sum of squares far from zero loses precision
+    data = data - (np.mean(data) if len(data) else 0.0)
+    mean = _windows(data, period) / period
+    variance = _windows(data * data, period) / period - mean * mean
+    return np.sqrt(np.maximum(variance, 0))
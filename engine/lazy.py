@@ -0,0 +1,241 @@
+"""
+╔═╗╔╦╗╦═╗╔═╗╔╦╗╔═╗═╗ ╦
+║═╬╗║ ╠╦╝╠═╣ ║║║╣ ╔╩╦╝
+╚═╝╚╩ ╩╚═╩ ╩═╩╝╚═╝╩ ╚═
+
+lazy.py
+
+Lazy Indicators
+
+A read-only mapping of indicator name to array whose entries are computed on
+first access and memoized.  Bots that compute many indicators, only some of
+which their strategy reads, can return one from `indicators()`:
+
+    metrics = LazyIndicators({"random": noise})
+    metrics.add("frama1", qx.qi.frama, data["close"], self.tune["frama1_period"], 2)
+    metrics.add(("macd", "signal_line", "hist"), qx.qi.typed_macd, data["close"], ...)
+    return metrics
+
+`qx.backtest` aligns every indicator to the shortest one and so still
+evaluates them all, but `engine.backtest` only evaluates and aligns the
+entries `signals()` reads.  Every access is recorded, so the entries no one
+reads can be listed with `dead()`, and `dead_indicators` lists those none of
+a bot's `signals()`, `strategy()` and `plot()` read.
+"""
+
+from collections.abc import Mapping
+
+import numpy as np
+import qtradex as qx
+from qtradex.core.backtest import adjust_tuning_parameters
+from qtradex.core.base_bot import Info
+
+
+class LazyIndicators(Mapping):
+    def __init__(self, values=None):
+        """
+        Parameters:
+        - values: Optional dictionary of already computed indicators.
+        """
+        self._values = dict(values or {})
+        self._thunks = {}
+        self._order = list(self._values)
+        self.accessed = set()
+
+    def add(self, keys, func, *args, **kwargs):
+        """
+        Register an indicator to be computed on first access.
+
+        Parameters:
+        - keys: Name of the indicator, or a tuple of names if `func` returns
+          several arrays; a dictionary result is indexed by name, a tuple by
+          position.
+        - func: The indicator function.
+        - args, kwargs: Arguments `func` is called with.
+        """
+        thunk = (func, args, kwargs, keys)
+        for key in keys if isinstance(keys, tuple) else (keys,):
+            self._thunks[key] = thunk
+            self._order.append(key)
+
+    def _evaluate(self, thunk):
+        func, args, kwargs, keys = thunk
+        result = func(*args, **kwargs)
+        if not isinstance(keys, tuple):
+            self._values[keys] = result
+        elif isinstance(result, Mapping):
+            self._values.update({key: result[key] for key in keys})
+        else:
+            self._values.update(dict(zip(keys, result)))
+
+    def __getitem__(self, key):
+        if key not in self._values:
+            if key not in self._thunks:
+                raise KeyError(key)
+            self._evaluate(self._thunks[key])
+        self.accessed.add(key)
+        return self._values[key]
+
+    def __iter__(self):
+        return iter(self._order)
+
+    def __len__(self):
+        return len(self._order)
+
+    def evaluated(self):
+        """
+        Returns:
+        - Names of the indicators computed so far.
+        """
+        return [key for key in self._order if key in self._values]
+
+    def dead(self):
+        """
+        Returns:
+        - Names of the indicators that were never read.
+        """
+        return [key for key in self._order if key not in self.accessed]
+
+
+class AlignedView(Mapping):
+    """
+    A view of a LazyIndicators that aligns each entry on access: the last
+    `length` values, front padded with NaN, indexed by `ticks`.
+    """
+
+    def __init__(self, indicators, length, ticks):
+        self._indicators = indicators
+        self._length = length
+        self._ticks = ticks
+        self._aligned = {}
+        self.accessed = set()
+
+    def __getitem__(self, key):
+        self.accessed.add(key)
+        if key in self._aligned:
+            return self._aligned[key]
+        values = np.asarray(self._indicators[key])[-self._length :]
+        if len(values) < self._length:
+            values = np.concatenate(
+                (np.full(self._length - len(values), np.nan), values)
+            )
+        self._aligned[key] = values[self._ticks]
+        return self._aligned[key]
+
+    def __iter__(self):
+        return iter(self._indicators)
+
+    def __len__(self):
+        return len(self._indicators)
+
+
+class _Tick(Mapping):
+    """
+    The indicators of one tick of an AlignedView, aligned on access.
+    """
+
+    def __init__(self, view, i):
+        self._view = view
+        self._i = i
+
+    def __getitem__(self, key):
+        return self._view[key][self._i]
+
+    def __iter__(self):
+        return iter(self._view)
+
+    def __len__(self):
+        return len(self._view)
+
+
+def _strategy_reads(bot, data, warmup):
+    """
+    Step a bot's `strategy()` over every tick, as `engine.sparse` does, on
+    indicators evaluated as it reads them, and hand them to its `plot()`.
+
+    Returns:
+    - Names of the indicators either read, or `plot()` passed to `qx.plot`.
+    """
+    # imported here, engine.simulator imports this module
+    from engine.simulator import align
+
+    lazy = bot.indicators(data)
+    length = len(data["unix"])
+    candles, _, ticks = align(data, length, warmup)
+    view = AlignedView(lazy, length, ticks)
+    last_trade = None
+    with np.errstate(invalid="ignore"):
+        for i in range(len(candles["unix"])):
+            operation = bot.strategy(
+                {
+                    "last_trade": last_trade,
+                    "wallet": None,
+                    **{k: v[i] for k, v in candles.items()},
+                },
+                _Tick(view, i),
+            )
+            if isinstance(operation, (qx.Buy, qx.Sell)) and not isinstance(
+                last_trade, type(operation)
+            ):
+                last_trade = operation
+
+    plotted = set()
+
+    def record(*args):
+        # the last argument lists the (key, label, color, axis, title) plotted
+        plotted.update(line[0] for line in args[-1])
+
+    plot, qx.plot = qx.plot, record
+    try:
+        bot.plot(data, None, lazy, False)
+    finally:
+        qx.plot = plot
+    return lazy.accessed | plotted
+
+
+def dead_indicators(bot, data):
+    """
+    List the indicators a bot computes which none of its `signals()`,
+    `strategy()` and `plot()` read.
+
+    `signals()` is traced through `engine.backtest`, `strategy()` is stepped
+    over every tick and `plot()` is called with `qx.plot` recording the
+    indicators it is passed, so nothing is drawn.
+
+    Parameters:
+    - bot: A bot whose `indicators()` returns LazyIndicators.
+    - data: Historical market data, a `qx.Data`.
+
+    Returns:
+    - Names of the unread indicators.
+    """
+    # imported here, engine.simulator imports this module
+    from engine.simulator import backtest
+
+    indicators = {}
+    original = bot.indicators
+
+    def record(data):
+        indicators["lazy"] = original(data)
+        return indicators["lazy"]
+
+    read = set()
+    if hasattr(bot, "signals"):
+        bot.indicators = record
+        try:
+            backtest(bot, data)
+        finally:
+            del bot.indicators
+        read |= indicators["lazy"].accessed
+
+    if not hasattr(bot, "info"):
+        bot.info = Info({"mode": "backtest"})
+    bot.reset()
+    warmup = bot.autorange()
+    orig_tune = bot.tune.copy()
+    adjust_tuning_parameters(bot, data.candle_size)
+    try:
+        read |= _strategy_reads(bot, data, warmup)
+    finally:
+        bot.tune = orig_tune
+    return [key for key in bot.indicators(data) if key not in read]
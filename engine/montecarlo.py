@@ -0,0 +1,228 @@
+"""
+╔═╗╔╦╗╦═╗╔═╗╔╦╗╔═╗═╗ ╦
+║═╬╗║ ╠╦╝╠═╣ ║║║╣ ╔╩╦╝
+╚═╝╚╩ ╩╚═╩ ╩═╩╝╚═╝╩ ╚═
+
+montecarlo.py
+
+Bootstrapped Robustness
+
+The fitness saved with a tune was measured on one historical path.  This
+module backtests the same tune over thousands of synthetic paths resampled
+from that history and reports the distribution of every metric, as a check
+before a tune is promoted:
+
+    result = robustness(bot, data, paths=2000)
+    report(result)
+
+A path keeps the timestamps of the base data and rebuilds its candles from
+resampled blocks of consecutive candles: each candle's close to close log
+return, and its open, high and low relative to its close.  Two resamplers:
+
+    - "block": blocks drawn uniformly, wrapping around the end of the data
+    - "regime": each block drawn among those starting in the same volatility
+      regime as the block it replaces, keeping the history's sequence of
+      calm and turbulent stretches, see `engine.regimes.volatility`
+
+Bots implementing `signals()` are backtested vectorized, see `engine.simulator`;
+paths are spread over a process pool, as `qx.core.monte_carlo` does.
+"""
+
+import copy
+import multiprocessing as mp
+import os
+
+import numpy as np
+import qtradex as qx
+
+from engine.regimes import volatility
+from engine.simulator import backtest
+
+# percentiles reported for every metric
+PERCENTILES = (5, 25, 50, 75, 95)
+
+_WORKER_BOT = None
+_WORKER_DATA = None
+_WORKER_WALLET = None
+_WORKER_PATHS = {}
+_WORKER_KWARGS = {}
+
+
+def _components(data):
+    """
+    Per candle log return and candle shape of the base data.
+    """
+    close = np.asarray(data["close"], dtype=float)
+    returns = np.diff(np.log(close), prepend=np.log(close[0]))
+    shape = {
+        k: np.asarray(data[k], dtype=float) / close for k in ("open", "high", "low")
+    }
+    return returns, shape
+
+
+def resample(size, rng, block=20, labels=None):
+    """
+    Indices of the base candles making up one path.
+
+    Parameters:
+    - size: Number of candles.
+    - rng: A `np.random.Generator`.
+    - block: Candles per block.
+    - labels: Optional regime of every candle; each block is then drawn
+      among the blocks starting in the regime of the block it replaces.
+
+    Returns:
+    - Integer array of `size` indices.
+    """
+    block = max(1, min(block, size))
+    starts = np.arange(0, size, block)
+    if labels is None:
+        picks = rng.integers(0, size, len(starts))
+    else:
+        picks = np.empty(len(starts), dtype=int)
+        for label in np.unique(labels[starts]):
+            slots = labels[starts] == label
+            pool = np.flatnonzero(labels == label)
+            picks[slots] = pool[rng.integers(0, len(pool), np.count_nonzero(slots))]
+    idx = (picks[:, None] + np.arange(block)) % size
+    return idx.ravel()[:size]
+
+
+def path(data, rng, block=20, method="block", labels=None):
+    """
+    One synthetic path resampled from `data`.
+
+    Parameters:
+    - data: Historical market data, a `qx.Data`.
+    - rng: A `np.random.Generator`.
+    - block: Candles per block.
+    - method: "block" or "regime".
+    - labels: Regime labels for "regime", computed from `data` if omitted.
+
+    Returns:
+    - A copy of `data` with resampled candles.
+    """
+    if method not in ("block", "regime"):
+        raise ValueError(f"Unknown resampling method {method!r}.")
+    returns, shape = _components(data)
+    if method == "regime" and labels is None:
+        labels = volatility(data["close"], block)
+    idx = resample(len(returns), rng, block, labels if method == "regime" else None)
+
+    path_returns = returns[idx]
+    path_returns[0] = 0
+    close = data["close"][0] * np.exp(np.cumsum(path_returns))
+    candles = {
+        "unix": np.asarray(data["unix"]),
+        "close": close,
+        "volume": np.asarray(data["volume"])[idx],
+        **{k: close * v[idx] for k, v in shape.items()},
+    }
+    new = copy.copy(data)
+    new.raw_candles = candles
+    return new
+
+
+def _worker_backtest(seed):
+    rng = np.random.default_rng(seed)
+    data = path(_WORKER_DATA, rng, **_WORKER_PATHS)
+    return backtest(_WORKER_BOT, data, _WORKER_WALLET.copy(), **_WORKER_KWARGS)
+
+
+def robustness(
+    bot,
+    data,
+    paths=1000,
+    block=20,
+    method="block",
+    wallet=None,
+    seed=0,
+    processes=None,
+    range_periods=True,
+):
+    """
+    Backtest the bot's current tune over bootstrapped paths.
+
+    Parameters:
+    - bot: The trading bot instance, tuned as it is to be evaluated.
+    - data: Historical market data, a `qx.Data`.
+    - paths: Number of synthetic paths.
+    - block: Candles per resampled block.
+    - method: "block" or "regime".
+    - wallet: Optional initial PaperWallet.
+    - seed: Seed of the first path; path i uses seed + i.
+    - processes: Worker processes, every cpu by default; 1 runs serially.
+    - range_periods: Whether to adjust tuning parameters based on candle size.
+
+    Returns:
+    - A dictionary with the "baseline" fitness on `data` itself and the
+      "paths" fitness of every path as metric name to array.
+    """
+    global _WORKER_BOT, _WORKER_DATA, _WORKER_WALLET, _WORKER_PATHS, _WORKER_KWARGS
+    if wallet is None:
+        wallet = qx.PaperWallet({data.asset: 0, data.currency: 1})
+    _WORKER_BOT = bot
+    _WORKER_DATA = data
+    _WORKER_WALLET = wallet
+    _WORKER_PATHS = {
+        "block": block,
+        "method": method,
+        "labels": volatility(data["close"], block) if method == "regime" else None,
+    }
+    _WORKER_KWARGS = {"range_periods": range_periods}
+
+    baseline = backtest(bot, data, wallet.copy(), **_WORKER_KWARGS)
+    jobs = range(seed, seed + paths)
+
+    processes = processes or os.cpu_count()
+    results = []
+    if processes > 1:
+        ctx = mp.get_context("fork")
+        with ctx.Pool(processes=processes) as pool:
+            chunksize = max(1, paths // (processes * 4))
+            for i, ret in enumerate(
+                pool.imap(_worker_backtest, jobs, chunksize=chunksize), 1
+            ):
+                results.append(ret)
+                print(f"\rMC: {i}/{paths} ({100 * i // paths}%)", end="", flush=True)
+    else:
+        for i, job in enumerate(jobs, 1):
+            results.append(_worker_backtest(job))
+            print(f"\rMC: {i}/{paths} ({100 * i // paths}%)", end="", flush=True)
+    print()
+
+    return {
+        "baseline": baseline,
+        "paths": {
+            key: np.array([ret.get(key, np.nan) for ret in results], dtype=float)
+            for key in baseline
+        },
+    }
+
+
+def summary(result):
+    """
+    Returns:
+    - Metric name to a dictionary of its percentiles over the paths, and the
+      fraction of paths that did at least as well as the baseline.
+    """
+    out = {}
+    for key, values in result["paths"].items():
+        stats = dict(zip(PERCENTILES, np.nanpercentile(values, PERCENTILES)))
+        stats["beaten"] = np.mean(values >= result["baseline"][key])
+        out[key] = stats
+    return out
+
+
+def report(result):
+    """
+    Print the distribution of every metric over the paths.
+    """
+    header = "".join(f"{f'p{p}':>10}" for p in PERCENTILES)
+    print(f"{'metric':<20}{'baseline':>10}{header}{'>= base':>10}")
+    for key, stats in summary(result).items():
+        row = "".join(f"{stats[p]:>10.3f}" for p in PERCENTILES)
+        print(
+            f"{key:<20}{result['baseline'][key]:>10.3f}{row}"
+            f"{stats['beaten'] * 100:>9.1f}%"
+        )
@@ -0,0 +1,172 @@
+"""
+╔═╗╔╦╗╦═╗╔═╗╔╦╗╔═╗═╗ ╦
+║═╬╗║ ╠╦╝╠═╣ ║║║╣ ╔╩╦╝
+╚═╝╚╩ ╩╚═╩ ╩═╩╝╚═╝╩ ╚═
+
+pool.py
+
+Shared Indicator Pool
+
+Bots run side by side on the same candles ask for many of the same
+indicators: the ema of the close over the same period, the same parabolic
+SAR.  Inside an `IndicatorPool` every indicator function of `qx.ti`,
+`qx.qi` and `engine.kernels` is replaced by a memoizing wrapper, so each
+distinct call is computed once and every later caller shares its result:
+
+    pool = IndicatorPool()
+    with pool.patch(cthulhu, parabolic_ten):
+        a = Cthulhu().indicators(data)
+        b = ParabolicSARBot().indicators(data)
+    pool.hits, pool.misses
+
+Calls are told apart by the identity of their array arguments, such as
+`data["close"]`, and the value of the others, so no array is hashed; the
+pool keeps every argument alive for as long as it lives.  Results are
+shared, and so read-only.
+
+`patch(*modules)` also replaces the pooled functions the given bot modules
+imported by name, such as `from engine.kernels import ema_bank`.
+"""
+
+import contextlib
+import functools
+import inspect
+
+import numpy as np
+import qtradex as qx
+
+from engine import kernels
+
+# indicator modules whose functions are pooled
+MODULES = (qx.ti, qx.qi, kernels)
+# callables in those modules which are not indicators
+SKIP = ("cache", "float_period", "truncate")
+
+
+def _arrays(value):
+    """
+    Every array in an argument or result, through lists, tuples and dicts.
+    """
+    if isinstance(value, np.ndarray):
+        yield value
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _arrays(item)
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _arrays(item)
+
+
+def _freeze(result, inputs):
+    """
+    Make the arrays of an indicator result read-only, except those it passed
+    through from its inputs.
+    """
+    passed = {id(i) for i in _arrays(inputs)}
+    for array in _arrays(result):
+        if id(array) not in passed:
+            array.flags.writeable = False
+    return result
+
+
+class IndicatorPool:
+    def __init__(self, modules=MODULES):
+        """
+        Parameters:
+        - modules: Modules whose public functions are pooled.
+        """
+        self.modules = modules
+        self.results = {}
+        # arguments keyed by identity, kept alive so no id is reused
+        self._alive = {}
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        """
+        Drop every pooled result.
+        """
+        self.results.clear()
+        self._alive.clear()
+        self.hits = self.misses = 0
+
+    def _key(self, value):
+        if isinstance(value, (list, tuple)):
+            return (type(value).__name__, *map(self._key, value))
+        if isinstance(value, (np.ndarray, dict)):
+            self._alive[id(value)] = value
+            return ("id", id(value))
+        try:
+            hash(value)
+        except TypeError:
+            self._alive[id(value)] = value
+            return ("id", id(value))
+        return value
+
+    def wrap(self, func):
+        """
+        Returns:
+        - A memoizing stand-in for the indicator function `func`.
+        """
+
+        @functools.wraps(func)
+        def pooled(*args, **kwargs):
+            key = (
+                func,
+                self._key(args),
+                tuple((k, self._key(v)) for k, v in sorted(kwargs.items())),
+            )
+            if key in self.results:
+                self.hits += 1
+            else:
+                self.misses += 1
+                self.results[key] = _freeze(func(*args, **kwargs), (args, kwargs))
+            return self.results[key]
+
+        return pooled
+
+    def functions(self):
+        """
+        Returns:
+        - List of (module, name, function) of every pooled function.
+        """
+        out = []
+        for module in self.modules:
+            for name, func in vars(module).items():
+                if (
+                    name.startswith("_")
+                    or name in SKIP
+                    or not inspect.isroutine(func)
+                    or isinstance(func, type)
+                ):
+                    continue
+                out.append((module, name, func))
+        return out
+
+    @contextlib.contextmanager
+    def patch(self, *namespaces):
+        """
+        Pool the indicator functions while inside the block.
+
+        Parameters:
+        - namespaces: Bot modules or objects whose attributes referring to a
+          pooled function are pooled as well.
+        """
+        originals = []
+        wrappers = {}
+        for module, name, func in self.functions():
+            if id(func) not in wrappers:
+                wrappers[id(func)] = self.wrap(func)
+            wrapper = wrappers[id(func)]
+            originals.append((module, name, func))
+            setattr(module, name, wrapper)
+        for namespace in namespaces:
+            for name, value in list(vars(namespace).items()):
+                if id(value) in wrappers:
+                    originals.append((namespace, name, value))
+                    setattr(namespace, name, wrappers[id(value)])
+        try:
+            yield self
+        finally:
+            for namespace, name, value in reversed(originals):
+                setattr(namespace, name, value)
@@ -0,0 +1,106 @@
+"""
+╔═╗╔╦╗╦═╗╔═╗╔╦╗╔═╗═╗ ╦
+║═╬╗║ ╠╦╝╠═╣ ║║║╣ ╔╩╦╝
+╚═╝╚╩ ╩╚═╩ ╩═╩╝╚═╝╩ ╚═
+
+positions.py
+
+Position State Machine
+
+Most bots gate their signals on the type of their last trade:
+
+    if state["last_trade"] is None:
+        return qx.Buy()
+    if want_buy and isinstance(state["last_trade"], qx.Sell):
+        return qx.Buy()
+    if want_sell and isinstance(state["last_trade"], qx.Buy):
+        return qx.Sell()
+
+Each tick depends on the trades before it, which is what keeps such a
+strategy from being vectorized as written.  Under all-in / all-out execution
+the last trade is a Buy exactly while the wallet holds the asset, so the
+gate is the wallet's position, and a wallet holding currency can only buy
+and a wallet holding the asset can only sell.  Each tick is then one of:
+
+    - nothing can fill
+    - only a buy can fill: the wallet ends the tick holding the asset
+    - only a sell can fill: the wallet ends the tick holding currency
+    - both can fill: the wallet flips whatever it held
+
+which makes the position after every tick the side of the last one-sided
+tick, flipped once for every two-sided tick since; a maximum accumulate and
+a cumulative sum over the whole backtest.
+
+`gate` turns the raw "want buy" and "want sell" arrays of such a bot into
+the orders its `signals()` returns:
+
+    def signals(self, data, indicators):
+        return positions.gate(
+            indicators["fast"] > indicators["slow"],
+            indicators["fast"] < indicators["slow"],
+        )
+"""
+
+import numpy as np
+
+# rules for the ticks before a bot's first trade
+FIRST = (
+    # `if state["last_trade"] is None: return qx.Buy()`
+    "buy",
+    # `if state["last_trade"] is None or isinstance(state["last_trade"], ...)`
+    "either",
+)
+
+
+def positions(buy, sell, initial=-1):
+    """
+    Position held after each tick.
+
+    Parameters:
+    - buy: Bool array, ticks where a buy would fill while holding currency.
+    - sell: Bool array, ticks where a sell would fill while holding the asset.
+    - initial: Position before the first tick: 1 asset, -1 currency, 0 both.
+
+    Returns:
+    - Integer array of 1 (holding the asset) or -1 (holding currency);
+      0 until the first trade of a wallet that started with both.
+    """
+    idx = np.arange(len(buy))
+    last = np.where(buy ^ sell, idx, -1)
+    np.maximum.accumulate(last, out=last)
+    flips = np.cumsum(buy & sell)
+    held = np.where(last >= 0, np.where(buy[last], 1, -1), initial)
+    since = flips - np.where(last >= 0, flips[last], 0)
+    return np.where(since % 2, -held, held).astype(np.int8)
+
+
+def trades(held, initial=-1):
+    """
+    Returns:
+    - Sorted indices of the ticks where the position changes.
+    """
+    before = np.concatenate(([initial], held[:-1]))
+    return np.flatnonzero(held != before)
+
+
+def gate(want_buy, want_sell, first="buy"):
+    """
+    Orders of a bot that gates its signals on the type of its last trade.
+
+    Parameters:
+    - want_buy: Bool array, ticks where the bot would buy after a Sell.
+    - want_sell: Bool array, ticks where the bot would sell after a Buy.
+    - first: What the bot does before its first trade, one of `FIRST`.
+
+    Returns:
+    - Dictionary of orders, see `engine.fills`.
+    """
+    if first not in FIRST:
+        raise ValueError(f"Expected first to be one of {FIRST}, got {first!r}.")
+    buy = np.array(want_buy, dtype=bool)
+    sell = np.array(want_sell, dtype=bool)
+    if buy.shape != sell.shape:
+        raise ValueError("Expected as many buy as sell signals.")
+    if first == "buy" and len(buy):
+        buy[0], sell[0] = True, False
+    return {"buy": buy, "sell": sell}
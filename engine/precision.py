@@ -0,0 +1,222 @@
+"""
+╔═╗╔╦╗╦═╗╔═╗╔╦╗╔═╗═╗ ╦
+║═╬╗║ ╠╦╝╠═╣ ║║║╣ ╔╩╦╝
+╚═╝╚╩ ╩╚═╩ ╩═╩╝╚═╝╩ ╚═
+
+precision.py
+
+Float32 Indicators
+
+Indicator arrays are float64, though a strategy mostly compares them with
+each other and with tuned thresholds far coarser than float64 resolves.
+Stored as float32 they take half the memory and bandwidth, for the bots
+whose decisions do not change.  `qx.ti` and `qx.qi` only compute in float64,
+so indicators are still computed in float64 and narrowed once computed:
+
+    report = validate(bot, data)
+    report["flips"], report["ticks"], report["error"]
+    enable(bot, data)
+
+`validate` replays the bot over float64 and float32 indicators with
+`engine.replay` and counts the ticks whose position differs.  `enable`
+refuses, with a ValueError, any bot that flips a decision on any of the
+given datasets; otherwise every later `bot.indicators()` returns float32
+arrays, under `qx.backtest` and `engine.backtest` alike, and in the copies
+optimizers make of the bot.  Validation holds for the tune it ran with, so
+validate a tune found by an optimizer again before trading it.
+
+`qx.ti` keeps its own float64 results in its result cache; set
+QTD_CACHE_DISABLE=1 where that cache is what fills memory.
+
+    python -m engine.precision harmonica forty96 ...
+
+validates the given bots on the data their `main()` backtests.
+"""
+
+import sys
+import types
+
+import numpy as np
+import qtradex as qx
+from qtradex.core.backtest import adjust_tuning_parameters
+
+from engine import replay
+from engine.bots import load
+from engine.lazy import LazyIndicators
+
+DTYPE = np.float32
+
+
+def narrow(value, dtype=DTYPE):
+    """
+    Returns:
+    - A float64 array, or list of floats, as `dtype`; anything else unchanged.
+    """
+    if not isinstance(value, (np.ndarray, list, tuple)):
+        return value
+    array = np.asarray(value)
+    if array.dtype != np.float64:
+        return value
+    return array.astype(dtype)
+
+
+def _narrow_entry(indicators, key, dtype):
+    return narrow(indicators[key], dtype)
+
+
+def downcast(indicators, dtype=DTYPE):
+    """
+    Narrow the float64 entries of a bot's indicators.
+
+    Parameters:
+    - indicators: Mapping of name to array, as from `bot.indicators()`;
+      LazyIndicators are narrowed as each entry is evaluated.
+    - dtype: Storage type of the narrowed arrays.
+
+    Returns:
+    - A mapping of the same kind, its float64 arrays as `dtype`.
+    """
+    if isinstance(indicators, LazyIndicators):
+        out = LazyIndicators()
+        for key in indicators:
+            out.add(key, _narrow_entry, indicators, key, dtype)
+        return out
+    return {k: narrow(v, dtype) for k, v in indicators.items()}
+
+
+def nbytes(indicators):
+    """
+    Returns:
+    - Bytes the evaluated entries of a bot's indicators take as arrays.
+    """
+    if isinstance(indicators, LazyIndicators):
+        keys = indicators.evaluated()
+    else:
+        keys = list(indicators)
+    return sum(
+        np.asarray(indicators[k]).nbytes
+        for k in keys
+        if isinstance(indicators[k], (np.ndarray, list, tuple))
+    )
+
+
+def _narrow_indicators(self, data):
+    return downcast(type(self).indicators(self, data), self.precision)
+
+
+def validate(bot, data, dtype=DTYPE, range_periods=True):
+    """
+    Compare the decisions of a bot on float64 and on narrowed indicators.
+
+    Parameters:
+    - bot: The trading bot instance.
+    - data: Historical market data, a `qx.Data`.
+    - dtype: Storage type to validate.
+    - range_periods: Whether to adjust tuning parameters based on candle size.
+
+    Returns:
+    - Dictionary of the number of "ticks" replayed, the number of them whose
+      position "flips", the index of the "first_flip" candle or None, the
+      largest relative "error" of an indicator and the "bytes" the
+      indicators read take in float64 and in `dtype`.
+    """
+    orig_tune = bot.tune.copy()
+    if range_periods:
+        adjust_tuning_parameters(bot, data.candle_size)
+    try:
+        bot.reset()
+        wide = type(bot).indicators(bot, data)
+        narrowed = downcast(wide, dtype)
+        reference = replay.held(bot, data, wide)
+        bot.reset()
+        candidate = replay.held(bot, data, narrowed)
+    finally:
+        bot.tune = orig_tune
+
+    both_nan = np.isnan(reference) & np.isnan(candidate)
+    flips = np.flatnonzero((reference != candidate) & ~both_nan)
+
+    error = 0.0
+    keys = narrowed.evaluated() if isinstance(narrowed, LazyIndicators) else narrowed
+    for key in keys:
+        if narrowed[key] is wide[key]:
+            continue
+        exact = np.asarray(wide[key], dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            relative = np.abs(narrowed[key] - exact) / np.abs(exact)
+        relative = relative[np.isfinite(relative)]
+        if relative.size:
+            error = max(error, float(relative.max()))
+
+    return {
+        "ticks": int(np.count_nonzero(~np.isnan(reference))),
+        "flips": len(flips),
+        "first_flip": int(flips[0]) if len(flips) else None,
+        "error": error,
+        "bytes": (nbytes(wide), nbytes(narrowed)),
+    }
+
+
+def enable(bot, *datasets, dtype=DTYPE):
+    """
+    Have a bot store its indicators as `dtype`, if its decisions on every
+    dataset are the same as with float64 indicators.
+
+    Parameters:
+    - bot: The trading bot instance.
+    - datasets: One or more `qx.Data` to validate on.
+    - dtype: Storage type of the indicators.
+
+    Returns:
+    - The `validate` report of every dataset.
+    """
+    if not datasets:
+        raise ValueError("Float32 indicators must be validated on a dataset.")
+    reports = [validate(bot, data, dtype) for data in datasets]
+    for report in reports:
+        if report["flips"]:
+            raise ValueError(
+                f"{type(bot).__name__} decides differently on {report['flips']}"
+                f" of {report['ticks']} ticks with {np.dtype(dtype).name}"
+                " indicators."
+            )
+    bot.precision = np.dtype(dtype)
+    # bound to the bot, so the copies optimizers make are bound to the copy
+    bot.indicators = types.MethodType(_narrow_indicators, bot)
+    return reports
+
+
+def disable(bot):
+    """
+    Return a bot to float64 indicators.
+    """
+    vars(bot).pop("indicators", None)
+    vars(bot).pop("precision", None)
+
+
+def main():
+    data = qx.Data(
+        exchange="kucoin",
+        asset="BTC",
+        currency="USDT",
+        begin="2021-01-01",
+        end="2023-01-01",
+    )
+    for name in sys.argv[1:]:
+        bot = load(name)
+        try:
+            report = validate(bot, data)
+        except Exception as error:
+            print(f"{name}: {type(error).__name__}: {error}")
+            continue
+        wide, narrowed = report["bytes"]
+        print(
+            f"{name}: {report['flips']} of {report['ticks']} ticks flip,"
+            f" largest error {report['error']:.1e},"
+            f" {wide / 1e6:.1f} MB -> {narrowed / 1e6:.1f} MB,"
+            f" {'refused' if report['flips'] else 'safe'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
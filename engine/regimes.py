@@ -0,0 +1,289 @@
+"""
+╔═╗╔╦╗╦═╗╔═╗╔╦╗╔═╗═╗ ╦
+║═╬╗║ ╠╦╝╠═╣ ║║║╣ ╔╩╦╝
+╚═╝╚╩ ╩╚═╩ ╩═╩╝╚═╝╩ ╚═
+
+regimes.py
+
+Market Regimes
+
+Several bots switch behaviour on a regime test of one indicator against a
+tuned threshold: `mac_dr_si.py` trades ranges while `adx < adx_threshold`,
+`cthulhu.py` trades its channel while `diff < channel`.  Such a test only
+depends on the candles, the indicator's period and the threshold, so it is
+computed once per dataset as a compact uint8 label array:
+
+    trend = engine.regimes.labels(data, "adx", period, threshold)
+    ranging = trend == engine.regimes.BELOW
+
+Every tick is labelled BELOW, AT or ABOVE the threshold, so both strict and
+non strict comparisons read the same labels.  Labels are right aligned like
+the indicator they come from, so they shorten a bot's warmup exactly as the
+indicator did.  Thresholds are tuned, so rather than the labels of every one
+of them, the detector is memoized per dataset and period and labelled
+against the threshold on each call, one vectorized comparison.  `values`
+reads the detector itself, e.g. to plot it.  `precompute` computes it for a
+list of periods and saves it next to the cached candles, where later
+processes load it from.
+
+`stratify` splits the return of a backtest by the regime each tick was
+held in, from the states the backtest already computed.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+import qtradex as qx
+from qtradex.common import json_ipc
+
+# labels of a tick against a threshold
+BELOW, AT, ABOVE = 0, 1, 2
+# label of a tick whose indicator is not a number
+UNKNOWN = 255
+# detector outputs a `Regimes` keeps, as many as the SDK's indicator cache
+VALUES_SIZE = 256
+
+# saved detector outputs, next to the candles qx.Data caches
+PATH = os.path.join(os.path.dirname(os.path.abspath(json_ipc.__file__)), "pipe")
+PATH = os.path.join(PATH, "regimes")
+
+
+def adx(data, period):
+    """
+    Average directional index, the strength of a trend from 0 to 100.
+    """
+    return qx.ti.adx(data["high"], data["low"], data["close"], period)
+
+
+def natr(data, period):
+    """
+    Average true range as a percentage of the close.
+    """
+    return qx.ti.natr(data["high"], data["low"], data["close"], period)
+
+
+def stddev(data, period):
+    """
+    Standard deviation of the close, a channel's width per deviation.
+    """
+    return qx.ti.stddev(data["close"], period)
+
+
+def bandwidth(data, period):
+    """
+    Width of the two deviation Bollinger bands relative to their middle.
+    """
+    lower, middle, upper = qx.ti.bbands(data["close"], period, 2)
+    return (upper - lower) / middle
+
+
+DETECTORS = {
+    "adx": adx,
+    "natr": natr,
+    "stddev": stddev,
+    "bandwidth": bandwidth,
+}
+
+
+def classify(values, threshold):
+    """
+    Label values against a threshold.
+
+    Returns:
+    - uint8 array of BELOW, AT or ABOVE, UNKNOWN where `values` is NaN.
+    """
+    values = np.asarray(values, dtype=float)
+    out = np.full(len(values), UNKNOWN, dtype=np.uint8)
+    known = ~np.isnan(values)
+    out[known] = np.sign(values[known] - threshold) + 1
+    return out
+
+
+def quantiles(values, count=3):
+    """
+    Label values by the quantile they fall in.
+
+    Returns:
+    - uint8 array of labels from 0, the lowest, to `count - 1`.
+    """
+    edges = np.quantile(values, np.linspace(0, 1, count + 1)[1:-1])
+    return np.searchsorted(edges, values, side="right").astype(np.uint8)
+
+
+def volatility(close, window=20, count=3):
+    """
+    Volatility regime of every candle.
+
+    Parameters:
+    - close: Close prices.
+    - window: Candles in the rolling volatility.
+    - count: Number of regimes, split at quantiles of the volatility.
+
+    Returns:
+    - uint8 array of regime labels, 0 the calmest, one per candle.
+    """
+    returns = np.abs(np.diff(np.log(close), prepend=np.log(close[0])))
+    kernel = np.ones(window) / window
+    return quantiles(np.convolve(returns, kernel)[: len(returns)], count)
+
+
+def fingerprint(data):
+    """
+    Returns:
+    - Hex digest identifying the candles of a dataset.
+    """
+    digest = hashlib.md5(str(data.candle_size).encode())
+    for key in ("unix", "high", "low", "close"):
+        digest.update(np.ascontiguousarray(data[key], dtype=float).tobytes())
+    return digest.hexdigest()
+
+
+class Regimes:
+    def __init__(self, data, path=PATH):
+        """
+        Parameters:
+        - data: Historical market data, a `qx.Data`.
+        - path: Directory labels are saved to and loaded from; None keeps
+          them in memory only.
+        """
+        self.data = data
+        self.candles = data.raw_candles
+        self.path = path
+        self._values = {}
+        self._fingerprint = None
+
+    def _file(self, key):
+        if self._fingerprint is None:
+            self._fingerprint = fingerprint(self.data)
+        name = "{}_{!r}.npy".format(*key)
+        return os.path.join(self.path, self._fingerprint, name)
+
+    def values(self, kind, period):
+        """
+        Output of the `kind` detector with the given period, see `values`.
+        """
+        key = (kind, float(period))
+        if key not in self._values:
+            if self.path is not None and os.path.exists(self._file(key)):
+                self._values[key] = np.load(self._file(key))
+            else:
+                self._values[key] = np.asarray(
+                    DETECTORS[kind](self.data, period), dtype=float
+                )
+            while len(self._values) > VALUES_SIZE:
+                self._values.pop(next(iter(self._values)))
+        return self._values[key]
+
+    def labels(self, kind, period, threshold):
+        """
+        Labels of the `kind` detector with the given period against
+        `threshold`, see `labels`.
+        """
+        return classify(self.values(kind, period), threshold)
+
+    def save(self, keys=None):
+        """
+        Save detector outputs to `path`.
+
+        Parameters:
+        - keys: (kind, period) of the outputs to save, all by default.
+        """
+        if self.path is None:
+            raise ValueError("These regimes have no path to be saved to.")
+        for key in list(self._values) if keys is None else keys:
+            os.makedirs(os.path.dirname(self._file(key)), exist_ok=True)
+            np.save(self._file(key), self.values(*key))
+
+
+# regimes of the datasets labelled last in this process, by id of the dataset
+_CACHE = {}
+CACHE_SIZE = 8
+
+
+def regimes(data, path=PATH):
+    """
+    Returns:
+    - The `Regimes` of a dataset, shared by every caller in this process.
+    """
+    cached = _CACHE.get(id(data))
+    if (
+        cached is None
+        or cached.data is not data
+        or cached.candles is not data.raw_candles
+    ):
+        cached = _CACHE[id(data)] = Regimes(data, path)
+        while len(_CACHE) > CACHE_SIZE:
+            _CACHE.pop(next(iter(_CACHE)))
+    return cached
+
+
+def values(data, kind, period):
+    """
+    Output of a detector, memoized per dataset and period.
+
+    Parameters:
+    - data: Historical market data, a `qx.Data`.
+    - kind: Name of the detector, one of `DETECTORS`.
+    - period: Period of the detector.
+
+    Returns:
+    - float array, as long as the detector's output.
+    """
+    return regimes(data).values(kind, period)
+
+
+def labels(data, kind, period, threshold):
+    """
+    Label every tick by a detector against a threshold.
+
+    Parameters:
+    - data: Historical market data, a `qx.Data`.
+    - kind: Name of the detector, one of `DETECTORS`.
+    - period: Period of the detector.
+    - threshold: Threshold to compare the detector to.
+
+    Returns:
+    - uint8 array of BELOW, AT or ABOVE, as long as the detector's output.
+    """
+    return regimes(data).labels(kind, period, threshold)
+
+
+def precompute(data, kind, periods):
+    """
+    Compute and save a detector for every period, e.g. ahead of an
+    optimization whose workers then load them.
+    """
+    regimes(data).save([(kind, float(period)) for period in periods])
+
+
+def stratify(data, states, labels):
+    """
+    Split the return of a backtest by regime.
+
+    Parameters:
+    - data: Historical market data, a `qx.Data`.
+    - states: Simulated states, as from `engine.backtest(..., return_states=True)`.
+    - labels: Regime labels, right aligned to the last candle of `data`.
+
+    Returns:
+    - Dictionary of label to a dictionary of the "roi" earned over the ticks
+      held in that regime and the "share" of ticks spent in it.
+    """
+    unix = np.asarray(data["unix"])
+    padded = np.full(len(unix), UNKNOWN, dtype=np.uint8)
+    padded[len(unix) - len(labels) :] = labels
+    ticks = np.searchsorted(unix, states["unix"], side="left").clip(0, len(unix) - 1)
+    # the return of a tick was earned in the regime of the tick before it
+    held = padded[ticks[:-1]]
+    values = np.asarray(states["values"], dtype=float)
+    returns = np.diff(np.log(values))
+
+    out = {}
+    for label in np.unique(held):
+        mask = held == label
+        out[int(label)] = {
+            "roi": float(np.exp(returns[mask].sum())),
+            "share": float(mask.mean()),
+        }
+    return out
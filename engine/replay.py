@@ -0,0 +1,110 @@
+"""
+╔═╗╔╦╗╦═╗╔═╗╔╦╗╔═╗═╗ ╦
+║═╬╗║ ╠╦╝╠═╣ ║║║╣ ╔╩╦╝
+╚═╝╚╩ ╩╚═╩ ╩═╩╝╚═╝╩ ╚═
+
+replay.py
+
+Position Replay
+
+The decisions of a bot, without a wallet: the position it would hold on
+every candle given its indicators, +1 holding the asset and -1 holding
+currency, NaN before its first tick.
+
+    positions = held(bot, data, bot.indicators(data))
+
+Bots with a vectorized `signals()` are resolved through `engine.fills`,
+bots implementing `could_act()` are stepped only on the ticks it marks, as
+`engine.sparse` steps them, and the others are stepped tick by tick, with a
+last trade carrying the price and time it was made at.  Two bots, or one
+bot fed two versions of its indicators, decide alike exactly where their
+positions agree.
+"""
+
+import numpy as np
+import qtradex as qx
+
+from engine.fills import orders_from_signals, resolve
+from engine.lazy import LazyIndicators
+from engine.positions import positions
+from engine.simulator import eager_signals, lazy_signals
+from engine.sparse import masks, step
+
+
+def vectorized(bot, data, indicators):
+    """
+    Positions of a bot implementing `signals()`, see `held`.
+    """
+    if isinstance(indicators, LazyIndicators):
+        candles, _, orders = lazy_signals(bot, data, indicators, 0)
+    else:
+        candles, _, orders = eager_signals(bot, data, indicators, 0)
+    if not isinstance(orders, dict):
+        orders = orders_from_signals(orders)
+    index, side, _ = resolve(orders, candles)
+
+    last = np.searchsorted(index, np.arange(len(candles["close"])), side="right") - 1
+    held = np.where(last >= 0, side[np.maximum(last, 0)], -1).astype(float)
+    out = np.full(len(data["unix"]), np.nan)
+    out[np.searchsorted(data["unix"], candles["unix"])] = held
+    return out
+
+
+def sparse(bot, data, indicators):
+    """
+    Positions of a bot implementing `could_act()`, see `held`.
+    """
+    indicators = dict(indicators)
+    length = min(map(len, (indicators or data).values()))
+    rows = {k: np.asarray(v)[-length:] for k, v in indicators.items()}
+    candles = {k: np.asarray(v)[-length:] for k, v in data.items()}
+    could = masks(bot, candles, rows)
+    orders, _, _ = step(bot, candles, rows, 0, length, -1, None, could)
+    held = positions(orders["buy"], orders["sell"], -1).astype(float)
+    return np.concatenate((np.full(len(data["unix"]) - length, np.nan), held))
+
+
+def per_tick(bot, data, indicators):
+    """
+    Positions of a bot with only a per tick `strategy()`, see `held`.
+    """
+    indicators = dict(indicators)
+    length = min(map(len, (indicators or data).values()))
+    rows = {k: np.asarray(v)[-length:] for k, v in indicators.items()}
+    candles = {k: np.asarray(v)[-length:] for k, v in data.items()}
+
+    held = np.full(length, -1.0)
+    last_trade = None
+    for i in range(length):
+        tick = {k: v[i] for k, v in candles.items()}
+        operation = bot.strategy(
+            {"last_trade": last_trade, "wallet": None, **tick},
+            {k: v[i] for k, v in rows.items()},
+        )
+        if isinstance(operation, (qx.Buy, qx.Sell)) and type(operation) is not type(
+            last_trade
+        ):
+            operation.price, operation.unix = tick["close"], tick["unix"]
+            last_trade = operation
+        if last_trade is not None:
+            held[i] = 1 if isinstance(last_trade, qx.Buy) else -1
+    return np.concatenate((np.full(len(data["unix"]) - length, np.nan), held))
+
+
+def held(bot, data, indicators):
+    """
+    Replay a bot over its indicators.
+
+    Parameters:
+    - bot: The trading bot instance, its tune already adjusted to the candles.
+    - data: Historical market data, a `qx.Data`.
+    - indicators: The bot's indicators on `data`.
+
+    Returns:
+    - Float array of the position held on every candle of `data`.
+    """
+    if hasattr(bot, "signals"):
+        return vectorized(bot, data, indicators)
+    if hasattr(bot, "could_act"):
+        return sparse(bot, data, indicators)
+    return per_tick(bot, data, indicators)
@@ -0,0 +1,563 @@
+"""
+╔═╗╔╦╗╦═╗╔═╗╔╦╗╔═╗═╗ ╦
+║═╬╗║ ╠╦╝╠═╣ ║║║╣ ╔╩╦╝
+╚═╝╚╩ ╩╚═╩ ╩═╩╝╚═╝╩ ╚═
+
+simulator.py
+
+Vectorized Wallet Simulator
+
+Replays an all-in / all-out position over numpy arrays instead of stepping a
+PaperWallet through every candle.  Given the orders of every tick it computes
+the executed trades, the balances after each tick, the wallet value curve and
+the fitness metrics the bots ask for in `fitness()`.
+
+The accounting mirrors `qx.backtest`:
+
+    - the tick schedule starts `autorange() + 1` candles after the first candle
+    - market orders execute at the close of their candle, less `wallet.fee` percent
+    - limit levels fill at the level, see `engine.fills`
+    - a signal that matches the last executed trade is suppressed
+    - wallet value is the geometric mean of the asset and currency valuations
+    - fewer than 10 trades costs every metric 10000
+
+The one intentional difference: a Sell while holding no asset is ignored,
+where the per tick wallet would sell an infinite volume.
+"""
+
+import numpy as np
+import qtradex as qx
+from qtradex.core.backtest import adjust_tuning_parameters
+from qtradex.core.base_bot import Info
+
+from engine.fills import orders_from_signals, resolve
+from engine.lazy import AlignedView, LazyIndicators
+
+# risk free rate used by the SDK's sharpe and sortino ratios
+RISK_FREE = 1.05
+# the SDK discounts every metric of a backtest with fewer trades than this
+MIN_TRADES = 10
+PENALTY = 10000
+
+METRICS = (
+    "roi_assets",
+    "roi_currency",
+    "roi",
+    "cagr",
+    "sharpe_ratio",
+    "sortino_ratio",
+    "maximum_drawdown",
+    "calmar_ratio",
+    "omega_ratio",
+    "profit_factor",
+    "trade_win_rate",
+    "payoff_ratio",
+)
+# metrics qx.backtest knows about which are not vectorized here
+PER_TICK_METRICS = (
+    "beta",
+    "alpha",
+    "info_ratio",
+    "skewness",
+    "kurtosis",
+    "efficiency_ratio",
+    "drawdown_duration",
+    "hurst_exponent",
+)
+
+
+def tick_schedule(unix, begin, end, candle_size, warmup):
+    """
+    Reproduce the tick schedule of `qx.backtest` on an array of timestamps.
+
+    Parameters:
+    - unix: Sorted candle timestamps.
+    - begin: Start of the backtest as a UNIX timestamp.
+    - end: End of the backtest as a UNIX timestamp.
+    - candle_size: Size of a candle in seconds.
+    - warmup: Number of warmup candles, as returned by `bot.autorange()`.
+
+    Returns:
+    - An index (slice or integer array) into `unix` for every tick.
+    - The UNIX time of every tick.
+    """
+    start = begin + candle_size * (warmup + 1)
+    count = int((end - start) // candle_size) + 1 if end >= start else 0
+    now = start + candle_size * np.arange(count)
+    idx = np.searchsorted(unix, now, side="left")
+    valid = idx < len(unix)
+    valid[valid] = np.abs(unix[idx[valid]] - now[valid]) <= candle_size
+    idx, now = idx[valid], now[valid]
+    # weekends and other gaps can visit the same candle twice,
+    # otherwise the ticks are a contiguous run and a view will do
+    if len(idx) and idx[-1] - idx[0] + 1 == len(idx) and np.all(np.diff(idx) == 1):
+        idx = slice(int(idx[0]), int(idx[-1]) + 1)
+    return idx, now
+
+
+def initial_position(assets, currency):
+    """
+    Returns:
+    - 1 for a wallet holding only the asset, -1 for only currency, 0 for both.
+    """
+    if assets > 0 and currency > 0:
+        return 0
+    return 1 if assets > 0 else -1
+
+
+def value(assets, currency, price):
+    """
+    Vectorized `PaperWallet.value`.
+    """
+    return ((assets * price + currency) ** 2 / price) ** 0.5
+
+
+def account(
+    close, trade_index, trade_side, trade_price, assets, currency, fee, initial_price
+):
+    """
+    Turn a list of alternating trades into per tick balances.
+
+    Parameters:
+    - close: Close price of every tick.
+    - trade_index: Tick index of every trade.
+    - trade_side: +1 for Buy, -1 for Sell, for every trade.
+    - trade_price: Execution price of every trade.
+    - assets: Initial asset balance.
+    - currency: Initial currency balance.
+    - fee: Exchange fee in percent.
+    - initial_price: Price the wallet is valued at before the first trade.
+
+    Returns:
+    - A dictionary of per tick and per trade arrays.
+    """
+    keep = 1 - fee / 100
+    count = len(trade_index)
+    balances = np.empty((2, count + 1))
+    balances[:, 0] = assets, currency
+    if count:
+        # the first trade may start from a mixed wallet,
+        # after it the whole balance is always on one side
+        if trade_side[0] > 0:
+            first = assets + currency / trade_price[0] * keep
+        else:
+            first = currency + assets * trade_price[0] * keep
+        growth = np.where(
+            trade_side[1:] > 0, keep / trade_price[1:], keep * trade_price[1:]
+        )
+        held = first * np.concatenate(([1.0], np.cumprod(growth)))
+        balances[0, 1:] = np.where(trade_side > 0, held, 0.0)
+        balances[1, 1:] = np.where(trade_side > 0, 0.0, held)
+
+    # balances after each tick are those after the last trade at or before it
+    after = np.searchsorted(trade_index, np.arange(len(close)), side="right")
+    tick_assets = balances[0, after]
+    tick_currency = balances[1, after]
+
+    values = value(tick_assets, tick_currency, close)
+    # the wallet prices its value before a trade at the previous execution price
+    previous = np.concatenate(([initial_price], trade_price[:-1]))
+    profit = value(balances[0, 1:], balances[1, 1:], trade_price) / value(
+        balances[0, :-1], balances[1, :-1], previous
+    )
+    return {
+        "assets": tick_assets,
+        "currency": tick_currency,
+        "values": values,
+        "balance_values": values / values[0],
+        "trade_profit": profit,
+    }
+
+
+def simulate(
+    signals,
+    candles,
+    wallet=None,
+    pair=None,
+    candle_size=86400,
+    now=None,
+    fill_candles=None,
+    initial_price=None,
+):
+    """
+    Simulate all-in / all-out trading of a signal array.
+
+    Parameters:
+    - signals: Integer array of +1 (Buy), -1 (Sell) and 0 (no action), one per
+      tick, or a dictionary of orders as described in `engine.fills`.
+    - candles: Mapping of "unix" and OHLC arrays, one per tick.
+    - wallet: Optional initial PaperWallet, defaults to all currency.
+    - pair: (asset, currency) keys of the wallet.
+    - candle_size: Size of a candle in seconds.
+    - now: Scheduled time of every tick, stamped on trades; defaults to `candles["unix"]`.
+    - fill_candles: OHLC arrays orders fill against, defaults to `candles`.
+    - initial_price: Price the wallet is first valued at, defaults to the first close.
+
+    Returns:
+    - A dictionary of per tick and per trade arrays, suitable for `fitness`.
+    """
+    close = np.asarray(candles["close"], dtype=float)
+    unix = np.asarray(candles["unix"], dtype=float)
+    now = unix if now is None else np.asarray(now, dtype=float)
+    if fill_candles is None:
+        fill_candles = candles
+    if initial_price is None:
+        initial_price = close[0]
+    if pair is None:
+        pair = ("asset", "currency")
+    if wallet is None:
+        wallet = qx.PaperWallet({pair[0]: 0, pair[1]: 1})
+    assets, currency = wallet[pair[0]], wallet[pair[1]]
+
+    orders = signals if isinstance(signals, dict) else orders_from_signals(signals)
+    trade_index, trade_side, trade_price = resolve(
+        orders, fill_candles, initial_position(assets, currency)
+    )
+
+    states = account(
+        close,
+        trade_index,
+        trade_side,
+        trade_price,
+        assets,
+        currency,
+        wallet.fee,
+        initial_price,
+    )
+    states.update(
+        {
+            "unix": unix,
+            "close": close,
+            "trade_index": trade_index,
+            "trade_side": trade_side,
+            "trade_price": trade_price,
+            "trade_unix": now[trade_index],
+            "candle_size": candle_size,
+        }
+    )
+    return states
+
+
+def _tick(states, i):
+    return {k: states[k][i] for k in ("assets", "currency", "values", "close", "unix")}
+
+
+class Ledger:
+    """
+    The account of a backtest simulated a segment of ticks at a time, as
+    `engine.chunked` and `engine.early` do.  The position, balances and last
+    execution price carry from one segment to the next; only the trades and
+    the ticks `fitness` reads are kept: the first and last, and the peak and
+    trough of the deepest drawdown.
+    """
+
+    def __init__(self, wallet, pair, candle_size, initial_price):
+        """
+        Parameters:
+        - wallet: Initial PaperWallet.
+        - pair: (asset, currency) keys of the wallet.
+        - candle_size: Size of a candle in seconds.
+        - initial_price: Price the wallet is first valued at.
+        """
+        self.assets, self.currency = wallet[pair[0]], wallet[pair[1]]
+        self.fee = wallet.fee
+        self.candle_size = candle_size
+        self.position = initial_position(self.assets, self.currency)
+        self.last_price = initial_price
+        self.trades = {k: [] for k in ("index", "side", "price", "unix", "profit")}
+        self.ticks = 0
+        self.traded = False
+        self.first = self.peak = self.worst = self.last = None
+        self.drawdown = 0.0
+
+    @property
+    def growth(self):
+        """
+        Wallet value after the last tick relative to the first.
+        """
+        return self.last["values"] / self.first["values"]
+
+    def add(self, orders, candles, now, fill_candles):
+        """
+        Simulate the next segment of ticks.
+
+        Parameters:
+        - orders: Dictionary of orders of every tick, see `engine.fills`.
+        - candles: Mapping of "unix" and "close" arrays, one per tick.
+        - now: Scheduled time of every tick.
+        - fill_candles: OHLC arrays orders fill against.
+        """
+        if not len(now):
+            return
+        if self.traded:
+            orders = {**orders, "after_first_fill": False}
+        index, side, price = resolve(orders, fill_candles, self.position)
+        states = account(
+            candles["close"],
+            index,
+            side,
+            price,
+            self.assets,
+            self.currency,
+            self.fee,
+            self.last_price,
+        )
+        states["close"], states["unix"] = candles["close"], candles["unix"]
+        if len(index):
+            self.position, self.last_price = side[-1], price[-1]
+            self.traded = True
+        self.assets, self.currency = states["assets"][-1], states["currency"][-1]
+
+        self.trades["index"].append(index + self.ticks)
+        self.trades["side"].append(side)
+        self.trades["price"].append(price)
+        self.trades["unix"].append(now[index])
+        self.trades["profit"].append(states["trade_profit"])
+        self.ticks += len(now)
+
+        values = states["values"]
+        if self.first is None:
+            self.first = self.peak = _tick(states, 0)
+        peaks = np.maximum(np.maximum.accumulate(values), self.peak["values"])
+        drawdowns = (peaks - values) / peaks
+        trough = int(np.argmax(drawdowns))
+        if drawdowns[trough] > self.drawdown:
+            self.drawdown = drawdowns[trough]
+            best = int(np.argmax(values[: trough + 1]))
+            if self.peak["values"] >= values[best]:
+                self.worst = (self.peak, _tick(states, trough))
+            else:
+                self.worst = (_tick(states, best), _tick(states, trough))
+        if values.max() > self.peak["values"]:
+            self.peak = _tick(states, int(np.argmax(values)))
+        self.last = _tick(states, -1)
+
+    def states(self):
+        """
+        Returns:
+        - The states of the ticks kept and of every trade, for `fitness`.
+        """
+        if self.first is None:
+            raise ValueError("No ticks were simulated.")
+        kept = [self.first, *(self.worst or ()), self.last]
+        states = {k: np.array([tick[k] for tick in kept]) for k in self.first}
+        states["balance_values"] = states["values"] / self.first["values"]
+        for key, value in self.trades.items():
+            states[f"trade_{key}"] = np.concatenate(value)
+        states["candle_size"] = self.candle_size
+        return states
+
+
+def fitness(keys, states):
+    """
+    Vectorized counterpart of `qx.indicators.fitness.fitness`.
+
+    Parameters:
+    - keys: Metric names, as returned by a bot's `fitness()`.
+    - states: The output of `simulate`.
+
+    Returns:
+    - A dictionary of metric name to value; "roi" is always included
+      and names the SDK does not compute are dropped, as in `qx.backtest`.
+    """
+    keys = [k for k in keys if k in METRICS]
+    if "roi" not in keys:
+        keys.append("roi")
+
+    assets, currency, close = states["assets"], states["currency"], states["close"]
+    balance_values, unix = states["balance_values"], states["unix"]
+    # the opening trade is not scored, as in `preprocess_states`
+    profits = states["trade_profit"][1:]
+    wins, losses = profits[profits >= 1], profits[profits < 1]
+
+    def roi_assets(first, last):
+        initial = currency[first] + assets[first] * close[0]
+        return (currency[last] + assets[last] * close[-1] - initial) / initial + 1
+
+    def roi_currency(first, last):
+        initial = assets[first] + currency[first] / close[0]
+        return (assets[last] + currency[last] / close[-1] - initial) / initial + 1
+
+    results = {
+        "roi_assets": roi_assets(0, -1),
+        "roi_currency": roi_currency(0, -1),
+    }
+
+    percent_cheats = 0
+    if len(profits):
+        elapsed = np.diff(np.concatenate(([unix[0]], states["trade_unix"][1:], [unix[-1]])))
+        percent_cheats = (
+            np.count_nonzero(elapsed < states["candle_size"] * 3) / len(profits) * -100
+        )
+    static = (roi_assets(0, 0) * roi_currency(0, 0)) ** 0.5
+    results["roi"] = (
+        (results["roi_assets"] * results["roi_currency"]) ** 0.5
+        / static
+        * (1 + percent_cheats / 100)
+    )
+
+    years = (unix[-1] - unix[0]) / (60 * 60 * 24 * 365)
+    results["cagr"] = (balance_values[-1] / balance_values[0]) ** (1 / years) - 1
+    peak = np.maximum.accumulate(balance_values)
+    results["maximum_drawdown"] = max(0.0, np.max((peak - balance_values) / peak))
+    results["calmar_ratio"] = results["cagr"] / -results["maximum_drawdown"]
+    # np.std of no trades is nan, which is truthy
+    deviation = np.std(profits) if len(profits) else np.nan
+    results["sharpe_ratio"] = (results["roi"] - RISK_FREE) / (deviation or 1)
+    # the SDK takes the deviation of the product of all losses,
+    # which is always zero and so falls back to a deviation of one
+    results["sortino_ratio"] = results["roi"] - RISK_FREE
+    results["omega_ratio"] = np.sum(wins) / (np.sum(losses) or 1)
+    results["profit_factor"] = results["omega_ratio"]
+    results["trade_win_rate"] = len(wins) / len(profits) if len(profits) else 0
+    results["payoff_ratio"] = (np.mean(wins) if len(wins) else 0) / (
+        np.mean(losses) if len(losses) else 1
+    )
+
+    results = {k: float(results[k]) for k in keys}
+    if len(states["trade_index"]) < MIN_TRADES:
+        results = {k: v - PENALTY for k, v in results.items()}
+    return results
+
+
+def vectorizable(bot, data):
+    """
+    Whether `backtest` can take the vectorized path for this bot and data.
+    """
+    if not hasattr(bot, "signals") or data.fine_data is not None:
+        return False
+    keys, custom = bot.fitness(None, None, data.asset, data.currency)
+    return not custom and not any(k in PER_TICK_METRICS for k in keys)
+
+
+def align(data, length, warmup):
+    """
+    Right align the candles to `length` and select the backtested ticks.
+
+    Returns:
+    - The candles of every tick.
+    - The scheduled time of every tick.
+    - The index of every tick into the aligned arrays.
+    """
+    candles = {k: np.asarray(v)[-length:] for k, v in data.items()}
+    ticks, now = tick_schedule(
+        candles["unix"], data.begin, data.end, data.candle_size, warmup
+    )
+    return {k: v[ticks] for k, v in candles.items()}, now, ticks
+
+
+def eager_signals(bot, data, indicators, warmup):
+    """
+    Call `bot.signals` with every indicator aligned to the shortest one,
+    as `qx.backtest` does.
+    """
+    length = min(map(len, (indicators or data).values()))
+    candles, now, ticks = align(data, length, warmup)
+    indicators = {k: np.asarray(v)[-length:][ticks] for k, v in indicators.items()}
+    return candles, now, bot.signals(candles, indicators)
+
+
+def lazy_signals(bot, data, indicators, warmup):
+    """
+    Call `bot.signals` with only the indicators it reads evaluated,
+    aligned to the shortest of those.
+
+    The indicators read are not known until `signals` runs, so it is first
+    called with NaN padded full length arrays, then again aligned to the
+    shortest indicator it read; memoization makes the second call cheap.
+    """
+    read = set()
+    while True:
+        length = min(map(len, [data["unix"]] + [indicators[k] for k in read]))
+        candles, now, ticks = align(data, length, warmup)
+        view = AlignedView(indicators, length, ticks)
+        with np.errstate(invalid="ignore"):
+            signals = bot.signals(candles, view)
+        if view.accessed <= read:
+            return candles, now, signals
+        read |= view.accessed
+
+
+def fills(data, now, warmup):
+    """
+    Returns:
+    - The OHLC arrays the orders of every tick fill against.
+    - The price the wallet is first valued at.
+    """
+    # orders fill on the first candle of the full dataset at or after the tick,
+    # which differs from the tick's own candle only before the indicators start
+    unix, close = np.asarray(data["unix"]), np.asarray(data["close"])
+    fill = np.searchsorted(unix, now, side="left")
+    fill_candles = {k: np.asarray(data[k])[fill] for k in ("open", "high", "low", "close")}
+    # the wallet is first valued at the close of the first scheduled candle
+    first = data.begin + data.candle_size * (warmup + 1)
+    left, right = np.searchsorted(unix, [first, first + data.candle_size], side="left")
+    return fill_candles, close[right - 1] if right > left else close[0]
+
+
+def backtest(bot, data, wallet=None, range_periods=True, return_states=False):
+    """
+    Backtest a bot, vectorized when it implements `signals()` and stepped
+    sparsely when it implements `could_act()`, see `engine.sparse`.
+
+    Parameters:
+    - bot: The trading bot instance.
+    - data: Historical market data, a `qx.Data`.
+    - wallet: Optional initial PaperWallet.
+    - range_periods: Whether to adjust tuning parameters based on candle size.
+    - return_states: Whether to also return the simulated states.
+
+    Returns:
+    - The fitness dictionary, as from `qx.backtest(..., plot=False)`,
+      or [fitness, states] if `return_states`.
+    """
+    if not vectorizable(bot, data):
+        from engine import sparse
+
+        if sparse.steppable(bot, data):
+            return sparse.backtest(bot, data, wallet, range_periods, return_states)
+        return qx.backtest(
+            bot,
+            data,
+            wallet,
+            plot=False,
+            return_states=return_states,
+            range_periods=range_periods,
+        )
+
+    if not hasattr(bot, "info"):
+        bot.info = Info({"mode": "backtest"})
+    if wallet is None:
+        wallet = qx.PaperWallet({data.asset: 0, data.currency: 1})
+
+    bot.reset()
+    warmup = bot.autorange()
+    orig_tune = bot.tune.copy()
+    if range_periods:
+        adjust_tuning_parameters(bot, data.candle_size)
+
+    try:
+        indicators = bot.indicators(data)
+        if isinstance(indicators, LazyIndicators):
+            candles, now, signals = lazy_signals(bot, data, indicators, warmup)
+        else:
+            candles, now, signals = eager_signals(bot, data, indicators, warmup)
+        keys, _ = bot.fitness(None, None, data.asset, data.currency)
+    finally:
+        bot.tune = orig_tune
+
+    fill_candles, initial_price = fills(data, now, warmup)
+    states = simulate(
+        signals,
+        candles,
+        wallet,
+        (data.asset, data.currency),
+        candle_size=data.candle_size,
+        now=now,
+        fill_candles=fill_candles,
+        initial_price=initial_price,
+    )
+    ret = fitness(keys, states)
+    if return_states:
+        ret = [ret, states]
+    return ret
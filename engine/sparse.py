@@ -0,0 +1,196 @@
+"""
+╔═╗╔╦╗╦═╗╔═╗╔╦╗╔═╗═╗ ╦
+║═╬╗║ ╠╦╝╠═╣ ║║║╣ ╔╩╦╝
+╚═╝╚╩ ╩╚═╩ ╩═╩╝╚═╝╩ ╚═
+
+sparse.py
+
+Sparse Stepping
+
+A per tick `strategy()` returns None on most candles, and stepping it
+through every one of them is most of what a backtest of such a bot costs.
+A bot that cannot be vectorized whole, such as `harmonica.py` with its
+`storage` hold timers, can still say cheaply where it might act:
+
+    def could_act(self, data, indicators):
+        return {"buy": ..., "sell": ...}
+
+receives the candles and indicators of every backtested tick as aligned
+arrays, as `signals()` does, and returns bool arrays of the ticks where
+`strategy()` may return a Buy, or a Sell, or a single array for both.
+Holding currency only a Buy can fill, and holding the asset only a Sell,
+so `step` calls `strategy()` only on the ticks where the side that can fill
+might, and skips the rest.
+
+The masks may mark too many ticks, never too few: a tick left out must be
+one where `strategy()` returns no order that fills and leaves `storage` as
+it was.  Until its first trade a bot is called on every tick, as most buy
+on the first and some set up `storage` there.  The last trade carries the
+price and time it was made at, as in `qx.backtest`.
+
+`engine.backtest` steps bots implementing `could_act()` this way, and so
+does `engine.early`.  As there, `state["wallet"]` is None and `strategy()`
+may only return `qx.Buy`, `qx.Sell` or None.
+"""
+
+import numpy as np
+import qtradex as qx
+from qtradex.core.backtest import adjust_tuning_parameters
+from qtradex.core.base_bot import Info
+
+from engine.simulator import (
+    PER_TICK_METRICS,
+    align,
+    fills,
+    fitness,
+    initial_position,
+    simulate,
+)
+
+
+def steppable(bot, data):
+    """
+    Whether `backtest` can step this bot sparsely on this data.
+    """
+    if not hasattr(bot, "could_act") or data.fine_data is not None:
+        return False
+    keys, custom = bot.fitness(None, None, data.asset, data.currency)
+    return not custom and not any(k in PER_TICK_METRICS for k in keys)
+
+
+def masks(bot, candles, rows):
+    """
+    The ticks a bot could act on, see `could_act`.
+
+    Returns:
+    - (buy, sell) sorted tick indices, or None for a bot without
+      `could_act()`, which is called on every tick.
+    """
+    if not hasattr(bot, "could_act"):
+        return None
+    with np.errstate(invalid="ignore"):
+        could = bot.could_act(candles, rows)
+    if not isinstance(could, dict):
+        could = {"buy": could, "sell": could}
+    return tuple(
+        np.flatnonzero(np.asarray(could[side], dtype=bool)) for side in ("buy", "sell")
+    )
+
+
+def _after(ticks, i):
+    """
+    The first of the sorted `ticks` at or after `i`, else None.
+    """
+    j = np.searchsorted(ticks, i)
+    return int(ticks[j]) if j < len(ticks) else None
+
+
+def step(bot, candles, rows, begin, end, position, last_trade, could=None):
+    """
+    Orders of a per tick `strategy()` over ticks `begin` to `end`, called
+    only where it could act.
+
+    Parameters:
+    - bot: The trading bot instance.
+    - candles: Candles of every tick.
+    - rows: Indicators of every tick.
+    - begin, end: Ticks to step.
+    - position: Position before `begin`, see `engine.positions`.
+    - last_trade: Last trade before `begin`, or None.
+    - could: (buy, sell) tick indices from `masks`, or None to call the bot
+      on every tick.
+
+    Returns:
+    - Dictionary of "buy" and "sell" orders of ticks `begin` to `end`.
+    - The position and last trade after the last tick.
+    """
+    buy = np.zeros(end - begin, dtype=bool)
+    sell = np.zeros(end - begin, dtype=bool)
+    i = begin
+    while i < end:
+        if could is not None and last_trade is not None:
+            # holding the asset only a sell can fill, holding currency a buy
+            i = _after(could[position > 0], i)
+            if i is None or i >= end:
+                break
+        tick = {k: v[i] for k, v in candles.items()}
+        operation = bot.strategy(
+            {"last_trade": last_trade, "wallet": None, **tick},
+            {k: v[i] for k, v in rows.items()},
+        )
+        if operation is not None:
+            if isinstance(operation, qx.Buy):
+                side = 1
+            elif isinstance(operation, qx.Sell):
+                side = -1
+            else:
+                raise ValueError(
+                    f"Stepping bots supports market orders only, got {operation!r}."
+                )
+            (buy if side > 0 else sell)[i - begin] = True
+            # the order executes unless the wallet already holds that side
+            if side != position:
+                operation.price, operation.unix = tick["close"], tick["unix"]
+                position, last_trade = side, operation
+        i += 1
+    return {"buy": buy, "sell": sell}, position, last_trade
+
+
+def backtest(bot, data, wallet=None, range_periods=True, return_states=False):
+    """
+    Backtest a bot with a per tick `strategy()`, calling it only on the ticks
+    its `could_act()` allows.
+
+    Parameters:
+    - bot: The trading bot instance.
+    - data: Historical market data, a `qx.Data`.
+    - wallet: Optional initial PaperWallet.
+    - range_periods: Whether to adjust tuning parameters based on candle size.
+    - return_states: Whether to also return the simulated states.
+
+    Returns:
+    - The fitness dictionary, as from `engine.backtest`, or
+      [fitness, states] if `return_states`.
+    """
+    keys, custom = bot.fitness(None, None, data.asset, data.currency)
+    if custom or any(k in PER_TICK_METRICS for k in keys):
+        raise ValueError("Sparse stepping only computes vectorized metrics.")
+
+    if not hasattr(bot, "info"):
+        bot.info = Info({"mode": "backtest"})
+    if wallet is None:
+        wallet = qx.PaperWallet({data.asset: 0, data.currency: 1})
+
+    bot.reset()
+    warmup = bot.autorange()
+    orig_tune = bot.tune.copy()
+    if range_periods:
+        adjust_tuning_parameters(bot, data.candle_size)
+
+    try:
+        indicators = dict(bot.indicators(data))
+        length = min(map(len, (indicators or data).values()))
+        candles, now, ticks = align(data, length, warmup)
+        rows = {k: np.asarray(v)[-length:][ticks] for k, v in indicators.items()}
+        position = initial_position(wallet[data.asset], wallet[data.currency])
+        orders, _, _ = step(
+            bot, candles, rows, 0, len(now), position, None, masks(bot, candles, rows)
+        )
+    finally:
+        bot.tune = orig_tune
+
+    fill_candles, initial_price = fills(data, now, warmup)
+    states = simulate(
+        orders,
+        candles,
+        wallet,
+        (data.asset, data.currency),
+        candle_size=data.candle_size,
+        now=now,
+        fill_candles=fill_candles,
+        initial_price=initial_price,
+    )
+    ret = fitness(keys, states)
+    if return_states:
+        ret = [ret, states]
+    return ret
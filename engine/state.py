@@ -0,0 +1,306 @@
+"""
+╔═╗╔╦╗╦═╗╔═╗╔╦╗╔═╗═╗ ╦
+║═╬╗║ ╠╦╝╠═╣ ║║║╣ ╔╩╦╝
+╚═╝╚╩ ╩╚═╩ ╩═╩╝╚═╝╩ ╚═
+
+state.py
+
+Bot State Snapshots
+
+What a per tick bot remembers between ticks, such as the hold timers and
+trade prices of `harmonica.py`, lives in `self.storage`, emptied by
+`reset()`.  `snapshot` freezes it into a few hundred bytes and `restore`
+puts it back, so a stepped backtest can stop at a tick and carry on later,
+or elsewhere, from exactly where it was:
+
+    blob = snapshot(bot)
+    ...
+    restore(bot, blob)
+
+A bot keeping state anywhere else implements both itself:
+
+    def snapshot(self):
+        return bytes
+    def restore(self, blob):
+        ...
+
+`RingBuffer` keeps the last few values of a series, such as the price of
+every trade, in fixed memory, where a list would grow with every trade.
+`TradeState` is the `storage` of bots that remember their own trades, as
+`harmonica.py` and `mac_dr_si.py` do: a hold timer, the time of the last
+trade and the prices of the last few, in a fixed set of slots.
+
+    python -m engine.state harmonica
+
+steps a bot over a million one minute candles of a random walk and checks
+that neither its state nor the memory of the process grows as it trades.
+`check_constant_memory(bot)` does the same from code, e.g. in CI, raising
+ValueError if either grows.
+"""
+
+import pickle
+import resource
+import sys
+
+import numpy as np
+import qtradex as qx
+from qtradex.core.backtest import adjust_tuning_parameters
+from qtradex.core.base_bot import Info
+
+from engine.bots import load
+from engine.positions import positions, trades
+from engine.simulator import align, initial_position
+from engine.sparse import masks, step
+
+# trade prices a `TradeState` keeps
+TRADE_PRICES = 8
+# candles and segments `main` steps a bot over
+CANDLES = 10**6
+SEGMENTS = 10
+# resident memory, in bytes, a bot may add after its first segment
+RSS_SLACK = 2**20
+
+
+class RingBuffer:
+    """
+    The last `size` values appended, oldest first.
+    """
+
+    __slots__ = ("values", "start", "count")
+
+    def __init__(self, size, values=(), dtype=float):
+        """
+        Parameters:
+        - size: Number of values kept.
+        - values: Optional values to start with.
+        - dtype: Type of the values.
+        """
+        self.values = np.zeros(size, dtype=dtype)
+        self.start = 0
+        self.count = 0
+        for value in values:
+            self.append(value)
+
+    def append(self, value):
+        """
+        Add a value, dropping the oldest if full.
+        """
+        size = len(self.values)
+        self.values[(self.start + self.count) % size] = value
+        if self.count < size:
+            self.count += 1
+        else:
+            self.start = (self.start + 1) % size
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if not -self.count <= i < self.count:
+            raise IndexError("RingBuffer index out of range")
+        return self.values[(self.start + i % self.count) % len(self.values)]
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self[i]
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, RingBuffer)
+            and len(self.values) == len(other.values)
+            and list(self) == list(other)
+        )
+
+    def __repr__(self):
+        return f"RingBuffer({len(self.values)}, {list(self)})"
+
+
+class TradeState:
+    """
+    What a bot remembers of its own trades.
+    """
+
+    __slots__ = ("hold", "last_trade_time", "trade_price")
+
+    def __init__(self, prices=TRADE_PRICES):
+        """
+        Parameters:
+        - prices: Number of trade prices kept.
+        """
+        # time before which the bot does not trade again
+        self.hold = 0.0
+        self.last_trade_time = 0.0
+        self.trade_price = RingBuffer(prices)
+
+    def __eq__(self, other):
+        return isinstance(other, TradeState) and all(
+            getattr(self, k) == getattr(other, k) for k in self.__slots__
+        )
+
+    def __repr__(self):
+        return (
+            f"TradeState(hold={self.hold}, last_trade_time={self.last_trade_time},"
+            f" trade_price={self.trade_price})"
+        )
+
+
+def snapshot(bot):
+    """
+    The state of a bot, as bytes.
+    """
+    if hasattr(bot, "snapshot"):
+        return bot.snapshot()
+    return pickle.dumps(getattr(bot, "storage", None), pickle.HIGHEST_PROTOCOL)
+
+
+def restore(bot, blob):
+    """
+    Put back the state of a bot from its `snapshot`.
+    """
+    if hasattr(bot, "restore"):
+        bot.restore(blob)
+        return
+    storage = pickle.loads(blob)
+    if storage is not None:
+        bot.storage = storage
+
+
+def same(a, b):
+    """
+    Whether two snapshots hold the same state.  Equal states may pickle to
+    different bytes, so default snapshots are compared unpickled.
+    """
+    if a == b:
+        return True
+    try:
+        return pickle.loads(a) == pickle.loads(b)
+    except pickle.UnpicklingError:
+        return False
+
+
+def _random_walk(candles, seed=0):
+    """
+    A `qx.Data` of one minute candles of a random walk.
+    """
+    rng = np.random.default_rng(seed)
+    close = 20000 * np.exp(np.cumsum(rng.normal(0, 0.001, candles)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    wicks = 1 + np.abs(rng.normal(0, 0.0005, (2, candles)))
+    data = qx.Data(
+        exchange="kucoin",
+        asset="BTC",
+        currency="USDT",
+        begin="2020-01-01",
+        end="2020-01-02",
+        candle_size=60,
+        placeholder=True,
+    )
+    unix = data.begin + 60.0 * np.arange(candles)
+    data.raw_candles = {
+        "unix": unix,
+        "open": open_,
+        "high": np.maximum(open_, close) * wicks[0],
+        "low": np.minimum(open_, close) / wicks[1],
+        "close": close,
+        "volume": rng.uniform(1, 10, candles),
+    }
+    data.end = int(unix[-1])
+    data.days = (data.end - data.begin) / 86400
+    return data
+
+
+def _rss():
+    """
+    Resident memory of the process in bytes, its peak where /proc is missing.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        # kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def check_constant_memory(bot, candles=CANDLES, segments=SEGMENTS, slack=RSS_SLACK):
+    """
+    Step a bot over the candles of a random walk in segments, measuring its
+    state and the memory of the process after each.
+
+    Parameters:
+    - bot: The trading bot instance, with a per tick `strategy()`.
+    - candles: Number of one minute candles.
+    - segments: Number of segments to measure after.
+    - slack: Resident memory, in bytes, the process may add after the first
+      segment.
+
+    Returns:
+    - List of dictionaries of the "ticks" stepped, the "trades" made, the
+      "state" size and the "rss" after each segment.
+
+    Raises:
+    - ValueError: If the state, or the memory beyond `slack`, grows after
+      the first segment.
+    """
+    data = _random_walk(candles)
+
+    if not hasattr(bot, "info"):
+        bot.info = Info({"mode": "backtest"})
+    bot.reset()
+    warmup = bot.autorange()
+    orig_tune = bot.tune.copy()
+    adjust_tuning_parameters(bot, data.candle_size)
+    try:
+        indicators = dict(bot.indicators(data))
+        length = min(map(len, indicators.values()))
+        aligned, now, ticks = align(data, length, warmup)
+        rows = {k: np.asarray(v)[-length:][ticks] for k, v in indicators.items()}
+        could = masks(bot, aligned, rows)
+
+        position, last_trade = initial_position(0, 1), None
+        count = 0
+        report = []
+        bounds = np.linspace(0, len(now), segments + 1).astype(int)
+        for begin, end in zip(bounds[:-1], bounds[1:]):
+            before = position
+            orders, position, last_trade = step(
+                bot, aligned, rows, begin, end, position, last_trade, could
+            )
+            count += len(
+                trades(positions(orders["buy"], orders["sell"], before), before)
+            )
+            report.append(
+                {
+                    "ticks": int(end),
+                    "trades": count,
+                    "state": len(snapshot(bot)),
+                    "rss": _rss(),
+                }
+            )
+    finally:
+        bot.tune = orig_tune
+
+    first, rest = report[0], report[1:]
+    if any(row["state"] > first["state"] for row in rest):
+        raise ValueError("The state of the bot grows with the trades made.")
+    if any(row["rss"] - first["rss"] > slack for row in rest):
+        raise ValueError("The memory of the process grows with the trades made.")
+    return report
+
+
+def main():
+    name = sys.argv[1] if len(sys.argv) > 1 else "harmonica"
+    bot = load(name)
+    try:
+        report = check_constant_memory(bot)
+    except ValueError as error:
+        raise SystemExit(f"{name}: {error}")
+    for row in report:
+        print(
+            f"{row['ticks']} ticks, {row['trades']} trades: state {row['state']}"
+            f" bytes, resident memory {row['rss'] / 1e6:.1f} MB"
+        )
+    print(f"{name}: memory constant over {report[-1]['ticks']} ticks.")
+
+
+if __name__ == "__main__":
+    main()
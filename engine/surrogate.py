@@ -0,0 +1,368 @@
+"""
+╔═╗╔╦╗╦═╗╔═╗╔╦╗╔═╗═╗ ╦
+║═╬╗║ ╠╦╝╠═╣ ║║║╣ ╔╩╦╝
+╚═╝╚╩ ╩╚═╩ ╩═╩╝╚═╝╩ ╚═
+
+surrogate.py
+
+Surrogate-guided Search
+
+A backtest of `mac_dr_si.py` or `qi_indicators_test.py` takes long enough
+that random and evolutionary search over their `clamps` spend most of an
+optimization backtesting tunes no better than the last.  `optimize` fits a
+random forest to the (tune, fitness) pairs known so far, scores thousands of
+proposals with it, which costs next to nothing, and backtests only the few
+it rates most promising, then refits and repeats:
+
+    results = optimize(bot, data, rounds=10, batch=8)
+    best_tune, best_fitness = results[0]
+
+The forest starts from the history of the bot in the tunes directory, every
+saved entry of every version of the bot whose tune has the keys tuned now,
+read through the `engine.tunes` index.  Saved results were measured on
+whatever data their optimization ran on, so scores are ranked within each
+tune file and within this run's backtests before they are fit, and the
+forest learns where a tune ranks rather than what it scores.
+
+Tunes are encoded as the position of every clamped number within its clamp.
+A proposal is a fresh sample from the clamps or a perturbation of one of the
+best tunes backtested; those with the highest predicted rank plus `kappa`
+times the spread of the trees' predictions are backtested, exploring where
+the forest is unsure, along with an `explore` share of the batch chosen at
+random.  Tunes an indicator rejects are fit as the lowest rank.
+
+    python -m engine.surrogate mac_dr_si
+
+optimizes a bot on two years of daily candles and prints the best tunes found.
+"""
+
+import inspect
+import json
+import os
+import sys
+
+import numpy as np
+import qtradex as qx
+from qtradex.core import tune_manager
+
+from engine import tunes
+from engine.bots import load, score
+from engine.halving import evaluate, sample
+
+
+class RandomForest:
+    def __init__(self, trees=50, min_leaf=2, features=0.5, seed=None):
+        """
+        Regression forest of bootstrapped trees.
+
+        Parameters:
+        - trees: Number of trees.
+        - min_leaf: Fewest samples in a leaf.
+        - features: Fraction of the features each split chooses among.
+        - seed: Seed of the bootstraps and feature choices.
+        """
+        self.trees = trees
+        self.min_leaf = min_leaf
+        self.features = features
+        self.rng = np.random.default_rng(seed)
+        self.forest = []
+
+    def _grow(self, X, y):
+        """
+        One tree, as arrays of every node's split feature, threshold, left
+        and right child and value; a leaf's feature is -1.
+        """
+        tree = ([], [], [], [], [])
+        feature, threshold, left, right, value = tree
+        count = max(1, int(round(self.features * X.shape[1])))
+        stack = [(np.arange(len(y)), self._node(tree))]
+        while stack:
+            rows, node = stack.pop()
+            value[node] = y[rows].mean()
+            best = None
+            if len(rows) >= 2 * self.min_leaf:
+                for column in self.rng.choice(X.shape[1], count, replace=False):
+                    order = rows[np.argsort(X[rows, column], kind="stable")]
+                    x, target = X[order, column], y[order]
+                    total = np.cumsum(target)
+                    squares = np.cumsum(target**2)
+                    n = np.arange(1, len(order))
+                    # squared error of the two sides of a split after n rows
+                    error = (squares[:-1] - total[:-1] ** 2 / n) + (
+                        (squares[-1] - squares[:-1])
+                        - (total[-1] - total[:-1]) ** 2 / (len(order) - n)
+                    )
+                    valid = (x[1:] > x[:-1]) & (n >= self.min_leaf)
+                    valid &= len(order) - n >= self.min_leaf
+                    if not valid.any():
+                        continue
+                    split = np.flatnonzero(valid)[np.argmin(error[valid])]
+                    if best is None or error[split] < best[0]:
+                        cut = (x[split] + x[split + 1]) / 2
+                        best = (error[split], column, cut, order[: split + 1])
+            if best is None:
+                continue
+            _, column, cut, low = best
+            feature[node], threshold[node] = column, cut
+            left[node], right[node] = self._node(tree), self._node(tree)
+            stack.append((low, left[node]))
+            stack.append((np.setdiff1d(rows, low, assume_unique=True), right[node]))
+        return tuple(map(np.array, tree))
+
+    @staticmethod
+    def _node(tree):
+        """
+        Append a leaf to a tree being grown, returning its index.
+        """
+        for column, empty in zip(tree, (-1, 0.0, -1, -1, 0.0)):
+            column.append(empty)
+        return len(tree[0]) - 1
+
+    def fit(self, X, y):
+        """
+        Fit the forest to feature rows `X` and targets `y`.
+        """
+        X, y = np.asarray(X, dtype=float), np.asarray(y, dtype=float)
+        self.forest = []
+        for _ in range(self.trees):
+            rows = self.rng.integers(0, len(y), len(y))
+            self.forest.append(self._grow(X[rows], y[rows]))
+        return self
+
+    def predict(self, X):
+        """
+        Returns:
+        - The mean and the standard deviation of the trees' predictions of
+          every row of `X`.
+        """
+        X = np.asarray(X, dtype=float)
+        rows = np.arange(len(X))
+        predictions = np.empty((len(self.forest), len(X)))
+        for i, (feature, threshold, left, right, value) in enumerate(self.forest):
+            node = np.zeros(len(X), dtype=int)
+            inner = feature[node] >= 0
+            while inner.any():
+                go_left = X[rows, np.maximum(feature[node], 0)] <= threshold[node]
+                node = np.where(inner, np.where(go_left, left[node], right[node]), node)
+                inner = feature[node] >= 0
+            predictions[i] = value[node]
+        return predictions.mean(axis=0), predictions.std(axis=0)
+
+
+def _keys(bot):
+    """
+    Keys of the bot's tune searched over: clamped, with a clamp strength,
+    and numbers.
+    """
+    return [
+        key
+        for key, (_, _, _, strength) in getattr(bot, "clamps", {}).items()
+        if strength
+        and isinstance(bot.tune.get(key), (int, float))
+        and not isinstance(bot.tune.get(key), bool)
+    ]
+
+
+def encode(bot, tune, keys):
+    """
+    Returns:
+    - The position of each key's value within its clamp, 0 at its minimum
+      and 1 at its maximum.
+    """
+    low = np.array([bot.clamps[k][0] for k in keys], dtype=float)
+    high = np.array([bot.clamps[k][2] for k in keys], dtype=float)
+    value = np.array([tune[k] for k in keys], dtype=float)
+    return (value - low) / np.where(high > low, high - low, 1)
+
+
+def decode(bot, row, keys):
+    """
+    Returns:
+    - The bot's tune with the keys set from their positions within their
+      clamps, integers rounded.
+    """
+    tune = dict(bot.tune)
+    for key, position in zip(keys, np.clip(row, 0, 1)):
+        low, _, high, _ = bot.clamps[key]
+        value = low + position * (high - low)
+        tune[key] = round(value) if isinstance(bot.tune[key], int) else float(value)
+    return tune
+
+
+def _ranks(scores):
+    """
+    Ranks of scores scaled to 0 at the lowest and 1 at the highest; NaN
+    ranks lowest.
+    """
+    scores = np.nan_to_num(np.asarray(scores, dtype=float), nan=-np.inf)
+    if len(scores) < 2:
+        return np.ones(len(scores))
+    return np.argsort(np.argsort(scores, kind="stable")) / (len(scores) - 1)
+
+
+def harvest(bot, metric="roi", path=None):
+    """
+    Saved (tune, score) pairs of a bot from the tunes directory.
+
+    Parameters:
+    - bot: The trading bot instance.
+    - metric: Metric of the saved results to score by.
+    - path: Tunes directory, that of `qx.core.tune_manager` by default.
+
+    Returns:
+    - List of lists of (tune, score) pairs, one list per tune file, holding
+      the entries whose tune has every key searched over.
+    """
+    if path is None:
+        path = tune_manager.get_path(bot)
+    if not os.path.isdir(path):
+        return []
+    module = os.path.splitext(os.path.basename(inspect.getfile(type(bot))))[0]
+    keys = _keys(bot)
+    out = []
+    for name, record in tunes.index(path).items():
+        if record["bot"] != module:
+            continue
+        pairs = []
+        for entry in record["entries"]:
+            if metric not in (entry["results"] or {}):
+                continue
+            tune = tunes.read(os.path.join(path, name), entry).get("tune")
+            if isinstance(tune, dict) and all(
+                isinstance(tune.get(k), (int, float)) for k in keys
+            ):
+                pairs.append((tune, entry["results"][metric]))
+        if pairs:
+            out.append(pairs)
+    return out
+
+
+def propose(bot, keys, results, count, rng, spread=0.1, top=5):
+    """
+    Candidate tunes, the first half drawn fresh from the clamps and the
+    rest perturbed from the `top` best tunes backtested.
+
+    Parameters:
+    - bot: The trading bot instance.
+    - keys: Keys searched over.
+    - results: List of (tune, score) pairs backtested, best first.
+    - count: Number of proposals.
+    - rng: A `np.random.Generator`.
+    - spread: Standard deviation of a perturbation, as a fraction of a clamp.
+    - top: Number of best tunes perturbed.
+
+    Returns:
+    - Array of the proposals' encodings, one row each.
+    """
+    fresh = rng.uniform(0, 1, (count - count // 2, len(keys)))
+    parents = np.array([encode(bot, tune, keys) for tune, _ in results[:top]])
+    if not len(parents):
+        return rng.uniform(0, 1, (count, len(keys)))
+    chosen = parents[rng.integers(0, len(parents), count // 2)]
+    moved = np.clip(chosen + rng.normal(0, spread, chosen.shape), 0, 1)
+    return np.vstack((fresh, moved))
+
+
+def optimize(
+    bot,
+    data,
+    rounds=10,
+    batch=8,
+    proposals=2000,
+    kappa=1.0,
+    explore=0.25,
+    metric=None,
+    history=True,
+    wallet=None,
+    range_periods=True,
+    seed=None,
+):
+    """
+    Optimize a bot's tune, backtesting only the proposals a random forest
+    rates most promising.
+
+    Parameters:
+    - bot: The trading bot instance.
+    - data: Historical market data, a `qx.Data`.
+    - rounds: Number of rounds of fitting and backtesting.
+    - batch: Tunes backtested per round, and sampled before the first.
+    - proposals: Tunes scored by the forest per round.
+    - kappa: Weight of the spread of the trees' predictions, the higher the
+      more the search explores.
+    - explore: Fraction of every batch drawn from the clamps at random.
+    - metric: Fitness metric optimized, by default the first of the bot's
+      `fitness()` computed, else "roi".
+    - history: Whether to fit the saved tunes of the bot too, or a tunes
+      directory to read them from.
+    - wallet: Optional initial PaperWallet.
+    - range_periods: Whether to adjust tuning parameters based on candle size.
+    - seed: Seed of the samples, proposals and forest.
+
+    Returns:
+    - List of (tune, fitness) pairs of every tune backtested, best first.
+    """
+    if not getattr(bot, "clamps", None):
+        raise ValueError(f"{type(bot).__name__} has no clamps to search over.")
+    rng = np.random.default_rng(seed)
+    keys = _keys(bot)
+
+    results = evaluate(bot, data, sample(bot, batch, rng), wallet, range_periods)
+    if not results:
+        raise ValueError(f"No tune sampled from {type(bot).__name__}'s clamps runs.")
+    if metric is None:
+        fitness_keys, _ = bot.fitness(None, None, data.asset, data.currency)
+        metric = next((k for k in fitness_keys if k in results[0][1]), "roi")
+
+    saved_X, saved_y = [], []
+    if history:
+        path = history if isinstance(history, str) else None
+        for pairs in harvest(bot, metric, path):
+            saved_X.extend(encode(bot, tune, keys) for tune, _ in pairs)
+            saved_y.extend(_ranks([score for _, score in pairs]))
+
+    # encodings of tunes an indicator rejected, fit as the lowest rank
+    failed = []
+    forest = RandomForest(seed=rng.integers(2**32))
+    for _ in range(rounds):
+        results.sort(key=lambda pair: score(pair[1], metric), reverse=True)
+        X = saved_X + failed + [encode(bot, tune, keys) for tune, _ in results]
+        y = np.concatenate(
+            (saved_y, np.zeros(len(failed)), _ranks([r[metric] for _, r in results]))
+        )
+        rows = propose(bot, keys, results, proposals, rng)
+        mean, spread = forest.fit(X, y).predict(rows)
+        # a share of every batch is drawn blind, so a region the forest
+        # rates low on the evidence so far, such as one of tunes too few
+        # trades penalize, is still found
+        blind = int(round(explore * batch))
+        chosen = np.argsort(mean + kappa * spread)[::-1][: batch - blind]
+        fresh = len(rows) - len(rows) // 2
+        chosen = np.concatenate((chosen, rng.integers(0, fresh, blind)))
+        candidates = [decode(bot, rows[i], keys) for i in chosen]
+        tested = evaluate(bot, data, candidates, wallet, range_periods)
+        ran = {id(tune) for tune, _ in tested}
+        failed += [
+            rows[i] for i, tune in zip(chosen, candidates) if id(tune) not in ran
+        ]
+        results += tested
+
+    results.sort(key=lambda pair: score(pair[1], metric), reverse=True)
+    return results
+
+
+def main():
+    bot = load(sys.argv[1])
+    data = qx.Data(
+        exchange="kucoin",
+        asset="BTC",
+        currency="USDT",
+        begin="2021-01-01",
+        end="2023-01-01",
+    )
+    for tune, result in optimize(bot, data)[:3]:
+        print(json.dumps(result, indent=4, default=float))
+        print("self.tune = " + json.dumps(tune, indent=4, default=float))
+
+
+if __name__ == "__main__":
+    main()
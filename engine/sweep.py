@@ -0,0 +1,158 @@
+"""
+╔═╗╔╦╗╦═╗╔═╗╔╦╗╔═╗═╗ ╦
+║═╬╗║ ╠╦╝╠═╣ ║║║╣ ╔╩╦╝
+╚═╝╚╩ ╩╚═╩ ╩═╩╝╚═╝╩ ╚═
+
+sweep.py
+
+Parameter Sweeps
+
+A grid search backtests every combination of a few tune values.  Most of
+those candidates share their indicators with many others, and a bot that
+uses the same indicator several times with different parameters, such as
+`ma_sabres.py`'s five moving averages, recomputes each one for every slot.
+
+`IndicatorTensor` computes an indicator once for every combination of its
+parameters into a single (*parameters, n_candles) array, on disk as a memory
+map when large, and candidates gather their indicators from it by index:
+
+    tensor = IndicatorTensor(slope, data, (range(12), periods))
+    tensor[ma_type, period]
+
+`run` backtests a list of candidate tunes with `engine.backtest`, optionally
+replacing the bot's `indicators()` with such a gather, and with an
+`engine.early.EarlyStop` abandons the hopeless ones part way through.
+"""
+
+import itertools
+import tempfile
+
+import numpy as np
+
+from engine import early
+from engine.simulator import backtest
+
+# tensors larger than this are memory mapped to a temporary file
+MEMMAP_BYTES = 512 * 1024**2
+
+
+class IndicatorTensor:
+    def __init__(self, func, data, axes, path=None, dtype=float):
+        """
+        Parameters:
+        - func: Indicator function, called as `func(data, *parameters)` and
+          returning a single array of at most `len(data["close"])` values.
+        - data: Historical market data, a `qx.Data`.
+        - axes: One sequence of values per parameter of `func`.
+        - path: Optional .npy file to memory map the tensor to, regardless
+          of its size.
+        - dtype: Storage type of the tensor; np.float32 halves it, see
+          `engine.precision` for checking a bot's decisions survive that.
+        """
+        self.axes = [list(axis) for axis in axes]
+        self._index = [{value: i for i, value in enumerate(axis)} for axis in self.axes]
+        self.size = len(data["close"])
+        shape = (*map(len, self.axes), self.size)
+
+        if path is not None:
+            self.values = np.lib.format.open_memmap(
+                path, mode="w+", dtype=dtype, shape=shape
+            )
+        elif np.prod(shape) * np.dtype(dtype).itemsize > MEMMAP_BYTES:
+            self.values = np.memmap(
+                tempfile.TemporaryFile(), dtype=dtype, mode="w+", shape=shape
+            )
+        else:
+            self.values = np.empty(shape, dtype=dtype)
+        # indicators come in different lengths; right aligned, front padded
+        self.lengths = np.zeros(shape[:-1], dtype=int)
+
+        for idx in itertools.product(*map(range, shape[:-1])):
+            params = [axis[i] for axis, i in zip(self.axes, idx)]
+            result = np.asarray(func(data, *params), dtype=float)[-self.size :]
+            self.values[idx][: self.size - len(result)] = np.nan
+            self.values[idx][self.size - len(result) :] = result
+            self.lengths[idx] = len(result)
+
+    def index(self, params):
+        """
+        Returns:
+        - Index of the given parameter values into the tensor.
+        """
+        try:
+            return tuple(index[value] for index, value in zip(self._index, params))
+        except KeyError as error:
+            raise KeyError(f"{params} is not in this tensor's grid.") from error
+
+    def __getitem__(self, params):
+        """
+        Returns:
+        - The indicator for the given parameter values, as `func` returned it.
+        """
+        idx = self.index(params)
+        return self.values[idx][self.size - self.lengths[idx] :]
+
+
+def grid(base, **axes):
+    """
+    Every combination of the given tune values.
+
+    Parameters:
+    - base: Tune the candidates start from.
+    - axes: Tune key to the sequence of values to try for it.
+
+    Returns:
+    - List of candidate tunes.
+    """
+    keys = list(axes)
+    return [
+        {**base, **dict(zip(keys, values))}
+        for values in itertools.product(*axes.values())
+    ]
+
+
+def run(
+    bot,
+    data,
+    candidates,
+    indicators=None,
+    wallet=None,
+    range_periods=True,
+    stop=None,
+):
+    """
+    Backtest every candidate tune.
+
+    Parameters:
+    - bot: The trading bot instance.
+    - data: Historical market data, a `qx.Data`.
+    - candidates: Sequence of tunes.
+    - indicators: Optional replacement for `bot.indicators`, e.g. a gather
+      from an `IndicatorTensor`; it sees the tune after `range_periods`.
+    - wallet: Optional initial PaperWallet.
+    - range_periods: Whether to adjust tuning parameters based on candle size.
+    - stop: Optional `engine.early.EarlyStop`, to stop hopeless candidates
+      part way through their backtests.
+
+    Returns:
+    - List of (tune, fitness) pairs, in the order of `candidates`.
+    """
+    original = bot.tune
+    if indicators is not None:
+        bot.indicators = indicators
+    results = []
+    try:
+        for tune in candidates:
+            bot.tune = dict(tune)
+            if stop is None:
+                result = backtest(bot, data, wallet, range_periods)
+            else:
+                result = early.backtest(
+                    bot, data, wallet, stop=stop, range_periods=range_periods
+                )
+            results.append((tune, result))
+    finally:
+        bot.tune = original
+        if indicators is not None:
+            del bot.indicators
+    return results
@@ -0,0 +1,331 @@
+"""
+╔═╗╔╦╗╦═╗╔═╗╔╦╗╔═╗═╗ ╦
+║═╬╗║ ╠╦╝╠═╣ ║║║╣ ╔╩╦╝
+╚═╝╚╩ ╩╚═╩ ╩═╩╝╚═╝╩ ╚═
+
+tunes.py
+
+Tune Index
+
+A tune file holds the bot's full source and one "BEST <METRIC> TUNE_<ctime>"
+entry of {"tune", "results"} per metric per optimization, and
+`qx.load_tune` parses all of it, numpy arrays included, to pick a single
+entry.  This module scans every file in a tunes directory once, entry by
+entry, stepping over the source string without decoding it, and keeps what
+selecting a tune needs in a small sidecar index next to the directory:
+
+    bot, metric, timestamp, results, and the byte span of the entry
+
+A file is only rescanned when its size or modification time changes.  A
+tune is then loaded by decoding the one entry selected from the index:
+
+    tune = engine.tunes.load_tune(bot)
+    leaders = engine.tunes.best(engine.tunes.index(path)["iching_70.json"])
+
+`load_tune` takes the arguments of `qx.load_tune` and selects the same
+entry; `enable()` makes `qx.load_tune` and `qx.dispatch` use it, as does
+setting QX_TUNE_INDEX=1 and importing `engine` before any bot.
+
+Run as a script to print the best tune of every metric for every file, and
+the time to load a tune with and without the index:
+
+    python -m engine.tunes [tunes_dir]
+"""
+
+import json
+import os
+import re
+import sys
+import time
+from json.decoder import scanstring
+
+from qtradex.common.utilities import NdarrayDecoder
+from qtradex.core import tune_manager
+
+# name of the sidecar index, written next to the tunes directory so
+# `qx.core.tune_manager.get_bots` does not list it
+INDEX_NAME = ".tune_index.json"
+# bumped whenever the layout of an index entry changes
+VERSION = 1
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+_DECODER = json.JSONDecoder()
+
+
+def _expect(text, pos, char):
+    pos = _WHITESPACE.match(text, pos).end()
+    if text[pos : pos + 1] != char:
+        raise ValueError(f"Expected {char!r} at character {pos}.")
+    return pos + 1
+
+
+def _describe(key, value):
+    """
+    Metric and timestamp of a tune entry from its key, and its results.
+    """
+    prefix, _, stamp = key.rpartition("_")
+    metric = None
+    if prefix.startswith("BEST ") and prefix.endswith(" TUNE"):
+        metric = prefix[5:-5].lower()
+    try:
+        timestamp = tune_manager.from_iso_date(stamp)
+    except ValueError:
+        timestamp = None
+    results = value.get("results") if isinstance(value, dict) else None
+    return {
+        "key": key,
+        "prefix": prefix,
+        "metric": metric,
+        "timestamp": timestamp,
+        "results": results,
+    }
+
+
+def scan(filename):
+    """
+    Index the entries of one tune file.
+
+    Parameters:
+    - filename: Path to the tune file.
+
+    Returns:
+    - List of entry descriptions in file order, each with its "key",
+      "prefix", "metric", "timestamp", "results" and the "offset" and
+      "length" in bytes of its value in the file.
+    """
+    with open(filename, "rb") as handle:
+        text = handle.read().decode()
+    # offsets are counted in characters, equal to bytes in an ascii file
+    if text.isascii():
+        to_bytes = int
+    else:
+        to_bytes = lambda pos: len(text[:pos].encode())
+
+    entries = []
+    pos = _expect(text, 0, "{")
+    pos = _WHITESPACE.match(text, pos).end()
+    if text[pos : pos + 1] == "}":
+        return entries
+    while True:
+        pos = _expect(text, pos, '"')
+        key, pos = scanstring(text, pos)
+        pos = _expect(text, pos, ":")
+        start = _WHITESPACE.match(text, pos).end()
+        if key == "source":
+            # step over the bot's source without decoding it
+            match = _STRING.match(text, start)
+            if match is None:
+                raise ValueError(f"Expected a string at character {start}.")
+            end = match.end()
+        else:
+            value, end = _DECODER.raw_decode(text, start)
+            entry = _describe(key, value)
+            entry["offset"] = to_bytes(start)
+            entry["length"] = to_bytes(end) - entry["offset"]
+            entries.append(entry)
+        pos = _WHITESPACE.match(text, end).end()
+        if text[pos : pos + 1] == "}":
+            return entries
+        pos = _expect(text, pos, ",")
+
+
+def index_path(path):
+    """
+    Returns:
+    - Path of the sidecar index of the tunes directory `path`.
+    """
+    path = os.path.abspath(path)
+    return os.path.join(os.path.dirname(path), INDEX_NAME)
+
+
+def index(path, save=True):
+    """
+    Index of every tune file in a tunes directory, rescanning only the files
+    that changed since the sidecar index was written.
+
+    Parameters:
+    - path: The tunes directory.
+    - save: Whether to write the updated index back to its sidecar.
+
+    Returns:
+    - Dictionary of file name to a dictionary with the "bot" module name and
+      the "entries" of that file, see `scan`.
+    """
+    sidecar = index_path(path)
+    try:
+        with open(sidecar) as handle:
+            cached = json.load(handle)
+        if cached.get("version") != VERSION:
+            cached = {}
+    except (FileNotFoundError, json.decoder.JSONDecodeError):
+        cached = {}
+    cached = cached.get("files", {})
+
+    files = {}
+    changed = False
+    for name in sorted(os.listdir(path)):
+        if not name.endswith(".json"):
+            continue
+        stat = os.stat(os.path.join(path, name))
+        record = cached.get(name)
+        if (
+            record is None
+            or record["size"] != stat.st_size
+            or record["mtime_ns"] != stat.st_mtime_ns
+        ):
+            try:
+                entries = scan(os.path.join(path, name))
+            except ValueError:
+                # not a tune file, or one being written; try again next time
+                continue
+            record = {
+                "bot": name.rsplit("_", 1)[0],
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "entries": entries,
+            }
+            changed = True
+        files[name] = record
+    changed = changed or set(files) != set(cached)
+
+    if save and changed:
+        temporary = f"{sidecar}.{os.getpid()}"
+        with open(temporary, "w") as handle:
+            json.dump({"version": VERSION, "files": files}, handle)
+        os.replace(temporary, sidecar)
+    return files
+
+
+def select(entries, key=None, sort="roi"):
+    """
+    The entry `qx.load_tune` would load.
+
+    Parameters:
+    - entries: Entries of one tune file, see `scan`.
+    - key: Optional key of the entry to load; a key without its timestamp,
+      such as "BEST ROI TUNE", selects the latest entry of that name.
+    - sort: "roi" selects the entry with the highest roi, anything else the
+      latest "BEST ROI TUNE".
+
+    Returns:
+    - The selected entry.
+    """
+    if key is None:
+        if sort == "roi":
+            return max(
+                (i for i in entries if i["results"] is not None),
+                key=lambda x: x["results"]["roi"],
+            )
+        key = "BEST ROI TUNE"
+
+    for entry in entries:
+        if entry["key"] == key:
+            return entry
+    named = [i for i in entries if i["prefix"] == key and i["timestamp"] is not None]
+    if not named:
+        raise KeyError(
+            "Unknown tune key. Try using `get_tunes(bot)` to find stored tunes."
+        )
+    return max(named, key=lambda x: x["timestamp"])
+
+
+def best(entries):
+    """
+    Best entry of every metric.
+
+    Parameters:
+    - entries: Entries of one tune file, see `scan`.
+
+    Returns:
+    - Dictionary of metric name to the entry with the highest value of that
+      metric in its results.
+    """
+    leaders = {}
+    for entry in entries:
+        for metric, value in (entry["results"] or {}).items():
+            if metric not in leaders or value > leaders[metric]["results"][metric]:
+                leaders[metric] = entry
+    return leaders
+
+
+def read(filename, entry):
+    """
+    Decode one entry of a tune file.
+
+    Parameters:
+    - filename: Path to the tune file.
+    - entry: The entry, see `scan`.
+
+    Returns:
+    - The entry's value, with its numpy arrays restored.
+    """
+    with open(filename, "rb") as handle:
+        handle.seek(entry["offset"])
+        return json.loads(handle.read(entry["length"]), cls=NdarrayDecoder)
+
+
+def load_tune(bot, key=None, sort="roi"):
+    """
+    Load a saved tune for the bot through the tune index.
+
+    Parameters:
+    - bot: The bot instance or its identifier.
+    - key: Optional key to specify which tune to load.
+    - sort: The sorting criteria for selecting the tune, see `select`.
+
+    Returns:
+    - The loaded tune.
+    """
+    if isinstance(bot, str):
+        path = tune_manager.get_path(bot)
+        if bot not in os.listdir(path):
+            raise KeyError("Unknown bot id. Try using `get_bots()` to find stored ids.")
+        filename = os.path.join(path, bot)
+    else:
+        filename = tune_manager.generate_filename(bot)[0]
+
+    path, name = os.path.split(filename)
+    record = index(path).get(name)
+    if record is None:
+        raise FileNotFoundError("The given bot has no saved tunes.")
+    return read(filename, select(record["entries"], key, sort))["tune"]
+
+
+def enable():
+    """
+    Make `qx.load_tune` and `qx.dispatch` load tunes through the index.
+    """
+    import qtradex
+    from qtradex.core import dispatch
+
+    qtradex.load_tune = load_tune
+    tune_manager.load_tune = load_tune
+    dispatch.load_from_manager = load_tune
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else "tunes"
+    files = index(path)
+    for name, record in files.items():
+        filename = os.path.join(path, name)
+        start = time.perf_counter()
+        with open(filename) as handle:
+            json.load(handle, cls=NdarrayDecoder)
+        full = time.perf_counter() - start
+        start = time.perf_counter()
+        entries = index(path)[name]["entries"]
+        if any(i["results"] is not None for i in entries):
+            read(filename, select(entries))
+        indexed = time.perf_counter() - start
+
+        print(
+            f"{name}: {len(record['entries'])} entries, "
+            f"load {full * 1000:.1f}ms, indexed {indexed * 1000:.1f}ms"
+        )
+        for metric, entry in best(record["entries"]).items():
+            print(f"    {metric:<20}{entry['results'][metric]:>12.4f}  {entry['key']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+╔═╗╔╦╗╦═╗╔═╗╔╦╗╔═╗═╗ ╦
+║═╬╗║ ╠╦╝╠═╣ ║║║╣ ╔╩╦╝
+╚═╝╚╩ ╩╚═╩ ╩═╩╝╚═╝╩ ╚═
+
+votes.py
+
+Threshold Voting
+
+Many bots decide by counting how many of a list of conditions hold on a tick
+and trading once enough of them agree.  Such a bot declares its conditions
+once, as plain comparisons of indicators:
+
+    def conditions(self, indicators, side):
+        if side == "bull":
+            return [indicators["fast"] > indicators["slow"], ...]
+        return [indicators["fast"] < indicators["slow"], ...]
+
+Evaluated on the values of a single tick, `strategy()` sums them as before,
+one side at a time, so a tick that buys never builds the sell side.
+Evaluated on whole indicator arrays, `signals()` stacks them into an
+(n_ticks, n_conditions) boolean matrix, counts the votes with one sum along
+its rows and turns the counts into orders:
+
+    def signals(self, data, indicators):
+        return engine.votes.orders(
+            engine.votes.tally(self.conditions(indicators, "bull")),
+            engine.votes.tally(self.conditions(indicators, "bear")),
+            self.tune["buy_threshold"],
+            self.tune["sell_threshold"],
+        )
+
+The `isinstance(state["last_trade"], ...)` checks of the per tick strategy
+are resolved by `engine.positions`.
+"""
+
+import numpy as np
+
+from engine.positions import gate
+
+
+def matrix(conditions):
+    """
+    Stack conditions into a boolean matrix.
+
+    Parameters:
+    - conditions: Sequence of bool arrays of equal length; scalars are
+      broadcast to every tick.
+
+    Returns:
+    - (n_ticks, n_conditions) bool array.
+    """
+    if not len(conditions):
+        raise ValueError("Expected at least one condition.")
+    return np.column_stack(np.broadcast_arrays(*conditions)).astype(bool, copy=False)
+
+
+def tally(conditions):
+    """
+    Returns:
+    - Number of `conditions` that hold on every tick.
+    """
+    return matrix(conditions).sum(axis=1)
+
+
+def orders(bull, bear, buy_threshold, sell_threshold, margin=0):
+    """
+    Orders of a bot that buys on its first tick and then trades whenever
+    enough conditions agree.
+
+    Parameters:
+    - bull: Bullish vote count of every tick.
+    - bear: Bearish vote count of every tick.
+    - buy_threshold: Bullish votes needed to buy.
+    - sell_threshold: Bearish votes needed to sell.
+    - margin: Ticks where the two counts differ by less than this do not trade.
+
+    Returns:
+    - Dictionary of orders, see `engine.fills`.
+    """
+    bull = np.asarray(bull)
+    bear = np.asarray(bear)
+    decisive = np.abs(bull - bear) >= margin
+    return gate(
+        decisive & (bull >= buy_threshold), decisive & (bear >= sell_threshold)
+    )
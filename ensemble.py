@@ -0,0 +1,216 @@
+"""
+╔═╗╔╦╗╦═╗╔═╗╔╦╗╔═╗═╗ ╦
+║═╬╗║ ╠╦╝╠═╣ ║║║╣ ╔╩╦╝
+╚═╝╚╩ ╩╚═╩ ╩═╩╝╚═╝╩ ╚═
+
+ensemble.py
+
+Ensemble
+
+Indicators:
+
+This bot runs the known good strategies of this repository side by side
+and trades on their weighted vote.
+
+- **Members**:
+  - `cthulhu.py`, `extinction_event.py`, `iching.py`, `forty96.py`,
+  `harmonica.py`, `ma_sabres.py` and `parabolic_ten.py`, each with its best
+  saved tune where one is found.
+  - Every member's indicators are computed once, through one shared
+  `engine.pool.IndicatorPool`, so an indicator several members ask for with
+  the same arguments is computed once between them; how many calls that
+  saves depends on how alike the member tunes are.
+  - Each member is then replayed alone over the candles with
+  `engine.replay`, which yields the position it would hold on every candle,
+  +1 holding the asset and -1 holding currency.  `extinction_event.py` and
+  `ma_sabres.py` are replayed through their vectorized `signals()`,
+  `harmonica.py` and `parabolic_ten.py` only on the ticks their
+  `could_act()` marks, and `cthulhu.py`, `iching.py` and `forty96.py` tick
+  by tick.  The ensemble costs the sum of those replays, not that of its
+  slowest member, and the three per tick members are most of it.
+
+- **Score**:
+  - The weighted mean of the members' positions, from -1 (all out) to 1 (all in).
+  - Member positions do not depend on the ensemble's tune, so they are kept
+  per dataset and an optimizer tuning the weights only recombines them.
+
+Strategy:
+
+- **Buy** on the first tick, entering the market, and after that when the
+  score rises above `buy_threshold`.
+- **Sell** when the score falls below minus `sell_threshold`.
+"""
+
+import sys
+
+import numpy as np
+import qtradex as qx
+from qtradex.core.backtest import adjust_tuning_parameters
+
+import cthulhu
+import extinction_event
+import forty96
+import harmonica
+import iching
+import ma_sabres
+import parabolic_ten
+from engine import positions, replay, tunes
+from engine.pool import IndicatorPool
+
+# member bots, by name
+MEMBERS = {
+    "cthulhu": cthulhu.Cthulhu,
+    "extinction_event": extinction_event.ExtinctionEvent,
+    "iching": iching.IChing,
+    "forty96": forty96.Forty96,
+    "harmonica": harmonica.ParabolicSARBot,
+    "ma_sabres": ma_sabres.MASabres,
+    "parabolic_ten": parabolic_ten.ParabolicSARBot,
+}
+
+
+def _forward_fill(values):
+    """
+    Carry the last non NaN value forward over the NaNs after it.
+    """
+    idx = np.where(np.isnan(values), -1, np.arange(len(values)))
+    np.maximum.accumulate(idx, out=idx)
+    return np.where(idx >= 0, values[idx], np.nan)
+
+
+class Ensemble(qx.BaseBot):
+    def __init__(self, members=None, saved_tunes=True):
+        """
+        Parameters:
+        - members: Optional dictionary of name to member bot instance,
+          defaults to one of every bot in `MEMBERS`.
+        - saved_tunes: Whether to load every member's best saved tune.
+        """
+        if members is None:
+            members = {name: cls() for name, cls in MEMBERS.items()}
+        self.members = members
+        if saved_tunes:
+            for bot in self.members.values():
+                try:
+                    bot.tune = tunes.load_tune(bot)
+                except (FileNotFoundError, KeyError, ValueError):
+                    pass
+
+        self.tune = {
+            **{f"weight_{name}": 1.0 for name in self.members},
+            "buy_threshold": 0.0,
+            "sell_threshold": 0.0,
+        }
+        self.clamps = {
+            **{f"weight_{name}": [0.0, 1.0, 2.0, 1] for name in self.members},
+            "buy_threshold": [-1.0, 0.0, 1.0, 1],
+            "sell_threshold": [-1.0, 0.0, 1.0, 1],
+        }
+        # the last dataset, its candles and candle size, and the member
+        # positions on it, see `member_positions`
+        self._positions = (None, None, None, None)
+
+    def autorange(self):
+        return max(bot.autorange() for bot in self.members.values())
+
+    def member_positions(self, data):
+        """
+        Position of every member on every candle, NaN before its first tick.
+
+        Members keep their tunes while the ensemble is tuned, so positions
+        are computed once per dataset.
+        """
+        # the dataset itself is kept, so its id is never that of another
+        last, candles, candle_size, out = self._positions
+        if (
+            last is data
+            and candles is data.raw_candles
+            and candle_size == data.candle_size
+        ):
+            return out
+
+        pool = IndicatorPool()
+        modules = [
+            sys.modules[type(bot).__module__]
+            for bot in self.members.values()
+        ]
+        out = {}
+        with pool.patch(*modules):
+            for name, bot in self.members.items():
+                orig_tune = bot.tune.copy()
+                adjust_tuning_parameters(bot, data.candle_size)
+                try:
+                    bot.reset()
+                    out[name] = replay.held(bot, data, bot.indicators(data))
+                finally:
+                    bot.tune = orig_tune
+        self._positions = (data, data.raw_candles, data.candle_size, out)
+        return out
+
+    def indicators(self, data):
+        members = self.member_positions(data)
+        held = np.vstack(list(members.values()))
+        weights = np.array([self.tune[f"weight_{name}"] for name in members])
+        # every member has a position from the last one's first tick on
+        start = max(np.argmax(~np.isnan(row)) for row in held)
+        held = np.vstack([_forward_fill(row) for row in held[:, start:]])
+        total = weights.sum()
+        score = weights @ held / total if total else np.zeros(held.shape[1])
+        return {"score": score}
+
+    def plot(self, *args):
+        qx.plot(
+            self.info,
+            *args,
+            (("score", "Ensemble Score", "white", 1, "Ensemble"),),
+        )
+
+    def strategy(self, state, indicators):
+        if state["last_trade"] is None:
+            # Enter market with all capital on the first trade
+            return qx.Buy()
+        if indicators["score"] > self.tune["buy_threshold"] and isinstance(
+            state["last_trade"], qx.Sell
+        ):
+            return qx.Buy()
+        if indicators["score"] < -self.tune["sell_threshold"] and isinstance(
+            state["last_trade"], qx.Buy
+        ):
+            return qx.Sell()
+        return None
+
+    def signals(self, data, indicators):
+        # vectorized `strategy` for `engine.backtest`
+        return positions.gate(
+            indicators["score"] > self.tune["buy_threshold"],
+            indicators["score"] < -self.tune["sell_threshold"],
+        )
+
+    def fitness(self, states, raw_states, asset, currency):
+        return [
+            "roi_assets",
+            "roi_currency",
+            "roi",
+            "sortino_ratio",
+            "maximum_drawdown",
+            "trade_win_rate",
+        ], {}
+
+
+def main():
+    asset, currency = "BTC", "USDT"
+    wallet = qx.PaperWallet({asset: 0, currency: 1})
+    data = qx.Data(
+        exchange="kucoin",
+        asset=asset,
+        currency=currency,
+        begin="2021-01-01",
+        end="2023-01-01",
+    )
+
+    bot = Ensemble()
+    qx.dispatch(bot, data, wallet)
+
+
+if __name__ == "__main__":
+    main()
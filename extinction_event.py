@@ -37,6 +37,7 @@ import time
 
 import numpy as np
 import qtradex as qx
+from engine.kernels import ema_bank
 
 
 class ExtinctionEvent(qx.BaseBot):
@@ -78,11 +79,12 @@ class ExtinctionEvent(qx.BaseBot):
         }
 
     def indicators(self, data):
-        metrics = {
-            tag.rsplit("_", 1)[0]: qx.ti.ema(data["close"], self.tune[tag])
-            for tag in ["ma1_period", "ma2_period", "ma3_period"]
-        }
-        metrics["ma_exec"] = qx.ti.ema(data["close"], 2)
+        tags = ["ma1_period", "ma2_period", "ma3_period"]
+        emas, _ = ema_bank(
+            data["close"], [self.tune[tag] for tag in tags] + [2], integer=True
+        )
+        metrics = {tag.rsplit("_", 1)[0]: ema for tag, ema in zip(tags, emas)}
+        metrics["ma_exec"] = emas[-1]
         metrics["support"] = []
         metrics["selloff"] = []
         metrics["despair"] = []
@@ -206,6 +208,17 @@ class ExtinctionEvent(qx.BaseBot):
             ret = signal
         return ret
 
+    def signals(self, data, indicators):
+        # vectorized `strategy` for `engine.backtest`,
+        # the trend overrides need a last trade and so wait for the first fill
+        return {
+            "buy": indicators["override"] == "buy",
+            "sell": indicators["override"] == "sell",
+            "buying": indicators["buying"],
+            "selling": indicators["selling"],
+            "after_first_fill": True,
+        }
+
     def fitness(self, states, raw_states, asset, currency):
         return [
             "roi_assets",
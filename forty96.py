@@ -43,6 +43,8 @@ import time
 
 import numpy as np
 import qtradex as qx
+from engine.frame import AlignedFrame
+from engine.kernels import ema_bank
 
 
 class Forty96(qx.BaseBot):
@@ -68,24 +70,25 @@ class Forty96(qx.BaseBot):
         return max(math.ceil(i) for i in self.tune.values()) + 1
 
     def indicators(self, data):
-        ema_values = {
-            f"ma{i}": qx.ti.ema(data["close"], self.tune[f"ma{i}_period"])
-            for i in range(1, 4)
-        }
-        ema_slopes = {
-            f"ma{i}_slope": qx.derivative(
-                qx.ti.ema(data["close"], self.tune[f"ma{i}_period"])
-            )
-            for i in range(1, 4)
-        }
-
-        minlen = min(map(len, [*ema_values.values(), *ema_slopes.values()]))
-
-        ema_values = {k: v[:minlen] for k, v in ema_values.items()}
-        ema_slopes = {k: v[:minlen] for k, v in ema_slopes.items()}
+        # values and slopes of all three EMAs in one pass
+        values, slopes = ema_bank(
+            data["close"],
+            [self.tune[f"ma{i}_period"] for i in range(1, 4)],
+            integer=True,
+        )
+        frame = AlignedFrame(
+            [*(f"ma{i}" for i in range(1, 4)), *(f"ma{i}_slope" for i in range(1, 4))],
+            len(data["close"]),
+        )
+        for i in range(1, 4):
+            # the values stay a candle behind their slopes
+            frame[f"ma{i}"] = values[i - 1][:-1]
+            frame[f"ma{i}_slope"] = slopes[i - 1]
+        ema_values = {f"ma{i}": frame[f"ma{i}"] for i in range(1, 4)}
+        ema_slopes = {f"ma{i}_slope": frame[f"ma{i}_slope"] for i in range(1, 4)}
 
         # Combine EMA values and slopes into a single dictionary
-        indicators = {**ema_values, **ema_slopes}
+        indicators = dict(frame)
 
         # Create hexagram as a dictionary
         price = data["close"][-1]  # Get the latest price
@@ -1,5 +1,6 @@
 import numpy as np
 import qtradex as qx
+from engine import crossings
 
 
 class FRAMABot(qx.BaseBot):
@@ -52,6 +53,10 @@ class FRAMABot(qx.BaseBot):
 
         return None
 
+    def signals(self, data, indicators):
+        # vectorized `strategy` for `engine.backtest`
+        return crossings.gate(data["close"], indicators["frama"])
+
     def fitness(self, states, raw_states, asset, currency):
         return [
             "roi_gross",
@@ -35,6 +35,8 @@ import time
 
 import numpy as np
 import qtradex as qx
+from engine.kernels import ema_bank
+from engine.state import TradeState
 
 
 class ParabolicSARBot(qx.BaseBot):
@@ -141,10 +143,10 @@ class ParabolicSARBot(qx.BaseBot):
         }
 
         # Initialize storage for trade details
-        self.storage = {"hold": 0}
+        self.storage = TradeState()
 
     def reset(self):
-        self.storage = {"hold": 0}
+        self.storage = TradeState()
 
     def autorange(self):
         return super().autorange() + self.tune["ago"]
@@ -167,11 +169,17 @@ class ParabolicSARBot(qx.BaseBot):
         ).T
 
         # Calculate the signal (simple moving average of close prices)
-        ma1 = qx.ti.ema(data["close"], self.tune["ma1_period"])
-        ma2 = qx.ti.ema(data["close"], self.tune["ma2_period"])
-        ma3 = qx.ti.ema(data["close"], self.tune["ma3_period"])
-        signal = qx.ti.ema(data["close"], self.tune["signal_period"])
-        ma4 = qx.ti.ema(data["close"], self.tune["ma4_period"])
+        (ma1, ma2, ma3, signal, ma4), _ = ema_bank(
+            data["close"],
+            [
+                self.tune["ma1_period"],
+                self.tune["ma2_period"],
+                self.tune["ma3_period"],
+                self.tune["signal_period"],
+                self.tune["ma4_period"],
+            ],
+            integer=True,
+        )
 
         return {
             "sars": sars,
@@ -213,17 +221,15 @@ class ParabolicSARBot(qx.BaseBot):
         market = sum(1 for sar in sars if sar < signal)
 
         # Manage storage (hold, trade price, etc.)
-        key3 = (
-            signal if state["last_trade"] is None else self.storage["trade_price"][-1]
-        )
-        self.storage["trade_price"] = self.storage.get("trade_price", [key3, key3])
+        if not len(self.storage.trade_price):
+            self.storage.trade_price.append(signal)
 
         # Bearish conditions
         bear_conditions = [
             (market < self.tune["sar_thresh"]) or (ma1 < ma2) or (ma1 < ma3),
-            (signal > self.tune["signal_thresh"] * self.storage["trade_price"][-1])
+            (signal > self.tune["signal_thresh"] * self.storage.trade_price[-1])
             and (ma1 < ma4),
-            (signal > self.tune["signal_thresh_old"] * self.storage["trade_price"][-1])
+            (signal > self.tune["signal_thresh_old"] * self.storage.trade_price[-1])
             and (ma1 < ma4_ago),
         ]
 
@@ -231,22 +237,22 @@ class ParabolicSARBot(qx.BaseBot):
         if any(bear_conditions):
             if (
                 state["last_trade"] is None or isinstance(state["last_trade"], qx.Buy)
-            ) and state["unix"] > self.storage["hold"]:
+            ) and state["unix"] > self.storage.hold:
                 if signal > min(sars):
                     if (
                         signal
                         > self.tune["signal_thresh_sell"]
-                        * self.storage["trade_price"][-1]
+                        * self.storage.trade_price[-1]
                     ):
                         rest = self.tune["rest_multiplier"] * (
-                            max(sars) / self.storage["trade_price"][-1]
+                            max(sars) / self.storage.trade_price[-1]
                         )
                         rest = max(rest, self.tune["min_rest"])
-                        self.storage["hold"] = state["unix"] + 86400 * rest
-                        self.storage["trade_price"].append(signal)
+                        self.storage.hold = state["unix"] + 86400 * rest
+                        self.storage.trade_price.append(signal)
                         return qx.Sell()  # Execute Sell
                     else:
-                        self.storage["trade_price"].append(signal)
+                        self.storage.trade_price.append(signal)
                         return qx.Sell()  # Execute Sell
 
         # Bullish conditions: If MA10 > MA60, trigger Buy
@@ -256,14 +262,33 @@ class ParabolicSARBot(qx.BaseBot):
                     state["last_trade"], qx.Sell
                 ):
                     rest = self.tune["buy_rest"]
-                    if state["unix"] > self.storage["hold"]:
-                        self.storage["hold"] = state["unix"] + 86400 * rest
-                        self.storage["trade_price"].append(signal)
+                    if state["unix"] > self.storage.hold:
+                        self.storage.hold = state["unix"] + 86400 * rest
+                        self.storage.trade_price.append(signal)
                         return qx.Buy()  # Execute Buy
 
         # Otherwise, do nothing
         return None
 
+    def could_act(self, data, indicators):
+        # ticks `strategy` may trade on, for `engine.sparse`; the thresholds
+        # on the last trade price are left out, so both sides cover more
+        sars, signal = indicators["sars"], indicators["signal"]
+        ma1, ma2, ma3 = indicators["ma1"], indicators["ma2"], indicators["ma3"]
+        # `signal > min(sars)` and `any(sar < signal for sar in sars)`
+        market = (sars < signal[:, None]).sum(axis=1)
+        bear = (
+            (market < self.tune["sar_thresh"])
+            | (ma1 < ma2)
+            | (ma1 < ma3)
+            | (ma1 < indicators["ma4"])
+            | (ma1 < indicators["ma4_ago"])
+        )
+        return {
+            "buy": (market > 0) & ((ma1 > ma2) | (ma1 > ma3)),
+            "sell": (market > 0) & bear,
+        }
+
     def fitness(self, states, raw_states, asset, currency):
         return [
             "roi_gross",
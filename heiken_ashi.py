@@ -35,6 +35,7 @@ import time
 
 import numpy as np
 import qtradex as qx
+from engine.candles import derived
 
 
 class EmaCross(qx.BaseBot):
@@ -58,7 +59,8 @@ class EmaCross(qx.BaseBot):
         }
 
     def indicators(self, data):
-        newdata = qx.qi.heikin_ashi(data.raw_candles)
+        # computed once per dataset, see engine.candles
+        newdata = derived(data)
 
         # tulip indicators are exposed via qx.indicators.tulipy
         # and cached on backend for optimization speed
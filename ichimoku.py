@@ -1,5 +1,6 @@
 import numpy as np
 import qtradex as qx
+from engine import crossings
 
 
 class IchimokuBot(qx.BaseBot):
@@ -77,6 +78,10 @@ class IchimokuBot(qx.BaseBot):
 
         return None
 
+    def signals(self, data, indicators):
+        # vectorized `strategy` for `engine.backtest`
+        return crossings.gate(indicators["senkou_A"], indicators["senkou_B"])
+
     def fitness(self, states, raw_states, asset, currency):
         return [
             "roi_gross",
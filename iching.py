@@ -30,8 +30,9 @@ Strategy:
 import math
 import time
 
-import numpy as np
 import qtradex as qx
+from engine.frame import AlignedFrame
+from engine.kernels import ema_bank
 
 
 class IChing(qx.BaseBot):
@@ -60,26 +61,20 @@ class IChing(qx.BaseBot):
         return max(math.ceil(i) for i in self.tune.values()) + 1
 
     def indicators(self, data):
-        ema_values = {
-            f"ma{i}_slope": qx.derivative(
-                qx.ti.ema(data["close"], self.tune[f"ma{i}_period"])
-            )
-            for i in range(1, 7)
-        }
-
+        _, slopes = ema_bank(
+            data["close"],
+            [self.tune[f"ma{i}_period"] for i in range(1, 7)],
+            integer=True,
+        )
         # Ensure all EMA arrays are the same length
-        ema_lists = qx.truncate(*[ema_values[f"ma{i}_slope"] for i in range(1, 7)])
-        ema_values.update({f"ma{i}_slope": ema_lists[i - 1] for i in range(1, 7)})
+        frame = AlignedFrame([f"ma{i}_slope" for i in range(1, 7)], len(data["close"]))
+        for i in range(1, 7):
+            frame[f"ma{i}_slope"] = slopes[i - 1]
 
         # Create slope vector with 64 possible combinations of slopes
-        hexagram = np.array(
-            [
-                [1 if ema_values[f"ma{i}_slope"][j] > 0 else 0 for i in range(1, 7)]
-                for j, _ in enumerate(ema_values["ma1_slope"])
-            ]
-        )
+        hexagram = (frame.aligned() > 0).T.astype(int)
 
-        return {**ema_values, "hexagram": hexagram}
+        return {**frame, "hexagram": hexagram}
 
     def plot(self, *args):
         qx.plot(
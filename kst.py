@@ -1,5 +1,6 @@
 import numpy as np
 import qtradex as qx
+from engine import crossings
 
 
 class KSTIndicatorBot(qx.BaseBot):
@@ -65,6 +66,10 @@ class KSTIndicatorBot(qx.BaseBot):
 
         return None
 
+    def signals(self, data, indicators):
+        # vectorized `strategy` for `engine.backtest`
+        return crossings.gate(indicators["kst"], indicators["kst_signal"])
+
     def fitness(self, states, raw_states, asset, currency):
         return [
             "roi_gross",
@@ -28,6 +28,8 @@ import math
 import time
 
 import qtradex as qx
+from engine.candles import derived
+from engine.kernels import ema_bank
 
 
 class LavaHK(qx.BaseBot):
@@ -49,12 +51,14 @@ class LavaHK(qx.BaseBot):
         """
         Define the indicators using QX's indicators system.
         """
-        ma1 = qx.ti.ema(data["close"], self.tune["ma1_period"])
-        ma2 = qx.ti.ema(data["close"], self.tune["ma2_period"])
+        (ma1, ma2), _ = ema_bank(
+            data["close"],
+            [self.tune["ma1_period"], self.tune["ma2_period"]],
+            integer=True,
+        )
 
-        # OHLC4 calculation
-        ohlc4 = (data["open"] + data["high"] + data["low"] + data["close"]) / 4
-        return {"ma1": ma1, "ma2": ma2, "ohlc4": ohlc4}
+        # OHLC4, computed once per dataset
+        return {"ma1": ma1, "ma2": ma2, "ohlc4": derived(data)["ohlc4"]}
 
     def strategy(self, state, indicators):
         """
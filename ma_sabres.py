@@ -34,6 +34,83 @@ import time
 
 import numpy as np
 import qtradex as qx
+from qtradex.core.backtest import adjust_tuning_parameters
+
+from engine import sweep, votes
+from engine.frame import AlignedFrame
+
+# names of the `qx.ti` moving averages, looked up when called so an
+# `engine.pool.IndicatorPool` patching them is seen
+MA_TYPES = [
+    "dema",
+    "ema",
+    "hma",
+    "kama",
+    "linreg",
+    "sma",
+    "tema",
+    "trima",
+    "tsf",
+    "vwma",
+    "wma",
+    "zlema",
+]
+
+
+def ma_slope(data, ma_type, period):
+    """
+    Slope of a moving average, normalized by price
+    """
+    if MA_TYPES[ma_type] == "vwma":
+        ma = qx.ti.vwma(data["close"], data["volume"], period)
+    else:
+        ma = getattr(qx.ti, MA_TYPES[ma_type])(data["close"], period)
+    slope = qx.derivative(ma)
+    return slope / data["close"][-len(slope) :] * 10
+
+
+def slope_tensor(data, periods, ma_types=range(len(MA_TYPES)), path=None):
+    """
+    Every moving average slope for the given periods, computed once
+
+    Parameters:
+    - data: Historical market data, a `qx.Data`.
+    - periods: Moving average periods, as the indicators see them.
+    - ma_types: Indices into MA_TYPES.
+    - path: Optional .npy file to memory map the tensor to.
+    """
+    return sweep.IndicatorTensor(ma_slope, data, (ma_types, periods), path)
+
+
+def grid_search(data, candidates, wallet=None, range_periods=True, path=None):
+    """
+    Backtest every candidate tune, computing each distinct slope only once
+
+    Returns:
+    - List of (tune, fitness) pairs, in the order of `candidates`.
+    """
+    candidates = list(candidates)
+    # the tunes `gather` sees, periods rounded as the backtest rounds them
+    seen = []
+    for tune in candidates:
+        probe = MASabres()
+        probe.tune = dict(tune)
+        if range_periods:
+            adjust_tuning_parameters(probe, data.candle_size)
+        seen.append(probe.tune)
+    periods = sorted({tune[f"ma{i}_period"] for tune in seen for i in range(1, 6)})
+    ma_types = sorted({tune[f"ma{i}_type"] for tune in seen for i in range(1, 6)})
+    tensor = slope_tensor(data, periods, ma_types, path)
+
+    bot = MASabres()
+    return sweep.run(
+        bot,
+        data,
+        candidates,
+        lambda data: bot.gather(tensor),
+        wallet,
+        range_periods,
+    )
 
 
 class MASabres(qx.BaseBot):
@@ -96,40 +173,23 @@ class MASabres(qx.BaseBot):
         """
         Compute and return indicators used for strategy
         """
-        ret = {}
-        for i in range(5):
-            i += 1
-            func = [
-                qx.ti.dema,
-                qx.ti.ema,
-                qx.ti.hma,
-                qx.ti.kama,
-                qx.ti.linreg,
-                qx.ti.sma,
-                qx.ti.tema,
-                qx.ti.trima,
-                qx.ti.tsf,
-                qx.ti.vwma,
-                qx.ti.wma,
-                qx.ti.zlema,
-            ][self.tune[f"ma{i}_type"]]
-            if self.tune[f"ma{i}_type"] == 9:
-                ret[f"ma{i}_slope"] = qx.derivative(
-                    func(data["close"], data["volume"], self.tune[f"ma{i}_period"])
-                )
-                ret[f"ma{i}_slope"], data_close = qx.truncate(
-                    ret[f"ma{i}_slope"], data["close"]
-                )
-                ret[f"ma{i}_slope"] = ret[f"ma{i}_slope"] / data_close * 10
-            else:
-                ret[f"ma{i}_slope"] = qx.derivative(
-                    func(data["close"], self.tune[f"ma{i}_period"])
-                )
-                ret[f"ma{i}_slope"], data_close = qx.truncate(
-                    ret[f"ma{i}_slope"], data["close"]
-                )
-                ret[f"ma{i}_slope"] = ret[f"ma{i}_slope"] / data_close * 10
-        return ret
+        metrics = AlignedFrame(
+            [f"ma{i}_slope" for i in range(1, 6)], len(data["close"])
+        )
+        for i in range(1, 6):
+            metrics[f"ma{i}_slope"] = ma_slope(
+                data, self.tune[f"ma{i}_type"], self.tune[f"ma{i}_period"]
+            )
+        return metrics
+
+    def gather(self, tensor):
+        """
+        Indicators for the current tune, gathered from a `slope_tensor`
+        """
+        return {
+            f"ma{i}_slope": tensor[self.tune[f"ma{i}_type"], self.tune[f"ma{i}_period"]]
+            for i in range(1, 6)
+        }
 
     def plot(self, *args):
         """
@@ -144,44 +204,29 @@ class MASabres(qx.BaseBot):
             ),
         )
 
+    def conditions(self, indicators, side):
+        """
+        Bullish or bearish slope votes, as `side` is "bull" or "bear", on a
+        single tick or on whole arrays.
+        """
+        if side == "bull":
+            return [
+                indicators[f"ma{i}_slope"] > self.tune[f"bull{i}"] for i in range(1, 6)
+            ]
+        return [
+            indicators[f"ma{i}_slope"] < -self.tune[f"bear{i}"] for i in range(1, 6)
+        ]
+
     def strategy(self, state, indicators):
         """
         Strategy logic for buy/sell signals based on MA crossover and ATR
         """
-        ma1s = indicators["ma1_slope"]
-        ma2s = indicators["ma2_slope"]
-        ma3s = indicators["ma3_slope"]
-        ma4s = indicators["ma4_slope"]
-        ma5s = indicators["ma5_slope"]
-
         # Ensure the bot waits for a previous trade before making a decision
         if state["last_trade"] is None:
             return qx.Buy()
 
-        bullish = 0
-
-        if ma1s > self.tune["bull1"]:
-            bullish += 1
-        if ma2s > self.tune["bull2"]:
-            bullish += 1
-        if ma3s > self.tune["bull3"]:
-            bullish += 1
-        if ma4s > self.tune["bull4"]:
-            bullish += 1
-        if ma5s > self.tune["bull5"]:
-            bullish += 1
-
-        bearish = 0
-        if ma1s < -self.tune["bear1"]:
-            bearish += 1
-        if ma2s < -self.tune["bear2"]:
-            bearish += 1
-        if ma3s < -self.tune["bear3"]:
-            bearish += 1
-        if ma4s < -self.tune["bear4"]:
-            bearish += 1
-        if ma5s < -self.tune["bear5"]:
-            bearish += 1
+        bullish = sum(self.conditions(indicators, "bull"))
+        bearish = sum(self.conditions(indicators, "bear"))
 
         if abs(bullish - bearish) < self.tune["thresh"]:
             return None
@@ -194,6 +239,16 @@ class MASabres(qx.BaseBot):
 
         return None
 
+    def signals(self, data, indicators):
+        # vectorized `strategy` for `engine.backtest`
+        return votes.orders(
+            votes.tally(self.conditions(indicators, "bull")),
+            votes.tally(self.conditions(indicators, "bear")),
+            self.tune["bullish"],
+            self.tune["bearish"],
+            margin=self.tune["thresh"],
+        )
+
     def fitness(self, states, raw_states, asset, currency):
         return [
             "roi",
@@ -39,8 +39,8 @@ Strategy:
 
 import numpy as np
 import qtradex as qx
-from scipy.fft import fft, fftfreq
-from scipy.signal import butter, filtfilt
+from engine import regimes
+from engine.state import TradeState
 
 
 class BBadXMacDrSi(qx.BaseBot):
@@ -99,12 +99,18 @@ class BBadXMacDrSi(qx.BaseBot):
         }
 
         # Initialize storage for trade details (e.g., holding positions, last trade info)
-        self.storage = {"hold": 0, "last_trade_time": 0, "trade_price": 0}
+        self.storage = TradeState()
+
+    def reset(self):
+        self.storage = TradeState()
 
     def indicators(self, data):
         """
         Calculate key technical indicators (MACD, RSI, FFT, and ADX) for strategy decision-making.
         """
+        # scipy is imported here rather than at module level to keep worker start up fast
+        from scipy.fft import fft, fftfreq
+
         # MACD calculation: MACD line and Signal line
         macd_line, macd_signal, _ = qx.ti.macd(
             data["close"],
@@ -124,9 +130,11 @@ class BBadXMacDrSi(qx.BaseBot):
         # Low-pass filter applied to FFT data to remove high-frequency noise and isolate significant trends
         fft_filtered = self.low_pass_filter(fft_data)
 
-        # ADX (Average Directional Index): Measures trend strength
-        adx = qx.ti.adx(
-            data["high"], data["low"], data["close"], self.tune["adx_period"]
+        # ADX (Average Directional Index): Measures trend strength, computed
+        # once per dataset and labelled against its threshold
+        adx = regimes.values(data, "adx", self.tune["adx_period"])
+        adx_regime = regimes.labels(
+            data, "adx", self.tune["adx_period"], self.tune["adx_threshold"]
         )
 
         return {
@@ -135,6 +143,7 @@ class BBadXMacDrSi(qx.BaseBot):
             "rsi": rsi,
             "fft_filtered": fft_filtered,
             "adx": adx,
+            "adx_regime": adx_regime,
         }
 
     def low_pass_filter(self, data):
@@ -142,6 +151,8 @@ class BBadXMacDrSi(qx.BaseBot):
         Apply a low-pass filter to the FFT data to remove high-frequency noise and extract the primary trend.
         This is done by applying a Butterworth filter to the data.
         """
+        from scipy.signal import butter, filtfilt
+
         # Select filter type based on configuration (low-pass, high-pass, etc.)
         btype_map = ["low", "high", "bandpass", "bandstop"]
         btype = btype_map[self.tune["btype"]]
@@ -185,12 +196,12 @@ class BBadXMacDrSi(qx.BaseBot):
         macd_signal = indicators["macd_signal"]
         rsi = indicators["rsi"]
         fft_filtered = indicators["fft_filtered"]
-        adx = indicators["adx"]
+        adx_regime = indicators["adx_regime"]
 
         current_time = state["unix"]
 
         # Detect market regime (Trend vs Range)
-        if adx < self.tune["adx_threshold"]:
+        if adx_regime == regimes.BELOW:
             market_regime = "range"  # Market is range-bound, typically no strong trends
         else:
             market_regime = (
@@ -209,8 +220,8 @@ class BBadXMacDrSi(qx.BaseBot):
         ):
             # Ensure we don't already have a position before buying
             if state["last_trade"] is None or isinstance(state["last_trade"], qx.Sell):
-                self.storage["last_trade_time"] = current_time
-                self.storage["trade_price"] = state["close"]
+                self.storage.last_trade_time = current_time
+                self.storage.trade_price.append(state["close"])
                 return qx.Buy()  # Execute Buy action
 
         # Sell conditions with dynamic comparison operators
@@ -225,8 +236,8 @@ class BBadXMacDrSi(qx.BaseBot):
         ):
             # Ensure we don't already have a position before selling
             if state["last_trade"] is None or isinstance(state["last_trade"], qx.Buy):
-                self.storage["last_trade_time"] = current_time
-                self.storage["trade_price"] = state["close"]
+                self.storage.last_trade_time = current_time
+                self.storage.trade_price.append(state["close"])
                 return qx.Sell()  # Execute Sell action
 
         # If no conditions are met, do nothing (no action taken)
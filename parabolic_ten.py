@@ -139,6 +139,12 @@ class ParabolicSARBot(qx.BaseBot):
         # Otherwise, do nothing
         return None
 
+    def could_act(self, data, indicators):
+        # ticks `strategy` trades on, for `engine.sparse`
+        market = (indicators["sars"] < indicators["signal"][:, None]).sum(axis=1)
+        sell = market < self.tune["sell"]
+        return {"buy": (market > self.tune["buy"]) & ~sell, "sell": sell}
+
     def fitness(self, states, raw_states, asset, currency):
         return [
             "roi_gross",
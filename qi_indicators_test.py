@@ -2,11 +2,16 @@ from typing import Dict, Tuple
 
 import numpy as np
 import qtradex as qx
+from engine import LazyIndicators
+from engine.candles import derived
 
 # Assuming the KST and FRAMA functions are defined as provided
 
 TEST = 7
 
+# not every version of the SDK has a super trend
+SUPER_TREND = hasattr(qx.qi, "super_trend")
+
 
 TESTS = {
     1: (
@@ -200,18 +205,14 @@ class QiIndicatorsTest(qx.BaseBot):
         }
 
     def indicators(self, data):
-        ha_values = qx.qi.heikin_ashi(
-            dict(
-                {
-                    "open": data["open"],
-                    "high": data["high"],
-                    "low": data["low"],
-                    "close": data["close"],
-                    "volume": data["volume"],  # Volume remains the same
-                }
-            )
+        # entries are computed on first read, see engine.lazy
+        metrics = LazyIndicators(
+            {"random": np.random.randint(-5, 5, data["close"].shape[0])}
         )
-        ichimoku_values = qx.qi.ichimoku(
+        metrics.add(("ha_close", "ha_open"), derived, data)
+        metrics.add(
+            ("tenkan_sen", "kijun_sen", "senkou_span_a", "senkou_span_b", "chikou_span"),
+            qx.qi.ichimoku,
             data["high"],
             data["low"],
             data["close"],
@@ -220,7 +221,9 @@ class QiIndicatorsTest(qx.BaseBot):
             self.tune["ichimoku_senkou_b_period"],
             self.tune["ichimoku_senkou_span"],
         )
-        kst_values = qx.qi.kst(
+        metrics.add(
+            ("kst", "kst_signal"),
+            qx.qi.kst,
             data["close"],
             self.tune["kst_roc1_period"],
             self.tune["kst_roc2_period"],
@@ -228,59 +231,84 @@ class QiIndicatorsTest(qx.BaseBot):
             self.tune["kst_roc4_period"],
             self.tune["kst_smoothing"],
         )
-        frama1 = qx.qi.frama(
+        metrics.add(
+            "frama1",
+            qx.qi.frama,
             data["close"],
             self.tune["frama1_period"],
             self.tune["frama1_fractal_period"],
         )
-        frama2 = qx.qi.frama(
+        metrics.add(
+            "frama2",
+            qx.qi.frama,
             data["close"],
             self.tune["frama2_period"],
             self.tune["frama2_fractal_period"],
         )
-        ravi = qx.qi.ravi(
+        metrics.add(
+            "ravi",
+            qx.qi.ravi,
             data["high"],
             data["low"],
             data["close"],
             self.tune["ravi_short"],
             self.tune["ravi_long"],
         )
-        aema = qx.derivative(
-            qx.qi.aema(data["close"], self.tune["aema_period"], self.tune["aema_alpha"])
+        metrics.add(
+            "aema",
+            lambda: qx.derivative(
+                qx.qi.aema(
+                    data["close"], self.tune["aema_period"], self.tune["aema_alpha"]
+                )
+            ),
         )
-        macd, signal_line, hist = qx.qi.typed_macd(
+        metrics.add(
+            ("macd", "signal_line", "hist"),
+            qx.qi.typed_macd,
             data["close"],
             self.tune["macd_short_period"],
             self.tune["macd_long_period"],
             self.tune["macd_signal_period"],
             self.tune["macd_type"],
         )
-        tsi = qx.qi.tsi(
-            data["close"], self.tune["tsi_long_period"], self.tune["tsi_short_period"]
+        metrics.add(
+            "tsi",
+            qx.qi.tsi,
+            data["close"],
+            self.tune["tsi_long_period"],
+            self.tune["tsi_short_period"],
         )
-        smi, smi_sig = qx.qi.smi(
+        metrics.add(
+            ("smi", "smi_sig"),
+            qx.qi.smi,
             data["close"],
             data["high"],
             data["low"],
             self.tune["k_period"],
             self.tune["d_period"],
         )
-        eri_bull, eri_bear = qx.qi.eri(
+        metrics.add(
+            ("eri_bull", "eri_bear"),
+            qx.qi.eri,
             data["high"],
             data["low"],
             data["close"],
             self.tune["eri_ma_period"],
             self.tune["eri_ma_type"],
         )
-        super_t, upt, dt = qx.qi.super_trend(
-            data["high"],
-            data["low"],
-            data["close"],
-            self.tune["atr_period"],
-            self.tune["atr_multiplier"],
-        )
-
-        k_upper_band, k_middle_band, k_lower_band = qx.qi.keltner(
+        if SUPER_TREND:
+            metrics.add(
+                ("super_t",),
+                qx.qi.super_trend,
+                data["high"],
+                data["low"],
+                data["close"],
+                self.tune["atr_period"],
+                self.tune["atr_multiplier"],
+            )
+        metrics.add(
+            ("k_upper_band", "k_middle_band", "k_lower_band"),
+            qx.qi.keltner,
             data["high"],
             data["low"],
             data["close"],
@@ -289,107 +317,77 @@ class QiIndicatorsTest(qx.BaseBot):
             self.tune["keltner_ma_type"],
             self.tune["keltner_multiplier"],
         )
-        d_upper_band, d_middle_band, d_lower_band = qx.qi.donchian(
-            data["high"], data["low"], self.tune["donchian_period"]
+        metrics.add(
+            ("d_upper_band", "d_middle_band", "d_lower_band"),
+            qx.qi.donchian,
+            data["high"],
+            data["low"],
+            self.tune["donchian_period"],
         )
-        tick_i = qx.qi.tick_indicator(data["close"])
-        price_bins, volume_profile = qx.qi.market_profile(
-            data["close"], data["volume"], self.tune["mp_bin_size"]
+        metrics.add("tick_i", qx.qi.tick_indicator, data["close"])
+        metrics.add(
+            ("price_bins", "volume_profile"),
+            qx.qi.market_profile,
+            data["close"],
+            data["volume"],
+            self.tune["mp_bin_size"],
         )
-        a_support, a_resistance = qx.qi.price_action(
-            data["close"], self.tune["pa_lookback"], self.tune["pa_threshold"]
+        metrics.add(
+            ("a_support", "a_resistance"),
+            qx.qi.price_action,
+            data["close"],
+            self.tune["pa_lookback"],
+            self.tune["pa_threshold"],
         )
-        tbb_upper_band, tbb_middle_bband, tbb_lower_band = qx.qi.typed_bbands(
+        metrics.add("trin_i", qx.qi.trin_indicator, data["close"], data["volume"])
+        metrics.add(
+            ("vortex_plus", "vortex_minus", "vortex"),
+            qx.qi.vortex,
+            data["high"],
+            data["low"],
             data["close"],
-            self.tune["tbb_ma_period"],
-            self.tune["tbb_ma_type"],
-            self.tune["tbb_std_period"],
-            self.tune["tbb_deviations"],
+            self.tune["vortex_period"],
         )
-        trin_i = qx.qi.trin_indicator(data["close"], data["volume"])
-
-        vortex_plus, vortex_minus, vortex = qx.qi.vortex(
-            data["high"], data["low"], data["close"], self.tune["vortex_period"]
+        metrics.add(
+            ("zigzag", "steps"), qx.qi.zigzag, data["close"], self.tune["zigzag_deviation"]
         )
-        zigzag, steps = qx.qi.zigzag(data["close"], self.tune["zigzag_deviation"])
-        holt_smooth, holt_trend = qx.qi.holt_winters_des(
+        metrics.add(
+            ("holt_smooth", "holt_trend"),
+            qx.qi.holt_winters_des,
             data["close"],
             self.tune["holt_winters_span"],
             self.tune["holt_winters_beta"],
         )
-        trix_values = qx.qi.trix(data["close"], self.tune["trix_window"])
-        ulcer_index_values = qx.qi.ulcer_index(
-            data["close"], self.tune["ulcer_index_window"]
-        )
-        arsi = qx.qi.arsi(
+        metrics.add("trix_values", qx.qi.trix, data["close"], self.tune["trix_window"])
+        metrics.add(
+            "ulcer_index_values",
+            qx.qi.ulcer_index,
             data["close"],
-            self.tune["arsi_rsi_period"],
-        )
-        kagi = qx.qi.kagi(data["close"], self.tune["kagi_reversal"])
-        renko = qx.qi.renko(data["close"], self.tune["renko_brick"])
-        ehlers_arsi = qx.qi.earsi(
-            data["close"],
-            self.tune["earsi_auto_min"],
-            self.tune["earsi_auto_max"],
-            self.tune["earsi_auto_avg"],
+            self.tune["ulcer_index_window"],
         )
-
-        return {
-            "random": np.random.randint(-5, 5, data["close"].shape[0]),
-            "ha_close": ha_values["ha_close"],
-            "ha_open": ha_values["ha_open"],
-            "tenkan_sen": ichimoku_values[0],
-            "kijun_sen": ichimoku_values[1],
-            "senkou_span_a": ichimoku_values[2],
-            "senkou_span_b": ichimoku_values[3],
-            "chikou_span": ichimoku_values[4],
-            "kst": kst_values[0],
-            "kst_signal": kst_values[1],
-            "frama1": frama1,
-            "frama2": frama2,
-            "ravi": ravi,
-            "aema": aema,
-            "macd": macd,
-            "signal_line": signal_line,
-            "hist": hist,
-            "tsi": tsi,
-            "smi": smi,
-            "smi_sig": smi_sig,
-            "eri_bull": eri_bull,
-            "eri_bear": eri_bear,
-            "super_t": super_t,
-            "k_upper_band": k_upper_band,
-            "k_middle_band": k_middle_band,
-            "k_lower_band": k_lower_band,
-            "d_upper_band": d_upper_band,
-            "d_middle_band": d_middle_band,
-            "d_lower_band": d_lower_band,
-            "tick_i": tick_i,
-            "price_bins": price_bins,
-            "volume_profile": volume_profile,
-            "a_support": a_support,
-            "a_resistance": a_resistance,
-            "trin_i": trin_i,
-            "vortex_plus": vortex_plus,
-            "vortex_minus": vortex_minus,
-            "vortex": vortex,
-            "zigzag": zigzag,
-            "steps": steps,
-            "holt_smooth": holt_smooth,
-            "holt_trend": holt_trend,
-            "trix_values": trix_values,
-            "ulcer_index_values": ulcer_index_values,
-            # "arsi": arsi,
-            # "kagi": kagi,
-            # "renko": renko,
-            # "ehlers_arsi": ehlers_arsi,
-        }
+        # metrics.add("arsi", qx.qi.arsi, data["close"], self.tune["arsi_rsi_period"])
+        # metrics.add("kagi", qx.qi.kagi, data["close"], self.tune["kagi_reversal"])
+        # metrics.add("renko", qx.qi.renko, data["close"], self.tune["renko_brick"])
+        # metrics.add(
+        #     "ehlers_arsi",
+        #     qx.qi.earsi,
+        #     data["close"],
+        #     self.tune["earsi_auto_min"],
+        #     self.tune["earsi_auto_max"],
+        #     self.tune["earsi_auto_avg"],
+        # )
+        return metrics
 
     def plot(self, *args):
         qx.plot(
             self.info,
             *args,
-            TESTS[TEST],
+            # no indicators are drawn for a test without a plot
+            tuple(
+                line
+                for line in TESTS.get(TEST, ())
+                if SUPER_TREND or line[0] != "super_t"
+            ),
         )
 
     def strategy(self, state, indicators):
@@ -399,6 +397,13 @@ class QiIndicatorsTest(qx.BaseBot):
         elif indicators["random"] > 4:
             return qx.Buy()
 
+    def signals(self, data, indicators):
+        # vectorized `strategy` for `engine.backtest`
+        signals = np.zeros(len(data["close"]), dtype=np.int8)
+        signals[indicators["random"] > 4] = 1
+        signals[indicators["random"] < -4] = -1
+        return signals
+
     def fitness(self, states, raw_states, asset, currency):
         return [
             "roi_assets",
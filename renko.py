@@ -17,6 +17,7 @@ The strategy is based on Renko bar crossovers and the Relative Strength Index (R
   - The bot uses Renko bars, which are price-based charts where each new bar represents a fixed price movement, 
   eliminating minor price fluctuations and providing a clearer view of the overall trend.
   - The bot calculates the Renko bar size using either an Average True Range (ATR) method or a traditional multiplier.
+  - Bricks are built by `engine.bars`; every candle sees the last brick completed by its close.
 
 - **RSI Confirmation**:
   - The strategy incorporates the Relative Strength Index (RSI) to confirm trends:
@@ -39,9 +40,13 @@ The strategy is based on Renko bar crossovers and the Relative Strength Index (R
 for Renko calculation.
 - **Use ATR for Renko Calculation** (`is_atr`): Boolean flag to determine whether to use ATR for Renko size calculation 
 or use the traditional multiplier method.
-- **Traditional Renko Multiplier** (`trad_len`): Multiplier for traditional Renko calculation when `is_atr` is set to 0.
+- **Brick Percentage** (`brick_percent`): Brick size as a percentage of the first close, when `is_atr` is set to 0.
+Tunes saved before bricks were built carry a `trad_len` that sized nothing; they are refused rather than
+read as a brick size.
 - **Warning Zone Percentage** (`warning_zone`): Percentage of Renko movement to define the warning zones for exits.
 - **RSI Period** (`rsi_period`): Period used for calculating the Relative Strength Index.
+- **RSI on Bricks** (`rsi_on_bricks`): Whether the RSI runs on the brick stream, one value per brick, often
+ten times shorter than the candles, rather than on every candle's close.
 - **RSI Oversold Threshold** (`rsi_oversold`): RSI level below which the market is considered oversold 
 (used for long signal confirmation).
 - **RSI Overbought Threshold** (`rsi_overbought`): RSI level above which the market is considered overbought 
@@ -53,6 +58,7 @@ import math
 
 import numpy as np
 import qtradex as qx
+from engine import bars
 
 
 class Renko(qx.BaseBot):
@@ -61,9 +67,10 @@ class Renko(qx.BaseBot):
         self.tune = {
             "atr_period": 14.0,  # ATR period
             "is_atr": 0,  # Bool: Use ATR for Renko calculation
-            "trad_len": 1.15,  # Traditional Renko multiplier
+            "brick_percent": 1.15,  # Brick size, percent of the first close
             "warning_zone": 50.0,  # Warning zone as a percentage of Renko
             "rsi_period": 14.0,  # RSI period
+            "rsi_on_bricks": 0,  # Bool: RSI of the brick closes
             "rsi_oversold": 30.0,  # RSI oversold threshold
             "rsi_overbought": 70.0,  # RSI overbought threshold
         }
@@ -71,25 +78,34 @@ class Renko(qx.BaseBot):
         self.clamps = {
             "atr_period": [5, 14.0, 50, 0.5],
             "is_atr": [0, 0, 1, 1],
-            "trad_len": [0.1, 1.15, 2.5, 0.5],
+            "brick_percent": [0.1, 1.15, 2.5, 0.5],
             "warning_zone": [10, 50.0, 90, 0.5],
             "rsi_period": [5, 14.0, 30, 1],
+            "rsi_on_bricks": [0, 0, 1, 1],
             "rsi_oversold": [0, 30.0, 100, 1],
             "rsi_overbought": [0, 70.0, 100, 1],
         }
 
-    def calculate_renko(self, data, is_atr, atr_period, trad_len):
-        """Calculate Renko bars based on ATR or Traditional method."""
+    def calculate_bricks(self, data, is_atr, atr_period, brick_percent):
+        """Build the Renko bricks, sized by ATR or as a percentage of price."""
         if is_atr:
-            # ATR-based Renko calculation
-            atr = qx.ti.atr(data["high"], data["low"], data["close"], atr_period)
-            renko_size = atr[-1] if len(atr) > 0 else 1
+            # ATR-based Renko calculation, each brick sized by the ATR of its candle
+            renko_size = qx.ti.atr(data["high"], data["low"], data["close"], atr_period)
         else:
-            # Traditional Renko calculation using the multiplier
-            renko_size = trad_len
-
-        renko_open = np.roll(data["close"], 1)  # Previous close as open
-        renko_close = data["close"]
+            # Fixed bricks, a percentage of the first close
+            renko_size = data["close"][0] * brick_percent / 100
+        return bars.renko(data["close"], renko_size), renko_size
+
+    def calculate_renko(self, data, bricks, renko_size):
+        """Spread the Renko bricks back over the candles."""
+        if len(bricks["close"]):
+            # the last brick completed by every candle, from the first brick on
+            renko_open = bars.line(bricks, len(data["close"]), "open")
+            renko_close = bars.line(bricks, len(data["close"]), "close")
+        else:
+            # price never moved a brick: every candle sees a flat brick at
+            # the first close, rather than an empty series with no ticks
+            renko_open = renko_close = np.full(len(data["close"]), data["close"][0])
         renko_diff = abs(renko_close - renko_open)
 
         return renko_open, renko_close, renko_diff, renko_size
@@ -98,15 +114,43 @@ class Renko(qx.BaseBot):
         """Calculate RSI (Relative Strength Index)"""
         return qx.ti.rsi(data["close"], rsi_period)
 
+    def brick_rsi(self, data, bricks, rsi_period):
+        """
+        RSI of the brick closes, computed on the brick stream alone and spread
+        back over the candles; NaN until enough bricks have formed.
+        """
+        closes = bricks["close"]
+        rsi = np.full(len(closes), np.nan)
+        if len(closes) > rsi_period:
+            values = qx.ti.rsi(closes, rsi_period)
+            rsi[len(closes) - len(values) :] = values
+        if not len(closes):
+            return np.full(len(data["close"]), np.nan)
+        return bars.line({**bricks, "rsi": rsi}, len(data["close"]), "rsi")
+
     def indicators(self, data):
         """Compute Renko bars and RSI, as well as warning zones."""
+        if "trad_len" in self.tune:
+            raise ValueError(
+                "This tune is from before renko.py built bricks, its trad_len"
+                " sized nothing; tune brick_percent instead."
+            )
         # Get Renko bars based on chosen parameters
+        bricks, renko_size = self.calculate_bricks(
+            data,
+            self.tune["is_atr"],
+            self.tune["atr_period"],
+            self.tune["brick_percent"],
+        )
         renko_open, renko_close, renko_diff, renko_size = self.calculate_renko(
-            data, self.tune["is_atr"], self.tune["atr_period"], self.tune["trad_len"]
+            data, bricks, renko_size
         )
 
-        # Calculate RSI
-        rsi = self.compute_rsi(data, self.tune["rsi_period"])
+        # Calculate RSI, on the bricks or on every candle
+        if self.tune["rsi_on_bricks"]:
+            rsi = self.brick_rsi(data, bricks, self.tune["rsi_period"])
+        else:
+            rsi = self.compute_rsi(data, self.tune["rsi_period"])
 
         # Warning zones for Renko
         warning_zone_high = renko_close + renko_diff * (self.tune["warning_zone"] / 100)
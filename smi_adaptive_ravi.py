@@ -2,6 +2,11 @@ from typing import Dict, Tuple
 
 import numpy as np
 import qtradex as qx
+from engine import LazyIndicators
+from engine.candles import derived
+
+# not every version of the SDK has a super trend
+SUPER_TREND = hasattr(qx.qi, "super_trend")
 
 # Assuming the KST and FRAMA functions are defined as provided
 
@@ -113,11 +118,16 @@ class HeikinAshiIchimokuVortexBot(qx.BaseBot):
         }
 
     def indicators(self, data):
+        # entries are computed on first read, see engine.lazy
+        metrics = LazyIndicators()
+
         # Calculate Heikin-Ashi
-        ha_values = qx.qi.heikin_ashi(data)
+        metrics.add(("ha_close", "ha_open"), derived, data)
 
         # Calculate Ichimoku
-        ichimoku_values = qx.qi.ichimoku(
+        metrics.add(
+            ("tenkan_sen", "kijun_sen"),
+            qx.qi.ichimoku,
             data["high"],
             data["low"],
             data["close"],
@@ -128,7 +138,9 @@ class HeikinAshiIchimokuVortexBot(qx.BaseBot):
         )
 
         # Calculate KST
-        kst_values = qx.qi.kst(
+        metrics.add(
+            ("kst", "kst_signal"),
+            qx.qi.kst,
             data["close"],
             self.tune["kst_roc1_period"],
             self.tune["kst_roc2_period"],
@@ -137,18 +149,42 @@ class HeikinAshiIchimokuVortexBot(qx.BaseBot):
             self.tune["kst_smoothing"],
         )
 
-        ravi = qx.qi.ravi(
+        metrics.add(
+            "frama1",
+            qx.qi.frama,
+            data["close"],
+            self.tune["frama1_period"],
+            self.tune["frama1_fractal_period"],
+        )
+        metrics.add(
+            "frama2",
+            qx.qi.frama,
+            data["close"],
+            self.tune["frama2_period"],
+            self.tune["frama2_fractal_period"],
+        )
+
+        metrics.add(
+            "ravi",
+            qx.qi.ravi,
             data["high"],
             data["low"],
             data["close"],
             self.tune["ravi_short"],
             self.tune["ravi_long"],
         )
-        aema = qx.derivative(
-            qx.qi.aema(data["close"], self.tune["aema_period"], self.tune["aema_alpha"])
+        metrics.add(
+            "aema",
+            lambda: qx.derivative(
+                qx.qi.aema(
+                    data["close"], self.tune["aema_period"], self.tune["aema_alpha"]
+                )
+            ),
         )
 
-        macd, signal_line, hist = qx.qi.typed_macd(
+        metrics.add(
+            ("macd", "signal_line", "hist"),
+            qx.qi.typed_macd,
             data["close"],
             self.tune["macd_short_period"],
             self.tune["macd_long_period"],
@@ -156,10 +192,16 @@ class HeikinAshiIchimokuVortexBot(qx.BaseBot):
             self.tune["macd_type"],
         )
 
-        tsi = qx.qi.tsi(
-            data["close"], self.tune["tsi_long_period"], self.tune["tsi_short_period"]
+        metrics.add(
+            "tsi",
+            qx.qi.tsi,
+            data["close"],
+            self.tune["tsi_long_period"],
+            self.tune["tsi_short_period"],
         )
-        smi, smi_sig = qx.qi.smi(
+        metrics.add(
+            ("smi", "smi_sig"),
+            qx.qi.smi,
             data["close"],
             data["high"],
             data["low"],
@@ -167,21 +209,26 @@ class HeikinAshiIchimokuVortexBot(qx.BaseBot):
             self.tune["d_period"],
         )
 
-        eri_bull, eri_bear = qx.qi.eri(
+        # only plotted
+        metrics.add(
+            ("eri_bull", "eri_bear"),
+            qx.qi.eri,
             data["high"],
             data["low"],
             data["close"],
             self.tune["eri_ma_period"],
             self.tune["eri_ma_type"],
         )
-
-        super_t, upt, dt = qx.qi.super_trend(
-            data["high"],
-            data["low"],
-            data["close"],
-            self.tune["atr_period"],
-            self.tune["atr_multiplier"],
-        )
+        if SUPER_TREND:
+            metrics.add(
+                ("super_t",),
+                qx.qi.super_trend,
+                data["high"],
+                data["low"],
+                data["close"],
+                self.tune["atr_period"],
+                self.tune["atr_multiplier"],
+            )
 
         # arsi = qx.qi.arsi(
         #     data["close"], self.tune["arsi_rsi_period"], self.tune["arsi_adpative_period"]
@@ -220,55 +267,8 @@ class HeikinAshiIchimokuVortexBot(qx.BaseBot):
         # )
         # zigzag, steps = zigzag(data["close"], self.tune["deviation"])
 
-        return {
-            "ha_close": ha_values["ha_close"],
-            "ha_open": ha_values["ha_open"],
-            "tenkan_sen": ichimoku_values[0],
-            "kijun_sen": ichimoku_values[1],
-            "kst": kst_values[0],
-            "kst_signal": kst_values[1],
-            "frama1": qx.qi.frama(
-                data["close"],
-                self.tune["frama1_period"],
-                self.tune["frama1_fractal_period"],
-            ),
-            "frama2": qx.qi.frama(
-                data["close"],
-                self.tune["frama2_period"],
-                self.tune["frama2_fractal_period"],
-            ),
-            "ravi": ravi,
-            "aema": aema,
-            "macd": macd,
-            "signal_line": signal_line,
-            "hist": hist,
-            "tsi": tsi,
-            "smi": smi,
-            "smi_sig": smi_sig,
-            "eri_bull": eri_bull,
-            "eri_bear": eri_bear,
-            "super_t": super_t,
-            # "arsi": arsi,
-            # "k_upper_band": k_upper_band,
-            # "k_middle_band": k_middle_band,
-            # "k_lower_band": k_lower_band,
-            # "d_upper_band": d_upper_band,
-            # "d_middle_band": d_middle_band,
-            # "d_lower_band": d_lower_band,
-            # "kagi": kagi,
-            # "renko": renko,
-            # "tick_i": tick_i,
-            # "trin_i": trin_i,
-            # "price_bins": price_bins,
-            # "volume_profile": volume_profile,
-            # "a_support": a_support,
-            # "a_resistance": a_resistance
-            # "vortex_plus": vortex_plus,
-            # "vortex_minus": vortex_minus,
-            # "vortex": vortex,
-            # "zigzag": zigzag,
-            # "steps": steps,
-        }
+
+        return metrics
 
     def plot(self, *args):
         qx.plot(
@@ -293,7 +293,6 @@ class HeikinAshiIchimokuVortexBot(qx.BaseBot):
                 ("kst", "KST", "purple", 1, "KST"),
                 ("kst_signal", "KST Signal", "brown", 1, "KST"),
                 ("ravi", "Ravi", "magenta", 2, "ravi"),
-                ("super_t", "Super Trend", "yellow", 0, ""),
                 # ("arsi", "Arsi", "coral", 2, ""),
                 # ("k_upper_band", "K Upper Band", "lightblue", 2, ""),
                 # ("k_middle_band", "K Middle Band", "lightgreen", 2, ""),
@@ -314,7 +313,8 @@ class HeikinAshiIchimokuVortexBot(qx.BaseBot):
                 # ("vortex", "Vortex", "tomato", 2, ""),
                 # ("zigzag", "Zigzag", "slateblue", 2, ""),
                 # ("steps", "Steps", "goldenrod", 2, ""),
-            ),
+            )
+            + ((("super_t", "Super Trend", "yellow", 0, ""),) if SUPER_TREND else ()),
         )
 
     def strategy(self, state, indicators):
@@ -347,6 +347,30 @@ class HeikinAshiIchimokuVortexBot(qx.BaseBot):
 
         return None
 
+    def signals(self, data, indicators):
+        # vectorized `strategy` for `engine.backtest`
+        conditions = np.array(
+            [
+                indicators["ha_close"] > indicators["ha_open"],
+                indicators["tenkan_sen"] > indicators["kijun_sen"],
+                indicators["kst"] > indicators["kst_signal"],
+                indicators["frama1"] < indicators["frama2"],
+                indicators["ravi"] > 0,
+                indicators["aema"] > 0,
+                indicators["hist"] > indicators["macd"],
+                indicators["tsi"] > 0,
+                indicators["smi"] > indicators["smi_sig"],
+            ]
+        )
+        bearish = np.count_nonzero(conditions, axis=0)
+        bullish = len(conditions) - bearish
+
+        signals = np.zeros(len(data["close"]), dtype=np.int8)
+        signals[bullish > self.tune["buy_thresh"]] = 1
+        signals[bearish > self.tune["sell_thresh"]] = -1
+        signals[0] = 1
+        return signals
+
     def fitness(self, states, raw_states, asset, currency):
         return [
             "roi_gross",
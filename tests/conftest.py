@@ -0,0 +1,44 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+import qtradex as qx
+
+# bots and `engine` are imported from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def synthetic_data(candles=800, candle_size=86400, seed=0):
+    """
+    A `qx.Data` of a random walk, built without touching an exchange.
+    """
+    rng = np.random.default_rng(seed)
+    data = qx.Data(
+        exchange="kucoin",
+        asset="BTC",
+        currency="USDT",
+        begin="2020-01-01",
+        end="2020-01-02",
+        candle_size=candle_size,
+        placeholder=True,
+    )
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, candles)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    unix = data.begin + candle_size * np.arange(candles, dtype=float)
+    data.raw_candles = {
+        "unix": unix,
+        "open": open_,
+        "high": np.maximum(open_, close) * (1 + rng.uniform(0, 0.02, candles)),
+        "low": np.minimum(open_, close) * (1 - rng.uniform(0, 0.02, candles)),
+        "close": close,
+        "volume": rng.uniform(1, 10, candles),
+    }
+    data.end = int(unix[-1])
+    data.days = (data.end - data.begin) / 86400
+    return data
+
+
+@pytest.fixture
+def data():
+    return synthetic_data()
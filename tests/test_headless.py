@@ -0,0 +1,18 @@
+import sys
+
+import pytest
+import qtradex  # noqa: F401
+
+from engine import headless
+
+
+def test_enable_after_import_warns():
+    try:
+        with pytest.warns(RuntimeWarning, match="no effect"):
+            headless.enable()
+    finally:
+        sys.meta_path[:] = [
+            finder
+            for finder in sys.meta_path
+            if not isinstance(finder, headless.DeferredFinder)
+        ]
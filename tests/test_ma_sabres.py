@@ -0,0 +1,23 @@
+import engine
+import ma_sabres
+
+from conftest import synthetic_data
+
+
+def test_grid_search_integer_periods_off_daily_candles():
+    # 7h candles scale periods by 24/7, and int periods are truncated
+    data = synthetic_data(candles=1500, candle_size=7 * 3600)
+    candidates = []
+    for start in range(5, 10):
+        tune = ma_sabres.MASabres().tune
+        for i in range(1, 6):
+            tune[f"ma{i}_period"] = start + 4 * i
+        candidates.append(tune)
+
+    results = ma_sabres.grid_search(data, candidates)
+
+    assert [tune for tune, _ in results] == candidates
+    for tune, result in results:
+        bot = ma_sabres.MASabres()
+        bot.tune = dict(tune)
+        assert result == engine.backtest(bot, data)
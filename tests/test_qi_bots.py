@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+import qtradex as qx
+
+import qi_indicators_test
+import smi_adaptive_ravi
+
+
+@pytest.mark.parametrize(
+    "module, bot",
+    [
+        (qi_indicators_test, qi_indicators_test.QiIndicatorsTest),
+        (smi_adaptive_ravi, smi_adaptive_ravi.HeikinAshiIchimokuVortexBot),
+    ],
+)
+def test_qx_backtest_without_super_trend(data, module, bot):
+    # qx.backtest evaluates every indicator, so one the SDK lacks must not
+    # be registered at all
+    bot = bot()
+    assert ("super_t" in bot.indicators(data)) == module.SUPER_TREND
+    result = qx.backtest(bot, data, plot=False)
+    assert all(np.isfinite(value) for value in result.values())
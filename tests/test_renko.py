@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+import qtradex as qx
+
+import engine
+from engine import bars
+from renko import Renko
+
+
+def test_brick_rsi_runs_on_the_brick_stream(data):
+    bot = Renko()
+    bot.tune["rsi_on_bricks"] = 1
+    bricks, _ = bot.calculate_bricks(data, 0, 14, bot.tune["brick_percent"])
+    rsi = bot.indicators(data)["rsi"]
+    # one value per brick, repeated over the candles until the next brick;
+    # of several bricks drawn in one candle only the last is seen
+    per_brick = qx.ti.rsi(bricks["close"], bot.tune["rsi_period"])
+    spread = np.unique(rsi[~np.isnan(rsi)])
+    assert len(rsi) == len(bars.line(bricks, len(data["close"])))
+    assert set(spread) <= set(per_brick)
+
+
+def test_trad_len_tunes_are_refused(data):
+    bot = Renko()
+    bot.tune["trad_len"] = 1.15
+    with pytest.raises(ValueError):
+        bot.indicators(data)
+
+
+@pytest.mark.parametrize("is_atr", [0, 1])
+@pytest.mark.parametrize("rsi_on_bricks", [0, 1])
+def test_backtests_agree(data, is_atr, rsi_on_bricks):
+    bot = Renko()
+    bot.tune.update(is_atr=is_atr, rsi_on_bricks=rsi_on_bricks)
+
+    def wallet():
+        # a first Sell with no asset held sells an unbounded volume
+        return qx.PaperWallet({data.asset: 1, data.currency: 0})
+
+    expected = qx.backtest(bot, data, wallet=wallet(), plot=False)
+    assert engine.backtest(bot, data, wallet=wallet()) == pytest.approx(expected)
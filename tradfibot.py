@@ -35,6 +35,8 @@ Strategy:
 
 import numpy as np
 import qtradex as qx
+from engine import votes
+from engine.kernels import ema_bank
 
 
 class TradFiInspired(qx.BaseBot):
@@ -86,8 +88,11 @@ class TradFiInspired(qx.BaseBot):
         sma_long = qx.ti.sma(data["close"], self.tune["sma_long_period"])
 
         # Exponential Moving Averages (EMA)
-        ema_short = qx.ti.ema(data["close"], self.tune["ema_short_period"])
-        ema_long = qx.ti.ema(data["close"], self.tune["ema_long_period"])
+        (ema_short, ema_long), _ = ema_bank(
+            data["close"],
+            [self.tune["ema_short_period"], self.tune["ema_long_period"]],
+            integer=True,
+        )
 
         # Relative Strength Index (RSI)
         rsi = qx.ti.rsi(data["close"], self.tune["rsi_period"])
@@ -123,6 +128,8 @@ class TradFiInspired(qx.BaseBot):
         )
 
         return {
+            # the Bollinger breakout conditions compare against price
+            "close": data["close"],
             "sma_short": sma_short,
             "sma_long": sma_long,
             "ema_short": ema_short,
@@ -162,39 +169,29 @@ class TradFiInspired(qx.BaseBot):
             ),
         )
 
-    def strategy(self, state, indicators):
+    def conditions(self, indicators, side):
         """
-        Define strategy with classical indicators and complex logic.
+        Bullish or bearish conditions, as `side` is "bull" or "bear", on a
+        single tick or on whole arrays.
         """
-        if state["last_trade"] is None:
-            # Enter market with all capital on the first trade
-            return qx.Buy()
-
-        # Buy Signal Logic
-        buy_conditions = [
-            # Short SMA above Long SMA (bullish trend)
-            indicators["sma_short"] > indicators["sma_long"],
-            # Short EMA above Long EMA (bullish trend)
-            indicators["ema_short"] > indicators["ema_long"],
-            # RSI below 30 (oversold)
-            indicators["rsi"] < 30,
-            # MACD above Signal line (bullish momentum)
-            indicators["macd"] > indicators["macd_signal"],
-            # Price breaking above upper Bollinger Band (breakout)
-            indicators["close"] > indicators["bbands_upper"],
-            # Stochastic K crosses above D (bullish signal)
-            indicators["stoch_k"] > indicators["stoch_d"],
-            # ADX above 25 (strong trend)
-            indicators["adx"] > 25,
-        ]
-
-        if sum(buy_conditions) >= self.tune["buy_threshold"]:
-            if isinstance(state["last_trade"], qx.Sell):
-                # Exit short position and enter long with all capital
-                return qx.Buy()
-
-        # Sell Signal Logic
-        sell_conditions = [
+        if side == "bull":
+            return [
+                # Short SMA above Long SMA (bullish trend)
+                indicators["sma_short"] > indicators["sma_long"],
+                # Short EMA above Long EMA (bullish trend)
+                indicators["ema_short"] > indicators["ema_long"],
+                # RSI below 30 (oversold)
+                indicators["rsi"] < 30,
+                # MACD above Signal line (bullish momentum)
+                indicators["macd"] > indicators["macd_signal"],
+                # Price breaking above upper Bollinger Band (breakout)
+                indicators["close"] > indicators["bbands_upper"],
+                # Stochastic K crosses above D (bullish signal)
+                indicators["stoch_k"] > indicators["stoch_d"],
+                # ADX above 25 (strong trend)
+                indicators["adx"] > 25,
+            ]
+        return [
             # Short SMA below Long SMA (bearish trend)
             indicators["sma_short"] < indicators["sma_long"],
             # Short EMA below Long EMA (bearish trend)
@@ -211,13 +208,37 @@ class TradFiInspired(qx.BaseBot):
             indicators["adx"] > 25,
         ]
 
-        if sum(sell_conditions) >= self.tune["sell_threshold"]:
+    def strategy(self, state, indicators):
+        """
+        Define strategy with classical indicators and complex logic.
+        """
+        if state["last_trade"] is None:
+            # Enter market with all capital on the first trade
+            return qx.Buy()
+
+        # Buy Signal Logic
+        if sum(self.conditions(indicators, "bull")) >= self.tune["buy_threshold"]:
+            if isinstance(state["last_trade"], qx.Sell):
+                # Exit short position and enter long with all capital
+                return qx.Buy()
+
+        # Sell Signal Logic
+        if sum(self.conditions(indicators, "bear")) >= self.tune["sell_threshold"]:
             if isinstance(state["last_trade"], qx.Buy):
                 # Exit long position and enter short with all capital
                 return qx.Sell()
 
         return None
 
+    def signals(self, data, indicators):
+        # vectorized `strategy` for `engine.backtest`
+        return votes.orders(
+            votes.tally(self.conditions(indicators, "bull")),
+            votes.tally(self.conditions(indicators, "bear")),
+            self.tune["buy_threshold"],
+            self.tune["sell_threshold"],
+        )
+
     def fitness(self, states, raw_states, asset, currency):
         """
         Measure fitness of the bot based on ROI, Sortino ratio, and win rate.
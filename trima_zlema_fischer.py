@@ -35,6 +35,7 @@ import time
 
 import numpy as np
 import qtradex as qx
+from engine import votes
 
 
 class TrimaZlemaFisher(qx.BaseBot):
@@ -147,6 +148,43 @@ class TrimaZlemaFisher(qx.BaseBot):
             ),
         )
 
+    def conditions(self, indicators, side):
+        """
+        Bullish or bearish criteria, as `side` is "bull" or "bear", on a single
+        tick or on whole arrays.
+        """
+        if side == "bull":
+            return [
+                # ZLEMA > TRIMA (Bullish)
+                indicators["zlema"]
+                > indicators["trima"] + self.tune["zlema_trima_bull"],
+                # Positive ZLEMA derivative
+                indicators["zlema_derivative"] > self.tune["zlema_d_threshold"],
+                # Positive TRIMA derivative
+                indicators["trima_derivative"] > self.tune["trima_d_threshold"],
+                # Fisher crossover (bullish)
+                indicators["fisher"] > indicators["fisher_signal"],
+                # Positive Fisher derivative
+                indicators["fisher_derivative"] > self.tune["fisher_d_threshold"],
+                # Positive Fisher Signal derivative
+                indicators["fisher_signal_derivative"]
+                > self.tune["fisher_d_threshold"],
+            ]
+        return [
+            # ZLEMA < TRIMA (Bearish)
+            indicators["zlema"] < indicators["trima"] - self.tune["zlema_trima_bear"],
+            # Negative ZLEMA derivative
+            indicators["zlema_derivative"] < self.tune["zlema_d_threshold"],
+            # Negative TRIMA derivative
+            indicators["trima_derivative"] < self.tune["trima_d_threshold"],
+            # Fisher crossover (bearish)
+            indicators["fisher"] < indicators["fisher_signal"],
+            # Negative Fisher derivative
+            indicators["fisher_derivative"] < self.tune["fisher_d_threshold"],
+            # Negative Fisher Signal derivative
+            indicators["fisher_signal_derivative"] < self.tune["fisher_d_threshold"],
+        ]
+
     def strategy(self, state, indicators):
         """
         Define strategy based on ZLEMA, TRIMA, and Fisher Transform with their derivatives.
@@ -156,73 +194,28 @@ class TrimaZlemaFisher(qx.BaseBot):
             return qx.Buy()
 
         # Bullish Signal Criteria
-        if (
-            sum(
-                [
-                    int(
-                        indicators["zlema"]
-                        > indicators["trima"] + self.tune["zlema_trima_bull"]
-                    ),  # ZLEMA > TRIMA (Bullish)
-                    int(
-                        indicators["zlema_derivative"] > self.tune["zlema_d_threshold"]
-                    ),  # Positive ZLEMA derivative
-                    int(
-                        indicators["trima_derivative"] > self.tune["trima_d_threshold"]
-                    ),  # Positive TRIMA derivative
-                    int(
-                        indicators["fisher"] > indicators["fisher_signal"]
-                    ),  # Fisher crossover (bullish)
-                    int(
-                        indicators["fisher_derivative"]
-                        > self.tune["fisher_d_threshold"]
-                    ),  # Positive Fisher derivative
-                    int(
-                        indicators["fisher_signal_derivative"]
-                        > self.tune["fisher_d_threshold"]
-                    ),  # Positive Fisher Signal derivative
-                ]
-            )
-            >= self.tune["buy_threshold"]
-        ):
+        if sum(self.conditions(indicators, "bull")) >= self.tune["buy_threshold"]:
             if isinstance(state["last_trade"], qx.Sell):
                 # Exit short position and enter long with all capital
                 return qx.Buy()
 
         # Bearish Signal Criteria
-        if (
-            sum(
-                [
-                    int(
-                        indicators["zlema"]
-                        < indicators["trima"] - self.tune["zlema_trima_bear"]
-                    ),  # ZLEMA < TRIMA (Bearish)
-                    int(
-                        indicators["zlema_derivative"] < self.tune["zlema_d_threshold"]
-                    ),  # Negative ZLEMA derivative
-                    int(
-                        indicators["trima_derivative"] < self.tune["trima_d_threshold"]
-                    ),  # Negative TRIMA derivative
-                    int(
-                        indicators["fisher"] < indicators["fisher_signal"]
-                    ),  # Fisher crossover (bearish)
-                    int(
-                        indicators["fisher_derivative"]
-                        < self.tune["fisher_d_threshold"]
-                    ),  # Negative Fisher derivative
-                    int(
-                        indicators["fisher_signal_derivative"]
-                        < self.tune["fisher_d_threshold"]
-                    ),  # Negative Fisher Signal derivative
-                ]
-            )
-            >= self.tune["sell_threshold"]
-        ):
+        if sum(self.conditions(indicators, "bear")) >= self.tune["sell_threshold"]:
             if isinstance(state["last_trade"], qx.Buy):
                 # Exit long position and enter short with all capital
                 return qx.Sell()
 
         return None
 
+    def signals(self, data, indicators):
+        # vectorized `strategy` for `engine.backtest`
+        return votes.orders(
+            votes.tally(self.conditions(indicators, "bull")),
+            votes.tally(self.conditions(indicators, "bear")),
+            self.tune["buy_threshold"],
+            self.tune["sell_threshold"],
+        )
+
     def fitness(self, states, raw_states, asset, currency):
         """
         Measure fitness of the bot based on ROI, Sortino ratio, and win rate.
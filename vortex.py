@@ -1,5 +1,6 @@
 import numpy as np
 import qtradex as qx
+from engine import crossings
 
 
 class VortexIndicatorBot(qx.BaseBot):
@@ -15,7 +16,7 @@ class VortexIndicatorBot(qx.BaseBot):
     def indicators(self, data):
         # Calculate Vortex Indicator components using the provided vortex_indicator function
         vortex_data = qx.qi.vortex(
-            data["high"], data["low"], self.tune["vortex_period"]
+            data["high"], data["low"], data["close"], self.tune["vortex_period"]
         )
 
         # Return the calculated indicators
@@ -54,6 +55,10 @@ class VortexIndicatorBot(qx.BaseBot):
 
         return None
 
+    def signals(self, data, indicators):
+        # vectorized `strategy` for `engine.backtest`
+        return crossings.gate(indicators["vortex_plus"], indicators["vortex_minus"])
+
     def fitness(self, states, raw_states, asset, currency):
         return [
             "roi_gross",